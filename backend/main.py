@@ -5,9 +5,10 @@ Main entry point for running the Job Application Agent with DatabaseSessionServi
 
 import sys
 import os
+import asyncio
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
-from fastapi import APIRouter
-from google.adk.cli.fast_api import get_fast_api_app
 
 # Load environment variables
 load_dotenv()
@@ -18,24 +19,179 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 # Configure database URL
 db_url = os.getenv("DATABASE_URL", "sqlite:///./adk_session.db")
 
-# Create FastAPI app with ADK integration
-app = get_fast_api_app(
-    agents_dir="src/agents",
-    session_service_uri=db_url,
-    web=True,
-    allow_origins=["*"],  # Configure as needed for your environment
-)
 
-# Health check router
-health_router = APIRouter()
+@lru_cache(maxsize=None)
+def create_app():
+    """
+    Builds the FastAPI app with ADK integration. Building it opens the session
+    database and the artifact store, so it only happens when the server needs
+    it, not when main is imported for the CLI commands.
+    """
+    from fastapi import APIRouter
+    from google.adk.cli.fast_api import get_fast_api_app
+    from src.tools.mcp_pool import mcp_pool, MCP_PREWARM_ALIASES
+    from src.utils.sessions_service import build_session_db_kwargs, get_session_service, pooled_session_service
+    from src.utils.artifacts_service import build_artifact_router, content_addressed_artifact_service, get_artifact_service
+    from src.utils.session_compaction import SessionCompactor, SESSION_COMPACT_INTERVAL_SECONDS
+    from src.utils.telemetry import build_metrics_router, telemetry_plugins
+    from src.utils.cassette import cassette_plugins
+    from src.utils.prompt_cache import prompt_cache_plugins
 
-@health_router.get("/health")
-async def health_check():
-    return {"status": "ok", "service": "job-application-agent"}
+    # Create FastAPI app with ADK integration, backed by the pooled session service
+    # and the local content-addressed artifact store
+    with pooled_session_service(), content_addressed_artifact_service():
+        app = get_fast_api_app(
+            agents_dir="src/agents",
+            session_service_uri=db_url,
+            session_db_kwargs=build_session_db_kwargs(db_url),
+            web=True,
+            allow_origins=["*"],  # Configure as needed for your environment
+            # The cassette plugin goes first so replayed model calls skip the other plugins
+            extra_plugins=cassette_plugins() + prompt_cache_plugins() + telemetry_plugins(),
+        )
+
+    # Health check router
+    health_router = APIRouter()
+
+    @health_router.get("/health")
+    async def health_check():
+        return {"status": "ok", "service": "job-application-agent"}
+
+    @health_router.get("/health/mcp")
+    async def mcp_health():
+        return mcp_pool.stats()
+
+    @health_router.get("/health/sessions")
+    async def sessions_health():
+        service = get_session_service()
+        return service.stats() if service else {"backend": "in-memory"}
+
+    @health_router.get("/health/artifacts")
+    async def artifacts_health():
+        return get_artifact_service().stats()
+
+    @health_router.get("/health/llm")
+    async def llm_health():
+        # The rate limit and hedging modules pull in litellm, so they load on first request
+        from src.utils.rate_limit import guard_stats
+        from src.utils.hedging import hedge_stats
+        from src.utils.prompt_cache import prompt_cache_stats
+        return {"models": guard_stats(), "hedging": hedge_stats(), "prompt_cache": prompt_cache_stats()}
+
+    app.include_router(health_router)
+    app.include_router(build_artifact_router())
+    app.include_router(build_metrics_router())
+
+    # Wrap ADK's lifespan to keep shared MCP servers warm and compact sessions in the background
+    adk_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with adk_lifespan(app):
+            if MCP_PREWARM_ALIASES:
+                await mcp_pool.prewarm(MCP_PREWARM_ALIASES)
+            background_tasks = [
+                asyncio.create_task(mcp_pool.run_eviction_loop()),
+                asyncio.create_task(asyncio.to_thread(get_artifact_service().collect_garbage)),
+            ]
+            session_service = get_session_service()
+            if session_service and SESSION_COMPACT_INTERVAL_SECONDS > 0:
+                compactor = SessionCompactor(session_service)
+                background_tasks.append(asyncio.create_task(compactor.run_loop()))
+            try:
+                yield
+            finally:
+                for task in background_tasks:
+                    task.cancel()
+                await mcp_pool.close_all()
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def __getattr__(name):
+    # Keeps `uvicorn main:app` working while building the app on first access
+    if name == "app":
+        return create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app.include_router(health_router)
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("serve", help="Run the FastAPI server (default)")
+    profile_parser = subparsers.add_parser("profile-imports", help="Report cold-start import times")
+    profile_parser.add_argument("modules", nargs="*", help="Modules to profile (defaults to main and all agents)")
+    profile_parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    profile_parser.add_argument("--build", action="store_true", help="Also time building each module's root_agent")
+    bench_parser = subparsers.add_parser("benchmark", help="Run offline benchmarks against mock LLM and Serper servers")
+    bench_parser.add_argument("scenarios", nargs="*", help="Scenarios to run (defaults to all)")
+    bench_parser.add_argument("--iterations", type=int, default=20, help="Timed iterations per scenario")
+    bench_parser.add_argument("--concurrency", type=int, default=4, help="Concurrent iterations per scenario")
+    bench_parser.add_argument("--llm-latency-ms", type=float, default=150.0, help="Median mock LLM time to first token")
+    bench_parser.add_argument("--llm-tokens-per-second", type=float, default=80.0, help="Median mock LLM generation rate")
+    bench_parser.add_argument("--llm-output-tokens", type=int, default=64, help="Mock LLM completion length")
+    bench_parser.add_argument("--serper-latency-ms", type=float, default=80.0, help="Median mock Serper latency")
+    bench_parser.add_argument("--contended-rpm", type=float, default=120.0, help="Mock rate limit of the call_llm.contended model")
+    bench_parser.add_argument("--baseline", help="Baseline JSON file (defaults to benchmarks/baseline.json)")
+    bench_parser.add_argument("--update-baseline", action="store_true", help="Record the results as the new baseline")
+    bench_parser.add_argument("--output", help="Also write the full report to this JSON file")
+    replay_parser = subparsers.add_parser("replay", help="Replay the agent sessions recorded in a cassette as a load test")
+    replay_parser.add_argument("cassette", help="Cassette recorded with CASSETTE_MODE=record")
+    replay_parser.add_argument("--concurrency", type=int, default=4, help="Sessions replayed at a time")
+    replay_parser.add_argument("--repeat", type=int, default=1, help="Times each recorded session is replayed")
+    replay_parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for recorded latencies (0 = instant)")
+    args = parser.parse_args()
+
+    if args.command == "profile-imports":
+        from src.utils.import_profile import DEFAULT_MODULES, profile_import, print_report
+        modules = args.modules or DEFAULT_MODULES
+        print_report([profile_import(m, build_root_agent=args.build, top=args.top) for m in modules])
+        return
+
+    if args.command == "benchmark":
+        import json
+        from src.utils.benchmark import (
+            BENCHMARK_BASELINE_PATH, BenchmarkConfig, compare_with_baseline, load_baseline, print_report as print_benchmarks,
+            run_benchmarks, save_baseline,
+        )
+        config = BenchmarkConfig(
+            iterations=args.iterations,
+            concurrency=args.concurrency,
+            llm_latency_ms=args.llm_latency_ms,
+            llm_tokens_per_second=args.llm_tokens_per_second,
+            llm_output_tokens=args.llm_output_tokens,
+            serper_latency_ms=args.serper_latency_ms,
+            contended_rpm=args.contended_rpm,
+        )
+        baseline_path = args.baseline or BENCHMARK_BASELINE_PATH
+        report = run_benchmarks(args.scenarios, config)
+        baseline = load_baseline(baseline_path)
+        print_benchmarks(report, baseline)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if args.update_baseline:
+            save_baseline(report, baseline_path)
+            print(f"Baseline written to {baseline_path}")
+            return
+        regressions = compare_with_baseline(report, baseline)
+        if regressions:
+            print("\nRegressions:\n" + "\n".join(f"- {r}" for r in regressions))
+            sys.exit(1)
+        return
+
+    if args.command == "replay":
+        from src.utils.benchmark import print_report as print_benchmarks, replay_cassette
+        from src.utils.cassette import use_cassette
+        use_cassette(args.cassette, "replay", latency_scale=args.latency_scale)
+        report = asyncio.run(replay_cassette(args.cassette, concurrency=args.concurrency, repeat=args.repeat))
+        print_benchmarks(report)
+        print(f"\nReplayed {report['sessions']} recorded sessions; cassette: {report['cassette']}")
+        return
+
     import uvicorn
     uvicorn.run(
         "main:app", 
@@ -33,8 +33,9 @@ Your final output must ALWAYS include:
 
 ### Phase 2: Data Access Decision
 1. If the authentic URL points **directly to a downloadable file** (CSV, JSON, XLS, PDF):
-   - Use `code_agent` (with `requests`, `curl`, or `wget`) to download the file.
-   - Save it to the workspace (e.g., `raw_data.ext`).
+   - For CSV, TSV, JSON, JSON Lines or Excel data, call `download_and_ingest` with the URL. It streams the file to disk (any size), converts it to Parquet and returns the schema, row count and sample rows.
+   - For other files, use `download_file` to stream them to the workspace (e.g., `raw_data.ext`).
+   - If a download is interrupted, call the same tool again with the same URL to resume it.
    - Proceed to Phase 3.
 
 2. If it is **NOT a direct download**:
@@ -46,7 +47,8 @@ Your final output must ALWAYS include:
 
 ### Phase 3: Extraction & Processing
 1. If the file is already structured (CSV, JSON, XLS):
-   - Use `code_agent` with `pandas` or equivalent to read and clean the data.
+   - Use the schema summary from `download_and_ingest` (or `ingest_file` / `summarize_dataset`) to plan the processing; do not `read_file` large raw data files.
+   - Use `code_agent` with `pandas` or `pyarrow` to read the returned Parquet file(s) and clean the data.
    - Save the cleaned version as `results.csv` or `results.json`.
 
 2. If the content is **HTML or unstructured**:
@@ -90,6 +92,10 @@ Your final output must ALWAYS include:
   - `run_shell_command` → Execute shell commands (`curl`, `wget`, `unzip`).
   - `memory` → Save and load key data points.
 
+- **Data**:
+  - `download_and_ingest` → Stream a data file to disk, convert it to Parquet and summarize its schema.
+  - `download_file`, `ingest_file`, `summarize_dataset` → The individual download, conversion and summary steps.
+
 - **Web**:
   - `fetch_web_page` → Quick static page retrieval.
   - `browser_agent` → For dynamic navigation and interaction.
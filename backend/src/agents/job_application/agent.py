@@ -1,147 +1,211 @@
 import sys
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../.."))
 
-from google.adk.models.lite_llm import LiteLlm  # For multi-model support
-from google.adk.tools.agent_tool import AgentTool
-from google.adk.code_executors import BuiltInCodeExecutor
-from google.adk.tools.mcp_tool.mcp_toolset import (
-    MCPToolset,
-    StdioServerParameters,
-    StdioConnectionParams,
-)
-from google.adk.agents import LlmAgent
-from google.adk.planners import PlanReActPlanner
 from src.agents.job_application.models import CVScreenerOutput
 from src.agents.job_application.prompts import JOB_DISCOVERY_PROMPT, SCORER_PROMPT, CV_SCREENER_PROMPT
-from src.tools.file_tools import get_file_tools
-from src.tools.todo_tools import get_todo_tools
-from src.tools.web_tools import get_web_tools
-from src.tools.system_tools import get_system_tools
-from src.tools.serper_search import get_serper_tools
-
-
-file_tools = get_file_tools()
-todo_tools = get_todo_tools()
-web_tools = get_web_tools()
-system_tools = get_system_tools()
-serper_tools = get_serper_tools()
-playwright_tools = MCPToolset(
-    connection_params=StdioConnectionParams(
-        server_params=StdioServerParameters(
-            command="npx",
-            args=["-y", "@executeautomation/playwright-mcp-server"],
-        ),
-        timeout=100,
-    ),
-    tool_filter=["*"],  # Optional: "*" means all tools
-)
+
+# Agents, LiteLlm wrappers (which import litellm) and heavy tools are built
+# on first access of `root_agent` and cached, so importing this module stays
+# cheap. See `__getattr__` at the bottom.
+
+
+def _llm(agent_name: str):
+    # Model per agent comes from the tier config in model_tiers.py
+    from src.agents.job_application.model_tiers import tiered_model
+    return tiered_model(agent_name)
+
+
+def _model_callbacks(*extra):
+    # Chain callback dicts; ADK runs a list of callbacks in order until one
+    # returns a value. Tier latency and spend are recorded by the model itself.
+    callbacks = {}
+    for more in extra:
+        for name, callback in more.items():
+            callbacks.setdefault(name, []).append(callback)
+    return {name: chain[0] if len(chain) == 1 else chain for name, chain in callbacks.items()}
+
 
 # Specialized Sub-Agents
 
-cv_screener_agent = LlmAgent(
-    name="cv_screener_agent",
-    description="A CV Screener Agent that screens the candidate's profile and extracts the relevant information. Accepts candidate profile as input and returns the candidate's profile in a structured format as per provided output schema",
-    model=LiteLlm(model="openai/gemini-2.5-pro"),
-    instruction=CV_SCREENER_PROMPT,
-    output_schema=CVScreenerOutput
-)
-
-search_agent = LlmAgent(
-    name="search_agent",
-    description="A Search Agent that searches the web for job postings. Accepts a query and returns the results as a list of URLs",
-    model=LiteLlm(model="openai/gemini-2.5-pro"),
-    instruction=(
-        "You are the Search Specialist. Your job is strictly: "
-        "1. Receive a query from the job_discovery_agent. "
-        "2. Run the `serper_search` tool for that query. "
-        "3. Output the results as a list of URLs. Do not analyze or summarize."
-    ),
-    tools=serper_tools,
-    disallow_transfer_to_parent=False
-
-)
-
-browser_agent = LlmAgent(
-    name="browser_agent",
-    description="A Browser Agent that navigates to job postings and extracts the relevant information. Accepts a URL and returns the relevant information",
-    model=LiteLlm(model="openai/gemini-2.5-pro"),
-    instruction=(
-        "You are a specialist in browser operations. You will be given a task to perform "
-        "in a browser. You should not make any assumptions about the browser or the task. "
-        "You should always list the current URL before and after performing the task."
-    ),
-    tools=[playwright_tools],
-    disallow_transfer_to_parent=False
-
-)
-
-code_agent = LlmAgent(
-    name="code_agent",
-    description="A Code Agent that executes code to download the job postings and extract the relevant information. Accepts a code and returns the results",
-    model=LiteLlm(model="openai/gemini-2.5-pro"),
-    instruction=(
-        "You are a specialist in code execution. You will be given Python code "
-        "to execute. You should not make any assumptions about the files "
-        "available. Always list the files in the current directory before "
-        "attempting to read a file. If any code fails due to a missing package, "
-        "automatically install it using `pip install <package>`."
-    ),
-    code_executor=BuiltInCodeExecutor(error_retry_attempts=3, stateful=True),
-    disallow_transfer_to_parent=False
-)
-
-job_discovery_agent = LlmAgent(
-    name="job_discovery_agent",
-    description="A Job Discovery Agent that searches the web, does browser navigation and has coding abilities to accurately find job postings.",
-    model=LiteLlm(model="openai/gemini-2.5-pro"),
-    instruction=JOB_DISCOVERY_PROMPT,
-    tools=[AgentTool(search_agent), AgentTool(browser_agent), AgentTool(code_agent)]
-)
-
-scorer_agent = LlmAgent(
-    name="scorer_agent",
-    description="A Scorer Agent that scores the CV with the available openings and gives a score, returns the detailed scoring report.",
-    model=LiteLlm(model="openai/gemini-2.5-pro"),
-    instruction=SCORER_PROMPT,
-)
+@lru_cache(maxsize=None)
+def build_cv_screener_agent():
+    from google.adk.agents import LlmAgent
+    from src.agents.job_application.cv_cache import cv_cache_callbacks
+
+    return LlmAgent(
+        name="cv_screener_agent",
+        description="A CV Screener Agent that screens the candidate's profile and extracts the relevant information. Accepts candidate profile as input and returns the candidate's profile in a structured format as per provided output schema",
+        model=_llm("cv_screener_agent"),
+        **_model_callbacks(cv_cache_callbacks()),
+        instruction=CV_SCREENER_PROMPT,
+        output_schema=CVScreenerOutput
+    )
+
+
+@lru_cache(maxsize=None)
+def build_search_agent():
+    from google.adk.agents import LlmAgent
+    from src.tools.serper_search import get_serper_tools
+
+    return LlmAgent(
+        name="search_agent",
+        description="A Search Agent that searches the web for job postings. Accepts a query and returns the results as a list of URLs",
+        model=_llm("search_agent"),
+        **_model_callbacks(),
+        instruction=(
+            "You are the Search Specialist. Your job is strictly: "
+            "1. Receive a query from the job_discovery_agent. "
+            "2. Run the `serper_search` tool for that query. "
+            "3. Output the results as a list of URLs. Do not analyze or summarize."
+        ),
+        tools=get_serper_tools(),
+        disallow_transfer_to_parent=False
+
+    )
+
+
+@lru_cache(maxsize=None)
+def build_browser_agent():
+    from google.adk.agents import LlmAgent
+    from src.tools.mcp_pool import get_playwright_toolset
+
+    return LlmAgent(
+        name="browser_agent",
+        description="A Browser Agent that navigates to job postings and extracts the relevant information. Accepts a URL and returns the relevant information",
+        model=_llm("browser_agent"),
+        **_model_callbacks(),
+        instruction=(
+            "You are a specialist in browser operations. You will be given a task to perform "
+            "in a browser. You should not make any assumptions about the browser or the task. "
+            "You should always list the current URL before and after performing the task."
+        ),
+        tools=[get_playwright_toolset()],
+        disallow_transfer_to_parent=False
+
+    )
+
+
+@lru_cache(maxsize=None)
+def build_code_agent():
+    from google.adk.agents import LlmAgent
+    from google.adk.code_executors import BuiltInCodeExecutor
+
+    return LlmAgent(
+        name="code_agent",
+        description="A Code Agent that executes code to download the job postings and extract the relevant information. Accepts a code and returns the results",
+        model=_llm("code_agent"),
+        **_model_callbacks(),
+        instruction=(
+            "You are a specialist in code execution. You will be given Python code "
+            "to execute. You should not make any assumptions about the files "
+            "available. Always list the files in the current directory before "
+            "attempting to read a file. If any code fails due to a missing package, "
+            "automatically install it using `pip install <package>`."
+        ),
+        code_executor=BuiltInCodeExecutor(error_retry_attempts=3, stateful=True),
+        disallow_transfer_to_parent=False
+    )
+
+
+@lru_cache(maxsize=None)
+def build_job_discovery_agent():
+    from google.adk.agents import LlmAgent
+    from google.adk.tools.agent_tool import AgentTool
+    from src.agents.job_application.posting_index import check_seen_job_urls, record_job_postings
+
+    return LlmAgent(
+        name="job_discovery_agent",
+        description="A Job Discovery Agent that searches the web, does browser navigation and has coding abilities to accurately find job postings.",
+        model=_llm("job_discovery_agent"),
+        **_model_callbacks(),
+        instruction=JOB_DISCOVERY_PROMPT,
+        tools=[
+            AgentTool(build_search_agent()),
+            AgentTool(build_browser_agent()),
+            AgentTool(build_code_agent()),
+            check_seen_job_urls,
+            record_job_postings,
+        ]
+    )
+
+
+@lru_cache(maxsize=None)
+def build_scorer_agent():
+    from google.adk.agents import LlmAgent
+    from src.agents.job_application.scoring import score_job_postings
+
+    return LlmAgent(
+        name="scorer_agent",
+        description="A Scorer Agent that scores the CV with the available openings and gives a score, returns the detailed scoring report.",
+        model=_llm("scorer_agent"),
+        **_model_callbacks(),
+        instruction=SCORER_PROMPT,
+        tools=[score_job_postings],
+    )
+
 
 # Main Assistant Agent
-assistant_agent = LlmAgent(
-    name="assistant_agent",
-    description="An Assistant Agent that assists users in the job application process by providing information, answering questions, and coordinating with other agents/tools as needed.",
-    model=LiteLlm(model="openai/gemini-2.5-pro"),
-    instruction=(
-        "You are the Assistant Agent. Your job is to assist users in the job application process by "
-        "providing information, answering questions, and coordinating with other agents/tools as needed. "
-        "First you need to analyze the user's request and understand the user's intent. Then ask for additional information if needed. including user preferences for job search (like location, industry etc.)"
-        "You need to create a step by step plan and call the relevant agents/tools in loop to complete the user's request. "
-        "Always follow the sequence: "
-        "1. `cv_screener_agent`: First screens the CV and converts to a structured output "
-        "2. `job_discovery_agent`: Uses web search, browser and coding agents to search the matching requirements "
-        "3. `scorer_agent`: Scores the CV with the available openings and gives a score, returns the detailed scoring report,"
-        "Finally, you need to generate the scoring report for all job postings"
-        "Return in a markdown format with the following details for all job postings: "
-        "- Job Title"
-        "- Company"
-        "- Job URL"
-        "- Location"
-        "- Job Description"
-        "- Requirements"
-        "- Score"  
-        "- Reasoning"
-        "Always make sure to review before returning the output, if the profile is correctly matched with the job postings. Do understand the reasoning for the score. and provide a recommendation for the candidate on which job postings to prioritize for application."
-    ),
-    tools=[
-        AgentTool(cv_screener_agent),
-        AgentTool(job_discovery_agent),
-        AgentTool(scorer_agent),
-    ],
-    planner=PlanReActPlanner(),
-)
-
-root_agent = assistant_agent
+@lru_cache(maxsize=None)
+def build_assistant_agent():
+    from google.adk.agents import LlmAgent
+    from google.adk.planners import PlanReActPlanner
+    from google.adk.tools.agent_tool import AgentTool
+    from src.agents.job_application.cv_cache import cv_document_callbacks
+
+    return LlmAgent(
+        name="assistant_agent",
+        description="An Assistant Agent that assists users in the job application process by providing information, answering questions, and coordinating with other agents/tools as needed.",
+        model=_llm("assistant_agent"),
+        **_model_callbacks(cv_document_callbacks()),
+        instruction=(
+            "You are the Assistant Agent. Your job is to assist users in the job application process by "
+            "providing information, answering questions, and coordinating with other agents/tools as needed. "
+            "First you need to analyze the user's request and understand the user's intent. Then ask for additional information if needed. including user preferences for job search (like location, industry etc.)"
+            "You need to create a step by step plan and call the relevant agents/tools in loop to complete the user's request. "
+            "Always follow the sequence: "
+            "1. `cv_screener_agent`: First screens the CV and converts to a structured output "
+            "2. `job_discovery_agent`: Uses web search, browser and coding agents to search the matching requirements "
+            "3. `scorer_agent`: Scores the CV with the available openings and gives a score, returns the detailed scoring report,"
+            "Finally, you need to generate the scoring report for all job postings"
+            "Return in a markdown format with the following details for all job postings: "
+            "- Job Title"
+            "- Company"
+            "- Job URL"
+            "- Location"
+            "- Job Description"
+            "- Requirements"
+            "- Score"
+            "- Reasoning"
+            "Always make sure to review before returning the output, if the profile is correctly matched with the job postings. Do understand the reasoning for the score. and provide a recommendation for the candidate on which job postings to prioritize for application."
+        ),
+        tools=[
+            AgentTool(build_cv_screener_agent()),
+            AgentTool(build_job_discovery_agent()),
+            AgentTool(build_scorer_agent()),
+        ],
+        planner=PlanReActPlanner(),
+    )
+
+
+_LAZY_ATTRIBUTES = {
+    "cv_screener_agent": build_cv_screener_agent,
+    "search_agent": build_search_agent,
+    "browser_agent": build_browser_agent,
+    "code_agent": build_code_agent,
+    "job_discovery_agent": build_job_discovery_agent,
+    "scorer_agent": build_scorer_agent,
+    "assistant_agent": build_assistant_agent,
+    "root_agent": build_assistant_agent,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,196 @@
+"""
+Columnar batch containers for job application records.
+
+Ranking and scoring work on thousands of JobPosting and CVScreenerOutput
+records at once. Holding each as a Pydantic model costs a dict and
+validator state per record, and records get re-validated on every hop.
+A batch validates records once, stores them column by column (one Python
+list per field) and converts to Arrow for vectorized filtering, to NumPy
+for numeric columns and to Parquet for compact on-disk storage.
+
+    batch = JobPostingBatch.from_models(postings)
+    remote = batch.filter(pc.match_substring(batch.to_arrow()["location"], "Remote"))
+    remote.to_parquet("artifacts/postings.parquet")
+    postings = JobPostingBatch.from_parquet("artifacts/postings.parquet").to_models()
+
+Models are rebuilt with `model_construct`, since the data was validated when
+the batch was created.
+"""
+import types
+import typing
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Type
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic import BaseModel
+
+from src.agents.job_application.models import (
+    CVScreenerOutput,
+    Education,
+    JobPosting,
+    JobScore,
+    WorkExperience,
+)
+
+_SCALAR_TYPES = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def arrow_type(annotation: Any) -> pa.DataType:
+    """Maps a model field annotation to an Arrow type."""
+    annotation = _unwrap_optional(annotation)
+    if annotation in _SCALAR_TYPES:
+        return _SCALAR_TYPES[annotation]
+    if typing.get_origin(annotation) in (list, List):
+        return pa.list_(arrow_type(typing.get_args(annotation)[0]))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return pa.struct([pa.field(name, arrow_type(f.annotation)) for name, f in annotation.model_fields.items()])
+    raise TypeError(f"No Arrow type for field annotation {annotation!r}")
+
+
+def arrow_schema(model: Type[BaseModel]) -> pa.Schema:
+    return pa.schema([pa.field(name, arrow_type(f.annotation)) for name, f in model.model_fields.items()])
+
+
+def _construct(model: Type[BaseModel], values: Dict[str, Any]) -> BaseModel:
+    """Rebuilds a model and its nested models from plain values without validating."""
+    fields = {}
+    for name, field in model.model_fields.items():
+        value = values.get(name)
+        annotation = _unwrap_optional(field.annotation)
+        if value is not None and typing.get_origin(annotation) in (list, List):
+            item = typing.get_args(annotation)[0]
+            if isinstance(item, type) and issubclass(item, BaseModel):
+                value = [_construct(item, v) for v in value]
+        elif value is not None and isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            value = _construct(annotation, value)
+        fields[name] = value
+    return model.model_construct(**fields)
+
+
+class RecordBatch:
+    """
+    Column-oriented store of validated records of one model type.
+
+    Subclasses set `model`. Columns hold plain Python values (nested models as
+    dicts) in field order, so a batch of N records costs one list per field
+    instead of N model instances.
+    """
+
+    __slots__ = ("columns", "_length", "_table")
+    model: Type[BaseModel] = BaseModel
+
+    def __init__(self, columns: Dict[str, List[Any]]):
+        names = list(self.model.model_fields)
+        missing = [n for n in names if n not in columns]
+        if missing:
+            raise ValueError(f"Missing columns for {self.model.__name__}: {missing}")
+        lengths = {len(columns[n]) for n in names}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        self.columns = {n: columns[n] for n in names}
+        self._length = lengths.pop() if lengths else 0
+        self._table = None
+
+    @classmethod
+    def from_models(cls, records: Iterable[BaseModel]) -> "RecordBatch":
+        columns: Dict[str, List[Any]] = {name: [] for name in cls.model.model_fields}
+        for record in records:
+            for name, value in record.model_dump().items():
+                columns[name].append(value)
+        return cls(columns)
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[Dict[str, Any]]) -> "RecordBatch":
+        """Validates raw dicts once and stores them."""
+        return cls.from_models(cls.model.model_validate(r) for r in records)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> BaseModel:
+        return _construct(self.model, {name: column[index] for name, column in self.columns.items()})
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        for i in range(self._length):
+            yield self[i]
+
+    def to_models(self) -> List[BaseModel]:
+        return list(self)
+
+    def take(self, indices: Sequence[int]) -> "RecordBatch":
+        return type(self)({name: [column[i] for i in indices] for name, column in self.columns.items()})
+
+    def filter(self, mask: Any) -> "RecordBatch":
+        """Keeps rows where `mask` (a boolean NumPy array, Arrow array or sequence) is true."""
+        if isinstance(mask, (pa.Array, pa.ChunkedArray)):
+            mask = mask.to_numpy(zero_copy_only=False)
+        return self.take(np.flatnonzero(np.asarray(mask, dtype=bool)))
+
+    def to_arrow(self) -> pa.Table:
+        """Returns the batch as an Arrow table, built once and cached."""
+        if self._table is None:
+            schema = arrow_schema(self.model)
+            self._table = pa.Table.from_arrays(
+                [pa.array(self.columns[field.name], type=field.type) for field in schema],
+                schema=schema,
+            )
+        return self._table
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> "RecordBatch":
+        batch = cls({name: table.column(name).to_pylist() for name in cls.model.model_fields})
+        batch._table = table.select(list(cls.model.model_fields))
+        return batch
+
+    def to_numpy(self, name: str) -> np.ndarray:
+        """
+        Returns one column as a NumPy array. Numeric columns without nulls
+        are zero-copy views of the Arrow buffer; nulls become NaN.
+        """
+        column = self.to_arrow().column(name).combine_chunks()
+        if pa.types.is_floating(column.type) or pa.types.is_integer(column.type):
+            if column.null_count == 0:
+                return column.to_numpy(zero_copy_only=True)
+            return column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        return column.to_numpy(zero_copy_only=False)
+
+    def to_parquet(self, path: str, compression: str = "zstd") -> None:
+        pq.write_table(self.to_arrow(), path, compression=compression)
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "RecordBatch":
+        return cls.from_arrow(pq.read_table(path, schema=arrow_schema(cls.model)))
+
+
+class JobPostingBatch(RecordBatch):
+    __slots__ = ()
+    model = JobPosting
+
+
+class CVProfileBatch(RecordBatch):
+    __slots__ = ()
+    model = CVScreenerOutput
+
+
+class WorkExperienceBatch(RecordBatch):
+    __slots__ = ()
+    model = WorkExperience
+
+
+class EducationBatch(RecordBatch):
+    __slots__ = ()
+    model = Education
+
+
+class JobScoreBatch(RecordBatch):
+    __slots__ = ()
+    model = JobScore
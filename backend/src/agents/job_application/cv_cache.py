@@ -0,0 +1,198 @@
+"""
+Persistent cache of parsed CVs for `cv_screener_agent`.
+
+Re-running the job application flow with the same CV would otherwise
+re-extract an identical CVScreenerOutput on the pro model every time.
+
+The cache is keyed on the CV document itself, not on the request the
+coordinator writes for `cv_screener_agent` (which is reworded on every run).
+A before-agent callback on the coordinator fingerprints the CV the user sent:
+the bytes of an uploaded file, or the normalized text of a message of at
+least CV_DOCUMENT_MIN_CHARS characters. It keeps the fingerprint in session
+state under CV_DOCUMENT_STATE_KEY, which AgentTool copies into the
+sub-agent's session. The cache key combines that fingerprint with a version
+hash of CV_SCREENER_PROMPT, the CVScreenerOutput JSON schema and the agent's
+model, so editing the prompt, the schema or the model tier invalidates
+earlier entries automatically.
+
+On a hit, a before-agent callback returns the cached profile and the model
+call is skipped entirely; on a miss, an after-model callback stores the
+response once it validates against CVScreenerOutput. Without a fingerprint
+in state the cache is bypassed.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from google.genai import types
+from pydantic import ValidationError
+
+from src.agents.job_application.models import CVScreenerOutput
+from src.agents.job_application.prompts import CV_SCREENER_PROMPT
+from src.utils.kv_store import SQLiteKVStore
+from src.utils.telemetry import record_cache
+
+logger = logging.getLogger(__name__)
+
+AGENT_NAME = "cv_screener_agent"
+CV_CACHE_ENABLED = os.getenv("CV_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+CV_CACHE_DB_PATH = os.getenv("CV_CACHE_DB_PATH", "artifacts/cv_cache.db")
+CV_CACHE_MAX_ENTRIES = int(os.getenv("CV_CACHE_MAX_ENTRIES", "500"))
+# Shorter messages are instructions ("now search in Berlin"), not a CV.
+CV_DOCUMENT_MIN_CHARS = int(os.getenv("CV_DOCUMENT_MIN_CHARS", "400"))
+CV_DOCUMENT_STATE_KEY = "cv_document_sha256"
+_NAMESPACE = "cv_screener"
+
+
+def normalize_cv_text(text: str) -> str:
+    """Normalizes unicode and whitespace so trivially different copies of a CV share a key."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+@lru_cache(maxsize=None)
+def cache_version() -> str:
+    """Hash of everything besides the CV that determines the parsed profile."""
+    from src.agents.job_application.model_tiers import get_agent_model
+
+    fingerprint = json.dumps({
+        "prompt": CV_SCREENER_PROMPT,
+        "schema": CVScreenerOutput.model_json_schema(),
+        "model": get_agent_model(AGENT_NAME),
+    }, sort_keys=True)
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+
+def document_fingerprint(content: Optional[types.Content]) -> Optional[str]:
+    """
+    SHA-256 of the CV in a user message: the uploaded files if there are any,
+    otherwise the normalized text when it is long enough to be a CV.
+
+    Returns:
+        The hex digest, or None when the message carries no CV.
+    """
+    if not content or not content.parts:
+        return None
+    digest = hashlib.sha256()
+    files = [part for part in content.parts if part.inline_data or part.file_data]
+    if files:
+        for part in files:
+            if part.inline_data:
+                digest.update(part.inline_data.data or b"")
+            else:
+                digest.update((part.file_data.file_uri or "").encode("utf-8"))
+        return digest.hexdigest()
+    text = normalize_cv_text("\n".join(part.text for part in content.parts if part.text and not part.thought))
+    if len(text) < CV_DOCUMENT_MIN_CHARS:
+        return None
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def cache_key(document_sha256: str) -> str:
+    return f"{cache_version()}:{document_sha256}"
+
+
+class CVParseCache:
+    """Stores validated CVScreenerOutput JSON by cache key and counts hits and misses."""
+
+    def __init__(self, db_path: str = CV_CACHE_DB_PATH, max_entries: int = CV_CACHE_MAX_ENTRIES):
+        self.store = SQLiteKVStore(db_path=db_path, max_entries_per_namespace=max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, document_sha256: str) -> Optional[CVScreenerOutput]:
+        value = self.store.get(_NAMESPACE, cache_key(document_sha256))
+        profile = None
+        if value is not None:
+            try:
+                profile = CVScreenerOutput.model_validate_json(value)
+            except ValidationError:
+                self.store.delete(_NAMESPACE, cache_key(document_sha256))
+        with self._lock:
+            if profile is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        record_cache("cv_parse", profile is not None)
+        return profile
+
+    def put(self, document_sha256: str, profile: CVScreenerOutput) -> None:
+        self.store.set(_NAMESPACE, cache_key(document_sha256), profile.model_dump_json())
+
+    def clear(self) -> int:
+        return self.store.clear(_NAMESPACE)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {"hits": self.hits, "misses": self.misses}
+        return {**counters, "version": cache_version(), **self.store.stats(_NAMESPACE)}
+
+
+_cache: Optional[CVParseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cv_cache() -> CVParseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CVParseCache()
+        return _cache
+
+
+def _response_text(llm_response) -> str:
+    content = llm_response.content
+    if not content or not content.parts:
+        return ""
+    return "".join(part.text for part in content.parts if part.text and not part.thought)
+
+
+def _remember_cv_document(callback_context) -> None:
+    document = document_fingerprint(callback_context.user_content)
+    if document is not None and callback_context.state.get(CV_DOCUMENT_STATE_KEY) != document:
+        callback_context.state[CV_DOCUMENT_STATE_KEY] = document
+    return None
+
+
+def _before_agent(callback_context) -> Optional[types.Content]:
+    document = callback_context.state.get(CV_DOCUMENT_STATE_KEY)
+    if not document:
+        return None
+    profile = get_cv_cache().get(document)
+    if profile is None:
+        return None
+    logger.info("cv_screener_agent: using cached profile %s", cache_key(document))
+    return types.Content(role="model", parts=[types.Part(text=profile.model_dump_json())])
+
+
+def _after_model(callback_context, llm_response):
+    if llm_response.partial or llm_response.error_code:
+        return None
+    document = callback_context.state.get(CV_DOCUMENT_STATE_KEY)
+    text = _response_text(llm_response)
+    if document and text:
+        try:
+            get_cv_cache().put(document, CVScreenerOutput.model_validate_json(text))
+        except ValidationError:
+            pass
+    return None
+
+
+def cv_cache_callbacks() -> Dict[str, Any]:
+    """LlmAgent callback kwargs that serve and fill the CV parse cache; empty when disabled."""
+    if not CV_CACHE_ENABLED:
+        return {}
+    return {"before_agent_callback": _before_agent, "after_model_callback": _after_model}
+
+
+def cv_document_callbacks() -> Dict[str, Any]:
+    """Callback kwargs for the coordinator agent that record the fingerprint of the CV the user sent."""
+    if not CV_CACHE_ENABLED:
+        return {}
+    return {"before_agent_callback": _remember_cv_document}
@@ -0,0 +1,180 @@
+"""
+Model tiering for the job application agents.
+
+Each agent role maps to a tier ("flash" or "pro") and each tier to a
+model, so mechanical hops such as `search_agent` run on a cheaper, faster
+model while reasoning-heavy agents keep the pro model. Both mappings can be
+overridden from the environment without touching `agent.py`:
+
+    MODEL_TIER_FLASH=openai/gemini-2.5-flash
+    MODEL_TIER_PRO=openai/gemini-2.5-pro
+    JOB_AGENT_TIERS=search_agent=pro,code_agent=flash
+
+A request that fails on a lower tier is retried on the next tier up, and
+per-agent latency, token spend and upgrades are recorded in `tier_metrics`
+under the model that answered.
+Requests go through `PromptCachingLiteLLMClient`, which adds the prompt
+cache markers from src.utils.prompt_cache and counts cached input tokens.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict, List
+
+from google.adk.models.lite_llm import LiteLlm, LiteLLMClient
+
+from src.utils.prompt_cache import mark_cache_breakpoints, record_usage
+from src.utils.telemetry import record_retry
+
+logger = logging.getLogger(__name__)
+
+TIER_ORDER = ["flash", "pro"]
+
+MODEL_TIERS = {
+    "flash": os.getenv("MODEL_TIER_FLASH", "openai/gemini-2.5-flash"),
+    "pro": os.getenv("MODEL_TIER_PRO", "openai/gemini-2.5-pro"),
+}
+
+DEFAULT_AGENT_TIERS = {
+    "search_agent": "flash",
+    "browser_agent": "flash",
+    "code_agent": "flash",
+    "cv_screener_agent": "pro",
+    "job_discovery_agent": "pro",
+    "scorer_agent": "pro",
+    "assistant_agent": "pro",
+}
+
+
+def _parse_overrides(value: str) -> Dict[str, str]:
+    overrides = {}
+    for item in value.split(","):
+        if "=" in item:
+            agent, tier = (part.strip() for part in item.split("=", 1))
+            if tier not in MODEL_TIERS:
+                logger.warning("Ignoring JOB_AGENT_TIERS entry %r: unknown tier %r (expected one of %s)",
+                               item.strip(), tier, ", ".join(MODEL_TIERS))
+                continue
+            overrides[agent] = tier
+    return overrides
+
+
+AGENT_TIERS = {**DEFAULT_AGENT_TIERS, **_parse_overrides(os.getenv("JOB_AGENT_TIERS", ""))}
+
+
+class _TierMetrics:
+    """Thread-safe per-agent counters for calls, latency, tokens and upgrades, broken down by answering model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, agent_name: str) -> Dict[str, Any]:
+        return self._agents.setdefault(agent_name, {
+            "calls": 0, "latency_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "upgrades": 0,
+            "models": {},
+        })
+
+    def record(self, agent_name: str, model: str, latency: float, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            entry = self._entry(agent_name)
+            per_model = entry["models"].setdefault(model, {
+                "calls": 0, "latency_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+            })
+            for counters in (entry, per_model):
+                counters["calls"] += 1
+                counters["latency_seconds"] += latency
+                counters["prompt_tokens"] += prompt_tokens
+                counters["completion_tokens"] += completion_tokens
+
+    def upgrade(self, agent_name: str) -> None:
+        with self._lock:
+            self._entry(agent_name)["upgrades"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    **entry,
+                    "models": {model: dict(counters) for model, counters in entry["models"].items()},
+                    "model": get_agent_model(name),
+                    "tier": AGENT_TIERS.get(name, "pro"),
+                }
+                for name, entry in self._agents.items()
+            }
+
+
+tier_metrics = _TierMetrics()
+
+
+def get_agent_model(agent_name: str) -> str:
+    return MODEL_TIERS[AGENT_TIERS.get(agent_name, "pro")]
+
+
+class PromptCachingLiteLLMClient(LiteLLMClient):
+    """LiteLLM client that marks the static prompt prefix as cacheable."""
+
+    async def acompletion(self, model, messages, tools, **kwargs):
+        response = await super().acompletion(model, mark_cache_breakpoints(model, messages), tools, **kwargs)
+        if not kwargs.get("stream"):
+            # ADK drops the cached token counts when it converts the response.
+            record_usage(model, response)
+        return response
+
+    def completion(self, model, messages, tools, stream=False, **kwargs):
+        return super().completion(model, mark_cache_breakpoints(model, messages), tools, stream=stream, **kwargs)
+
+
+class TieredLiteLlm(LiteLlm):
+    """LiteLlm that retries a failed request on the models of higher tiers."""
+
+    agent_name: str = ""
+    fallback_models: List[str] = []
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator:
+        attempts = [None] + self.fallback_models
+        for i, fallback in enumerate(attempts):
+            llm = self if fallback is None else LiteLlm(model=fallback, llm_client=self.llm_client)
+            generate = super().generate_content_async if fallback is None else llm.generate_content_async
+            yielded = False
+            start = time.perf_counter()
+            try:
+                async for response in generate(llm_request, stream=stream):
+                    yielded = True
+                    if not response.partial:
+                        self._record(llm.model, time.perf_counter() - start, response)
+                    yield response
+                return
+            except Exception as e:
+                # Only retry when nothing has been streamed to the caller yet.
+                if yielded or i == len(attempts) - 1:
+                    raise
+                logger.warning(
+                    "%s failed on %s (%s); upgrading to %s",
+                    self.agent_name, llm.model, e, attempts[i + 1],
+                )
+                tier_metrics.upgrade(self.agent_name)
+                record_retry(llm.model, "tier_upgrade")
+
+    def _record(self, model: str, latency: float, response) -> None:
+        # Measured here rather than in model callbacks so the model is the one that
+        # answered, and a short-circuited or failed call leaves nothing behind.
+        usage = response.usage_metadata
+        prompt_tokens = (usage.prompt_token_count or 0) if usage else 0
+        completion_tokens = (usage.candidates_token_count or 0) if usage else 0
+        tier_metrics.record(self.agent_name, model, latency, prompt_tokens, completion_tokens)
+        logger.info(
+            "agent=%s model=%s latency=%.2fs prompt_tokens=%d completion_tokens=%d",
+            self.agent_name, model, latency, prompt_tokens, completion_tokens,
+        )
+
+
+def tiered_model(agent_name: str) -> TieredLiteLlm:
+    """Returns the model for `agent_name`, with higher tiers as fallbacks."""
+    tier = AGENT_TIERS.get(agent_name, "pro")
+    higher = TIER_ORDER[TIER_ORDER.index(tier) + 1:] if tier in TIER_ORDER else []
+    model = MODEL_TIERS[tier]
+    fallbacks = [MODEL_TIERS[t] for t in higher if MODEL_TIERS[t] != model]
+    return TieredLiteLlm(model=model, agent_name=agent_name, fallback_models=fallbacks,
+                         llm_client=PromptCachingLiteLLMClient())
@@ -78,4 +78,14 @@ class JobPosting(BaseModel):
     requirements: List[str]
     application_link: Optional[str]
     posted_date: Optional[str]
-    employment_type: Optional[str]  # e.g., "Full-time", "Part-time", "Contract"
\ No newline at end of file
+    employment_type: Optional[str]  # e.g., "Full-time", "Part-time", "Contract"
+
+
+class JobScore(BaseModel):
+    job_title: str
+    company: str
+    application_link: Optional[str]
+    score: int  # 0-100
+    matched_skills: List[str]
+    missing_requirements: List[str]
+    reasoning: str  # 1-3 sentences
@@ -0,0 +1,368 @@
+"""
+Persistent index of discovered job postings, shared across queries and sessions.
+
+`job_discovery_agent` keeps finding the same postings through different
+queries, tracking-parameter URLs and aggregator mirrors, and each copy is
+browsed and scored again. The index stores every posting under its
+canonical URL and a 64-bit SimHash of its title, company and description:
+
+- URLs are canonicalized (lowercased host, no `www.`, tracking parameters,
+  fragments and trailing slashes removed, known aggregator job ids mapped to
+  a single form), so URL variants resolve to one entry.
+- Postings whose SimHash is within JOB_INDEX_SIMHASH_DISTANCE bits of an
+  indexed posting from the same company and location are treated as the
+  same job posted on another site. The same role advertised in several
+  cities stays one entry per city; a posting without a location matches
+  any location.
+- URLs seen within JOB_INDEX_FRESHNESS_HOURS are returned from the index
+  instead of being re-fetched.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import ValidationError
+
+from src.agents.job_application.models import JobPosting
+from src.utils.telemetry import record_cache
+
+JOB_INDEX_DB_PATH = os.getenv("JOB_INDEX_DB_PATH", "artifacts/job_postings.db")
+JOB_INDEX_FRESHNESS_HOURS = float(os.getenv("JOB_INDEX_FRESHNESS_HOURS", "72"))
+JOB_INDEX_SIMHASH_DISTANCE = int(os.getenv("JOB_INDEX_SIMHASH_DISTANCE", "6"))
+
+_TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "refid", "ref_src", "referrer", "source", "src",
+    "trk", "trkinfo", "tracking_id", "trackingid", "from", "origin", "lipi", "campaign", "cmp",
+}
+_TRACKING_PREFIXES = ("utm_", "_hs", "hsa_", "pk_")
+
+# Aggregators that expose one posting under several URL shapes: (host suffix, job id pattern, canonical form)
+_AGGREGATOR_RULES = [
+    ("linkedin.com", re.compile(r"(?:/jobs/view/(?:[^/]*-)?|[?&]currentJobId=)(\d+)"), "https://linkedin.com/jobs/view/{}"),
+    ("indeed.com", re.compile(r"[?&](?:jk|vjk)=([0-9a-f]+)"), "https://indeed.com/viewjob?jk={}"),
+    ("glassdoor.com", re.compile(r"[?&]jobListingId=(\d+)|_JV_\w*?KO\d+,\d+_KE\d+,\d+\.htm\?jl=(\d+)"), "https://glassdoor.com/job-listing/?jl={}"),
+    ("greenhouse.io", re.compile(r"/([\w-]+)/jobs/(\d+)"), "https://boards.greenhouse.io/{}/jobs/{}"),
+    ("lever.co", re.compile(r"lever\.co/([\w-]+)/([0-9a-f-]{36})"), "https://jobs.lever.co/{}/{}"),
+]
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def canonicalize_url(url: str) -> str:
+    """Returns a canonical form of a job posting URL for deduplication."""
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    host = host[4:] if host.startswith("www.") else host
+
+    for suffix, pattern, template in _AGGREGATOR_RULES:
+        if host == suffix or host.endswith("." + suffix):
+            match = pattern.search(url)
+            if match:
+                return template.format(*[g for g in match.groups() if g])
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=False)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    )
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join(_WORD_RE.findall((text or "").lower()))
+
+
+def _location_key(location: Optional[str]) -> str:
+    # The city part only, so "Berlin, Germany" and "Berlin" match across sites.
+    return _normalize((location or "").split(",")[0])
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles."""
+    words = _WORD_RE.findall(text.lower())
+    shingles = [" ".join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))]
+    weights = [0] * 64
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _bands(fingerprint: int) -> List[int]:
+    # Eight 8-bit bands: any two fingerprints within 7 bits share at least one band.
+    return [(fingerprint >> (8 * i)) & 0xFF for i in range(8)]
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit.
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class JobPostingIndex:
+    """
+    SQLite-backed index of job postings keyed by canonical URL and SimHash.
+
+    Args:
+        db_path: Path of the SQLite database.
+        freshness_hours: How long a fetched posting is served from the index before it is re-fetched.
+        max_distance: Maximum SimHash Hamming distance for two postings to be duplicates.
+    """
+
+    def __init__(
+        self,
+        db_path: str = JOB_INDEX_DB_PATH,
+        freshness_hours: float = JOB_INDEX_FRESHNESS_HOURS,
+        max_distance: int = JOB_INDEX_SIMHASH_DISTANCE,
+    ):
+        self.db_path = db_path
+        self.freshness_seconds = freshness_hours * 3600
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " company TEXT NOT NULL,"
+            " location TEXT NOT NULL DEFAULT '',"
+            " simhash INTEGER NOT NULL,"
+            " posting TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " times_seen INTEGER NOT NULL DEFAULT 1);"
+            "CREATE TABLE IF NOT EXISTS posting_urls ("
+            " url TEXT PRIMARY KEY,"
+            " posting_id INTEGER NOT NULL REFERENCES postings(id) ON DELETE CASCADE);"
+            "CREATE TABLE IF NOT EXISTS posting_bands ("
+            " band INTEGER NOT NULL,"
+            " value INTEGER NOT NULL,"
+            " posting_id INTEGER NOT NULL REFERENCES postings(id) ON DELETE CASCADE,"
+            " PRIMARY KEY (band, value, posting_id));"
+        )
+        columns = {r[1] for r in self._conn.execute("PRAGMA table_info(postings)")}
+        if "location" not in columns:
+            # Indexes created before locations were tracked; their postings match any location.
+            self._conn.execute("ALTER TABLE postings ADD COLUMN location TEXT NOT NULL DEFAULT ''")
+        self._conn.commit()
+
+    def _is_fresh(self, last_seen: float) -> bool:
+        return time.time() - last_seen <= self.freshness_seconds
+
+    def _row_to_entry(self, row: Tuple) -> Dict[str, Any]:
+        posting_id, posting, first_seen, last_seen, updated_at, times_seen = row
+        return {
+            "posting_id": posting_id,
+            "posting": json.loads(posting),
+            "first_seen": first_seen,
+            "last_seen": last_seen,
+            "times_seen": times_seen,
+            "fresh": self._is_fresh(updated_at),
+        }
+
+    def lookup_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Returns the indexed posting for a URL or any of its variants, if known."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.id, p.posting, p.first_seen, p.last_seen, p.updated_at, p.times_seen FROM posting_urls u"
+                " JOIN postings p ON p.id = u.posting_id WHERE u.url = ?",
+                (canonicalize_url(url),),
+            ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def _find_near_duplicate(self, company: str, location: str, fingerprint: int) -> Optional[int]:
+        candidates = set()
+        for band, value in enumerate(_bands(fingerprint)):
+            candidates.update(
+                r[0] for r in self._conn.execute(
+                    "SELECT posting_id FROM posting_bands WHERE band = ? AND value = ?", (band, value)
+                )
+            )
+        best, best_distance = None, self.max_distance + 1
+        for posting_id in candidates:
+            row = self._conn.execute("SELECT company, location, simhash FROM postings WHERE id = ?", (posting_id,)).fetchone()
+            if row is None or row[0] != company or (location and row[1] and row[1] != location):
+                continue
+            distance = hamming_distance(row[2] & ((1 << 64) - 1), fingerprint)
+            if distance < best_distance:
+                best, best_distance = posting_id, distance
+        return best
+
+    def add(self, posting: JobPosting) -> Dict[str, Any]:
+        """
+        Indexes a posting, merging it into an existing entry when its URL or
+        content matches one.
+
+        Returns:
+            Dict with posting_id, duplicate (whether it matched an existing
+            entry) and matched_by ("url", "content" or None).
+        """
+        company = _normalize(posting.company)
+        location = _location_key(posting.location)
+        fingerprint = simhash(" ".join([posting.job_title, posting.company, posting.job_description]))
+        url = canonicalize_url(posting.application_link) if posting.application_link else None
+        posting_json = posting.model_dump_json()
+        now = time.time()
+        with self._lock:
+            posting_id, matched_by = None, None
+            if url:
+                row = self._conn.execute("SELECT posting_id FROM posting_urls WHERE url = ?", (url,)).fetchone()
+                if row:
+                    posting_id, matched_by = row[0], "url"
+            if posting_id is None:
+                posting_id = self._find_near_duplicate(company, location, fingerprint)
+                matched_by = "content" if posting_id is not None else None
+
+            if posting_id is None:
+                cur = self._conn.execute(
+                    "INSERT INTO postings (company, location, simhash, posting, first_seen, last_seen, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (company, location, _to_signed(fingerprint), posting_json, now, now, now),
+                )
+                posting_id = cur.lastrowid
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO posting_bands (band, value, posting_id) VALUES (?, ?, ?)",
+                    [(band, value, posting_id) for band, value in enumerate(_bands(fingerprint))],
+                )
+            else:
+                # Re-submitting a posting served from the index leaves it unchanged and
+                # does not extend its freshness; a re-fetched posting that changed does.
+                self._conn.execute(
+                    "UPDATE postings SET last_seen = ?, times_seen = times_seen + 1,"
+                    " updated_at = CASE WHEN posting = ? THEN updated_at ELSE ? END, posting = ? WHERE id = ?",
+                    (now, posting_json, now, posting_json, posting_id),
+                )
+            if url:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO posting_urls (url, posting_id) VALUES (?, ?)", (url, posting_id)
+                )
+            self._conn.commit()
+        return {"posting_id": posting_id, "duplicate": matched_by is not None, "matched_by": matched_by}
+
+    def dedupe(self, postings: List[JobPosting]) -> Tuple[List[JobPosting], int]:
+        """
+        Indexes postings and returns them with duplicates removed, keeping the
+        first copy of each posting in the given order, plus the number removed.
+        """
+        unique, seen_ids = [], set()
+        for posting in postings:
+            posting_id = self.add(posting)["posting_id"]
+            if posting_id not in seen_ids:
+                seen_ids.add(posting_id)
+                unique.append(posting)
+        return unique, len(postings) - len(unique)
+
+    def prune(self, older_than_hours: float) -> int:
+        """Removes postings not seen for `older_than_hours`."""
+        cutoff = time.time() - older_than_hours * 3600
+        with self._lock:
+            ids = [r[0] for r in self._conn.execute("SELECT id FROM postings WHERE last_seen < ?", (cutoff,))]
+            for table, column in (("posting_urls", "posting_id"), ("posting_bands", "posting_id"), ("postings", "id")):
+                self._conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(i,) for i in ids])
+            self._conn.commit()
+        return len(ids)
+
+    def stats(self) -> Dict[str, Any]:
+        cutoff = time.time() - self.freshness_seconds
+        with self._lock:
+            postings, fresh, sightings = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(updated_at >= ?), 0), COALESCE(SUM(times_seen), 0) FROM postings",
+                (cutoff,),
+            ).fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM posting_urls").fetchone()[0]
+        return {"postings": postings, "fresh": fresh, "urls": urls, "sightings": sightings}
+
+
+_index: Optional[JobPostingIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_posting_index() -> JobPostingIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = JobPostingIndex()
+        return _index
+
+
+def check_seen_job_urls(urls: List[str]) -> Dict[str, Any]:
+    """
+    Checks job posting URLs against the index of postings found in earlier searches.
+
+    Call this with the URLs returned by search before browsing them. URLs listed
+    under "known" were fetched recently; use the returned posting instead of
+    browsing the URL again. Only browse the URLs listed under "to_fetch".
+
+    Args:
+        urls: Job posting URLs from search results.
+
+    Returns:
+        Dict with known postings, URLs still to fetch and duplicate URLs removed, or error.
+    """
+    try:
+        index = get_posting_index()
+        known, to_fetch, seen = [], [], set()
+        duplicates = 0
+        for url in urls:
+            canonical = canonicalize_url(url)
+            if canonical in seen:
+                duplicates += 1
+                continue
+            seen.add(canonical)
+            entry = index.lookup_url(url)
+            fresh = bool(entry and entry["fresh"])
+            record_cache("job_postings", fresh)
+            if fresh:
+                known.append({"url": url, "posting": entry["posting"]})
+            else:
+                to_fetch.append(url)
+        return {"known": known, "to_fetch": to_fetch, "duplicate_urls": duplicates}
+    except Exception as e:
+        return {"error": f"Error checking job URLs: {e}"}
+
+
+def record_job_postings(job_postings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Records fetched job postings in the index and removes duplicates.
+
+    Call this once with all postings collected from browsing, and return the
+    "postings" list from the result.
+
+    Args:
+        job_postings: Job postings, each with job_title, company, location,
+            job_description, requirements and application_link.
+
+    Returns:
+        Dict with the deduplicated postings and the number of duplicates removed, or error.
+    """
+    postings, invalid = [], []
+    for raw in job_postings:
+        try:
+            postings.append(JobPosting.model_validate({
+                "location": None, "application_link": None, "posted_date": None, "employment_type": None,
+                "requirements": [], **raw,
+            }))
+        except ValidationError as e:
+            invalid.append({"posting": raw.get("job_title", "unknown"), "error": str(e)})
+    try:
+        unique, removed = get_posting_index().dedupe(postings)
+    except Exception as e:
+        return {"error": f"Error recording job postings: {e}"}
+    return {"postings": [p.model_dump() for p in unique], "duplicates_removed": removed, "invalid": invalid}
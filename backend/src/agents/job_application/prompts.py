@@ -19,6 +19,8 @@ You have access to the following tools to assist you in your task:
 1. search_agent: This tool has search capabilities to find job postings.
 2. browser_agent: This tool has browser capabilities to navigate to job postings and collect the appropriate details from the website.
 3. code_agent: This tool has code execution capabilities to execute code to download the job postings and collect the appropriate details from the website.
+4. check_seen_job_urls: Checks URLs against postings already collected in earlier searches.
+5. record_job_postings: Records the collected postings and removes duplicates.
 
 You need to do a thorough job search using the candidate's profile and preferences.
 You must follow these steps:
@@ -28,6 +30,8 @@ You must follow these steps:
 4. Collect the details of job postings including job title, company, location, job description, requirements, and application link.
 
 Always use the search_agent tool to find the job postings and then use the browser_agent tool to navigate to the job postings and collect the appropriate details from the website.
+Before browsing, pass the URLs from search to check_seen_job_urls: reuse the postings it returns as "known" and only browse the URLs under "to_fetch".
+When done, pass all collected postings (known and newly fetched) to record_job_postings once and return the deduplicated "postings" it gives back.
 
 Return a list of job postings with the following details:
 - Job Title
@@ -55,6 +59,10 @@ Your task is to do the following:
 4. Provide a detailed scoring report for each job posting, including a score (e.g., out of 100) and specific feedback on strengths and areas for improvement.
 5. Provide a reasoning for the score for each job posting.
 
+Always score by calling the `score_job_postings` tool once with the candidate profile and the full list of job postings.
+It scores every posting in parallel and returns the ranked scores together with a markdown report; use its results
+instead of scoring the postings yourself. Only score a posting yourself if the tool reports it as skipped.
+
 Provide a detailed scoring report for each job posting, sorted by the score in descending order. Return in a markdown format with the following details:
 - Job Title
 - Company
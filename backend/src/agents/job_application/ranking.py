@@ -0,0 +1,228 @@
+"""
+Deterministic local pre-ranking of job postings against a candidate profile.
+
+Runs before any LLM scoring so that only the best PRERANK_TOP_K postings are
+scored by the model, however many postings job discovery returns. Postings
+are filtered on required years of experience, then ranked by a weighted sum
+of:
+
+- BM25 of the candidate's skills and preferred roles against each posting's
+  title, description and requirements,
+- skill overlap, the share of the candidate's skills mentioned by a posting,
+- location match against the candidate's preferred locations: 1 for a
+  matching place (or a remote posting), 0.5 when the posting gives no
+  location, 0 otherwise. Locations are compared as whole comma-separated
+  parts ("New York, NY" matches "New York" but not "York") after mapping
+  common alternative city names, so a mismatch lowers a posting's rank
+  instead of dropping it before the model sees it,
+- optionally, cosine similarity of local sentence embeddings, enabled by
+  setting PRERANK_EMBEDDING_MODEL to a sentence-transformers model name.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.agents.job_application.models import CVScreenerOutput, JobPosting
+
+PRERANK_TOP_K = int(os.getenv("PRERANK_TOP_K", "20"))
+PRERANK_EXPERIENCE_SLACK_YEARS = float(os.getenv("PRERANK_EXPERIENCE_SLACK_YEARS", "2"))
+PRERANK_EMBEDDING_MODEL = os.getenv("PRERANK_EMBEDDING_MODEL", "")
+
+WEIGHTS = {"bm25": 0.4, "skills": 0.45, "location": 0.15, "embedding": 0.15}
+# Location scores for postings that share only the region or only the country with a preferred location.
+LOCATION_REGION_MATCH = 0.4
+LOCATION_COUNTRY_MATCH = 0.2
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_YEARS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:-\s*\d+\s*)?(?:years|yrs)", re.IGNORECASE)
+_REMOTE_WORDS = ("remote", "anywhere", "worldwide")
+_LOCATION_WORD_RE = re.compile(r"\w+")
+# Words describing the work arrangement or area rather than the place.
+_LOCATION_NOISE = {"hybrid", "onsite", "on", "site", "office", "area", "greater", "metro", "metropolitan", "region"}
+_LOCATION_ALIASES = {
+    "bangalore": "bengaluru", "bombay": "mumbai", "madras": "chennai", "calcutta": "kolkata",
+    "gurgaon": "gurugram", "nyc": "new york", "new york city": "new york", "sf": "san francisco",
+    "munchen": "munich", "münchen": "munich", "koln": "cologne", "köln": "cologne", "wien": "vienna",
+    "uk": "united kingdom", "usa": "united states", "us": "united states",
+}
+
+
+@dataclass
+class RankedPosting:
+    posting: JobPosting
+    score: float
+    components: Dict[str, float] = field(default_factory=dict)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _posting_text(posting: JobPosting) -> str:
+    return " ".join([posting.job_title, posting.job_description, " ".join(posting.requirements)])
+
+
+def bm25_scores(query: List[str], documents: List[List[str]], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """Okapi BM25 of one tokenized query against tokenized documents."""
+    if not documents or not query:
+        return np.zeros(len(documents))
+    terms = sorted(set(query))
+    index = {t: i for i, t in enumerate(terms)}
+    tf = np.zeros((len(documents), len(terms)))
+    for d, doc in enumerate(documents):
+        for token in doc:
+            i = index.get(token)
+            if i is not None:
+                tf[d, i] += 1
+    lengths = np.array([len(doc) for doc in documents], dtype=float)
+    avg_length = lengths.mean() or 1.0
+    df = (tf > 0).sum(axis=0)
+    idf = np.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+    denom = tf + k1 * (1 - b + b * lengths[:, None] / avg_length)
+    return (tf * (k1 + 1) / denom) @ idf
+
+
+def skill_overlap(skills: List[str], texts: List[str]) -> np.ndarray:
+    """Share of `skills` mentioned in each text, as a (texts,) array."""
+    normalized = [s.lower().strip() for s in skills if s and s.strip()]
+    if not normalized or not texts:
+        return np.zeros(len(texts))
+    patterns = [re.compile(r"(?<![a-z0-9])" + re.escape(s) + r"(?![a-z0-9])") for s in normalized]
+    lowered = [t.lower() for t in texts]
+    hits = np.array([[bool(p.search(t)) for p in patterns] for t in lowered], dtype=float)
+    return hits.mean(axis=1)
+
+
+@lru_cache(maxsize=2)
+def _embedding_model(name: str):
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SentenceTransformer(name)
+
+
+def embedding_similarity(query: str, texts: List[str], model_name: str = PRERANK_EMBEDDING_MODEL) -> Optional[np.ndarray]:
+    """Cosine similarity of local embeddings, or None when embeddings are not configured or installed."""
+    if not model_name or not texts:
+        return None
+    model = _embedding_model(model_name)
+    if model is None:
+        return None
+    vectors = model.encode([query] + texts, normalize_embeddings=True)
+    return np.clip(vectors[1:] @ vectors[0], 0.0, 1.0)
+
+
+def _places(location: str) -> List[str]:
+    """Normalized comma-separated parts of a location, most specific first, e.g. ["new york", "ny", "united states"]."""
+    places = []
+    for part in re.split(r"[,/|;()]", location.lower()):
+        words = [w for w in _LOCATION_WORD_RE.findall(part) if w not in _LOCATION_NOISE]
+        if words:
+            place = " ".join(words)
+            place = _LOCATION_ALIASES.get(place, place)
+            if place not in places:
+                places.append(place)
+    return places
+
+
+def _place_match(preferred: List[str], posting: List[str]) -> float:
+    """
+    How closely a posting's places match one preferred location: 1.0 when its
+    most specific part (usually the city) matches, less for a shared region,
+    least for a shared country only.
+    """
+    for i, place in enumerate(preferred):
+        if place in posting:
+            if i == 0:
+                return 1.0
+            return LOCATION_COUNTRY_MATCH if i == len(preferred) - 1 else LOCATION_REGION_MATCH
+    return 0.0
+
+
+def location_match(preferred: List[str], postings: List[JobPosting]) -> np.ndarray:
+    """
+    1.0 where a posting is remote or in a preferred city, 0.5 where it gives
+    no location, partial credit for the same region or country, else 0.0.
+    """
+    wanted = [places for places in (_places(p) for p in preferred or []) if places]
+    scores = []
+    for posting in postings:
+        if not posting.location or not posting.location.strip():
+            scores.append(0.5)
+            continue
+        if any(word in posting.location.lower() for word in _REMOTE_WORDS):
+            scores.append(1.0)
+            continue
+        places = _places(posting.location)
+        scores.append(max((_place_match(w, places) for w in wanted), default=0.0))
+    return np.array(scores, dtype=float)
+
+
+def required_years(posting: JobPosting) -> Optional[float]:
+    """Smallest 'N years' requirement mentioned by the posting, if any."""
+    found = [float(m) for text in posting.requirements + [posting.job_description] for m in _YEARS_RE.findall(text)]
+    return min(found) if found else None
+
+
+def _experience_ok(posting: JobPosting, candidate_years: Optional[float], slack: float) -> bool:
+    needed = required_years(posting)
+    return needed is None or candidate_years is None or candidate_years + slack >= needed
+
+
+def prerank_postings(
+    candidate: CVScreenerOutput,
+    postings: List[JobPosting],
+    top_k: int = PRERANK_TOP_K,
+    experience_slack_years: float = PRERANK_EXPERIENCE_SLACK_YEARS,
+) -> List[RankedPosting]:
+    """
+    Filters and ranks postings locally, without any LLM calls.
+
+    Args:
+        candidate: Parsed candidate profile.
+        postings: Discovered job postings.
+        top_k: Number of postings to keep; 0 or less keeps all that pass the filter.
+        experience_slack_years: Years a candidate may fall short of a posting's
+            stated experience requirement before the posting is filtered out.
+
+    Returns:
+        The top postings with their combined score and score components, best first.
+    """
+    kept = [p for p in postings if _experience_ok(p, candidate.total_experience_years, experience_slack_years)]
+    if not kept:
+        return []
+
+    texts = [_posting_text(p) for p in kept]
+    query = " ".join(candidate.skills + (candidate.preferred_roles or []) + [w.job_title for w in candidate.work_experience])
+    components = {
+        "bm25": bm25_scores(tokenize(query), [tokenize(t) for t in texts]),
+        "skills": skill_overlap(candidate.skills, texts),
+    }
+    if candidate.preferred_locations:
+        components["location"] = location_match(candidate.preferred_locations, kept)
+    embeddings = embedding_similarity(query, texts)
+    if embeddings is not None:
+        components["embedding"] = embeddings
+    max_bm25 = components["bm25"].max()
+    if max_bm25 > 0:
+        components["bm25"] = components["bm25"] / max_bm25
+
+    total_weight = sum(WEIGHTS[name] for name in components)
+    combined = sum(WEIGHTS[name] * values for name, values in components.items()) / total_weight
+    # Stable sort keeps discovery order for ties.
+    order = np.argsort(-combined, kind="stable")
+    if top_k > 0:
+        order = order[:top_k]
+    return [
+        RankedPosting(
+            posting=kept[i],
+            score=round(float(combined[i]), 4),
+            components={name: round(float(values[i]), 4) for name, values in components.items()},
+        )
+        for i in order
+    ]
@@ -0,0 +1,210 @@
+"""
+Parallel scoring of job postings against a candidate profile.
+
+Instead of asking `scorer_agent` to score every posting in one long
+generation, each (CVScreenerOutput, JobPosting) pair is scored by its own
+short LLM call returning a compact JobScore, with at most
+SCORING_CONCURRENCY calls in flight. Results are merged into a ranked
+report, so total time grows with postings / concurrency rather than with
+the length of one giant generation. Postings are first pre-ranked locally
+(see ranking.py) and only the top PRERANK_TOP_K are sent to the model.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from src.agents.job_application.models import CVScreenerOutput, JobPosting, JobScore
+from src.agents.job_application.posting_index import get_posting_index
+from src.agents.job_application.ranking import PRERANK_TOP_K, prerank_postings
+from src.utils.llm import acall_llm
+from src.utils.telemetry import record_queue_wait
+
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "8"))
+SCORING_MAX_TOKENS = int(os.getenv("SCORING_MAX_TOKENS", "400"))
+
+PAIR_SCORING_PROMPT = """
+You are a Job Matching and Scoring Agent. Score how well the candidate matches ONE job posting.
+
+Consider relevant skills, experience, education, certifications and location/role preferences.
+Return only a JSON object with these fields:
+- score: integer from 0 to 100
+- matched_skills: candidate skills that satisfy the posting's requirements
+- missing_requirements: requirements the candidate does not meet
+- reasoning: 1-3 sentences explaining the score
+"""
+
+
+def _candidate_summary(candidate: CVScreenerOutput) -> Dict[str, Any]:
+    """Keeps only the fields that matter for matching, to keep prompts short."""
+    return {
+        "skills": candidate.skills,
+        "total_experience_years": candidate.total_experience_years,
+        "roles": [f"{w.job_title} at {w.company}" for w in candidate.work_experience],
+        "education": [f"{e.degree}, {e.institution}" for e in candidate.education],
+        "certifications": [c.name for c in candidate.certifications or []],
+        "preferred_roles": candidate.preferred_roles,
+        "preferred_locations": candidate.preferred_locations,
+    }
+
+
+def _parse_score(content: str, posting: JobPosting) -> JobScore:
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    data = json.loads(text)
+    return JobScore(
+        job_title=posting.job_title,
+        company=posting.company,
+        application_link=posting.application_link,
+        score=max(0, min(100, int(data.get("score", 0)))),
+        matched_skills=data.get("matched_skills") or [],
+        missing_requirements=data.get("missing_requirements") or [],
+        reasoning=data.get("reasoning", ""),
+    )
+
+
+async def score_posting(candidate: CVScreenerOutput, posting: JobPosting, model: Optional[str] = None) -> JobScore:
+    """Scores a single posting with one short LLM call."""
+    prompt = [
+        {"role": "system", "content": PAIR_SCORING_PROMPT},
+        {"role": "user", "content": json.dumps({
+            "candidate": _candidate_summary(candidate),
+            "job_posting": posting.model_dump(exclude={"application_link", "posted_date"}),
+        })},
+    ]
+    response = await acall_llm(
+        prompt,
+        model=model,
+        max_tokens=SCORING_MAX_TOKENS,
+        response_format={"type": "json_object"},
+    )
+    return _parse_score(response.choices[0].message.content, posting)
+
+
+async def score_postings(
+    candidate: CVScreenerOutput,
+    postings: List[JobPosting],
+    model: Optional[str] = None,
+    concurrency: int = SCORING_CONCURRENCY,
+) -> List[JobScore]:
+    """
+    Scores all postings concurrently with bounded parallelism.
+
+    Args:
+        candidate: Parsed candidate profile.
+        postings: Job postings to score.
+        model: LiteLLM model name, defaults to the scorer_agent tier model.
+        concurrency: Maximum number of LLM calls in flight.
+
+    Returns:
+        JobScore list sorted by score, highest first. Postings whose call
+        fails get score 0 and the error as reasoning.
+    """
+    if model is None:
+        from src.agents.job_application.model_tiers import get_agent_model
+        model = get_agent_model("scorer_agent")
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def _bounded(posting: JobPosting) -> JobScore:
+        queued_at = time.perf_counter()
+        async with semaphore:
+            record_queue_wait("job_scoring", time.perf_counter() - queued_at)
+            try:
+                return await score_posting(candidate, posting, model)
+            except (ValueError, ValidationError, json.JSONDecodeError) as e:
+                error = f"Could not parse score: {e}"
+            except Exception as e:
+                error = f"Scoring failed: {e}"
+            return JobScore(
+                job_title=posting.job_title,
+                company=posting.company,
+                application_link=posting.application_link,
+                score=0,
+                matched_skills=[],
+                missing_requirements=[],
+                reasoning=error,
+            )
+
+    scores = await asyncio.gather(*(_bounded(p) for p in postings))
+    return sorted(scores, key=lambda s: s.score, reverse=True)
+
+
+def render_report(scores: List[JobScore], postings: List[JobPosting]) -> str:
+    """Merges scores back with their postings into a ranked markdown report."""
+    by_key = {(p.job_title, p.company, p.application_link): p for p in postings}
+    lines = ["# Job Scoring Report", ""]
+    for rank, score in enumerate(scores, 1):
+        posting = by_key.get((score.job_title, score.company, score.application_link))
+        lines.append(f"## {rank}. {score.job_title} - {score.company} (Score: {score.score}/100)")
+        lines.append(f"- **Job URL:** {score.application_link or 'N/A'}")
+        if posting:
+            lines.append(f"- **Location:** {posting.location or 'N/A'}")
+            lines.append(f"- **Job Description:** {posting.job_description}")
+            lines.append(f"- **Requirements:** {', '.join(posting.requirements)}")
+        lines.append(f"- **Matched Skills:** {', '.join(score.matched_skills) or 'None'}")
+        lines.append(f"- **Missing Requirements:** {', '.join(score.missing_requirements) or 'None'}")
+        lines.append(f"- **Reasoning:** {score.reasoning}")
+        lines.append("")
+    if scores:
+        lines.append(f"**Recommended:** {scores[0].job_title} at {scores[0].company}")
+    return "\n".join(lines)
+
+
+async def score_job_postings(
+    candidate_profile: Dict[str, Any],
+    job_postings: List[Dict[str, Any]],
+    top_k: int = PRERANK_TOP_K,
+) -> Dict[str, Any]:
+    """
+    Pre-ranks job postings locally, then scores the best ones against the candidate in parallel
+    and returns a ranked report.
+
+    Use this instead of scoring postings one by one in your own response.
+
+    Args:
+        candidate_profile: The candidate profile produced by cv_screener_agent.
+        job_postings: Job postings, each with job_title, company, location,
+            job_description, requirements and application_link.
+        top_k: Number of pre-ranked postings to score with the model; 0 scores all that pass the filters.
+
+    Returns:
+        Dict with ranked scores, a markdown report and pre-ranking stats, or error.
+    """
+    try:
+        candidate = CVScreenerOutput.model_validate(candidate_profile)
+    except ValidationError as e:
+        return {"error": f"Invalid candidate profile: {e}"}
+
+    postings, skipped = [], []
+    for raw in job_postings:
+        try:
+            postings.append(JobPosting.model_validate({
+                "location": None, "application_link": None, "posted_date": None, "employment_type": None,
+                "requirements": [], **raw,
+            }))
+        except ValidationError as e:
+            skipped.append({"posting": raw.get("job_title", "unknown"), "error": str(e)})
+
+    postings, duplicates = get_posting_index().dedupe(postings)
+    ranked = prerank_postings(candidate, postings, top_k=top_k)
+    shortlisted = [r.posting for r in ranked]
+    scores = await score_postings(candidate, shortlisted)
+    return {
+        "scores": [s.model_dump() for s in scores],
+        "report_markdown": render_report(scores, shortlisted),
+        "skipped": skipped,
+        "prerank": {
+            "received": len(postings) + duplicates,
+            "duplicates_removed": duplicates,
+            "scored": len(shortlisted),
+            "top_k": top_k,
+            "shortlist": [
+                {"job_title": r.posting.job_title, "company": r.posting.company, "score": r.score, **r.components}
+                for r in ranked
+            ],
+        },
+    }
@@ -0,0 +1,443 @@
+"""
+Streaming download and columnar ingest of raw data files.
+
+`download_file` streams an HTTP body to disk in fixed-size chunks, resuming a
+partial `.part` file with a Range request and hashing as it writes, so file
+size does not affect memory use. `ingest_file` sniffs the format and converts
+CSV/TSV, JSON Lines, JSON and Excel files to a Parquet cache keyed by content
+hash, then returns a schema summary that the agent can read instead of the
+raw file. CSV and JSON Lines are converted batch by batch.
+
+The tools are coroutines that run the blocking download and conversion in a
+worker thread, so a multi-GB file does not stall other sessions on the
+server.
+"""
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from src.tools.web_tools import DEFAULT_USER_AGENT
+
+DOWNLOAD_DIR = os.getenv("DATA_DOWNLOAD_DIR", "downloads")
+DATA_CACHE_DIR = os.getenv("DATA_CACHE_DIR", "downloads/.parquet_cache")
+CHUNK_SIZE = 1024 * 1024
+JSONL_BATCH_ROWS = 50_000
+# Top-level JSON documents (not JSON Lines) have to be parsed whole.
+JSON_MAX_IN_MEMORY_BYTES = int(os.getenv("DATA_JSON_MAX_IN_MEMORY_BYTES", str(512 * 1024 * 1024)))
+
+_MAGIC = [
+    (b"PAR1", "parquet"),
+    (b"%PDF", "pdf"),
+    (b"PK\x03\x04", "zip"),
+    (b"\xd0\xcf\x11\xe0", "xls"),
+    (b"\x1f\x8b", "gzip"),
+]
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _filename_from_url(url: str) -> str:
+    return os.path.basename(urlsplit(url).path) or "download"
+
+
+async def download_file(url: str, destination: Optional[str] = None, expected_sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Downloads a file by streaming it straight to disk, resuming a previous partial download if present.
+
+    Use this instead of reading large files into memory or buffering them through shell output.
+
+    Args:
+        url: URL of the file to download.
+        destination: Where to save the file (default: downloads/<file name from URL>).
+        expected_sha256: Optional SHA-256 hex digest to verify the download against.
+
+    Returns:
+        Dict with path, size in bytes, sha256, content_type and whether the download resumed, or error.
+    """
+    return await asyncio.to_thread(_download_file, url, destination, expected_sha256)
+
+
+def _download_file(url: str, destination: Optional[str], expected_sha256: Optional[str]) -> Dict[str, Any]:
+    destination = destination or os.path.join(DOWNLOAD_DIR, _filename_from_url(url))
+    if os.path.dirname(destination):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+    if expected_sha256 and os.path.exists(destination) and _sha256_file(destination) == expected_sha256.lower():
+        return {"path": destination, "bytes": os.path.getsize(destination), "sha256": expected_sha256.lower(),
+                "content_type": "", "resumed": False, "cached": True}
+    part_path = destination + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+    headers = {"User-Agent": DEFAULT_USER_AGENT}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    digest = None
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=(10, 60)) as response:
+            content_type = response.headers.get("Content-Type", "")
+            # 416 on a resume means the partial file already holds the whole body.
+            resumed = offset > 0 and response.status_code in (206, 416)
+            if response.status_code != 416 or not offset:
+                response.raise_for_status()
+                digest = hashlib.sha256()
+                if resumed:
+                    with open(part_path, "rb") as f:
+                        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                with open(part_path, "ab" if resumed else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Download failed (partial data kept for resume): {e}"}
+
+    sha256 = digest.hexdigest() if digest is not None else _sha256_file(part_path)
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        os.remove(part_path)
+        return {"error": f"Checksum mismatch: expected {expected_sha256}, got {sha256}"}
+    os.replace(part_path, destination)
+    return {
+        "path": destination,
+        "bytes": os.path.getsize(destination),
+        "sha256": sha256,
+        "content_type": content_type,
+        "resumed": resumed,
+        "cached": False,
+    }
+
+
+def sniff_format(path: str) -> str:
+    """Guesses a file's format from its leading bytes."""
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            if fmt == "zip" and (b"xl/" in head or b"[Content_Types].xml" in head):
+                return "xlsx"
+            return fmt
+    text = head.lstrip(b"\xef\xbb\xbf").lstrip()
+    if text.startswith((b"<!DOCTYPE html", b"<html", b"<HTML", b"<!doctype html")):
+        return "html"
+    if text.startswith(b"<"):
+        return "xml"
+    if text.startswith(b"{"):
+        # JSON Lines: the first line is a complete object and another object follows.
+        lines = [line.strip() for line in text.split(b"\n", 2)[:2]]
+        try:
+            json.loads(lines[0])
+        except ValueError:
+            return "json"
+        return "jsonl" if len(lines) > 1 and lines[1].startswith(b"{") else "json"
+    if text.startswith(b"["):
+        return "json"
+    try:
+        sample = "\n".join(text.decode("utf-8", errors="ignore").splitlines()[:20])
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        return "tsv" if dialect.delimiter == "\t" else "csv"
+    except csv.Error:
+        return "text"
+
+
+def _sniff_delimiter(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        sample = "".join(f.readline() for _ in range(20))
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def _json_column(values: List[Any]):
+    import pyarrow as pa
+
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed types in one key: keep the values as JSON text.
+        return pa.array([v if v is None or isinstance(v, str) else json.dumps(v, default=str) for v in values], pa.string())
+
+
+def _unify_schemas(schemas: List[Any]):
+    """Union of the fields of all batches; types are widened, and fields whose types conflict become strings."""
+    import pyarrow as pa
+
+    types: Dict[str, Any] = {}
+    for schema in schemas:
+        for field in schema:
+            if field.name not in types:
+                types[field.name] = field.type
+                continue
+            try:
+                merged = pa.unify_schemas([pa.schema([(field.name, types[field.name])]), pa.schema([field])],
+                                          promote_options="permissive")
+                types[field.name] = merged.field(0).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                types[field.name] = pa.string()
+    return pa.schema(list(types.items()))
+
+
+def _conform(table, schema):
+    import pyarrow as pa
+
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        try:
+            columns.append(column.cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            if field.type != pa.string():
+                raise
+            columns.append(_json_column(column.to_pylist()).cast(pa.string()))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _write_unified(tables: Iterator[Any], target: str) -> None:
+    """
+    Writes each table to its own part with the columns and types of its rows; once every table has been
+    seen the parts are rewritten to `target` with the unified schema, so columns that only appear later
+    are kept and a type change part way through a file widens the column instead of failing.
+    """
+    import pyarrow.parquet as pq
+
+    parts_dir = target + ".parts"
+    os.makedirs(parts_dir, exist_ok=True)
+    parts, schemas = [], []
+    try:
+        for table in tables:
+            part = os.path.join(parts_dir, f"{len(parts):06d}.parquet")
+            pq.write_table(table, part)
+            parts.append(part)
+            schemas.append(table.schema)
+        schema = _unify_schemas(schemas)
+        with pq.ParquetWriter(target, schema, compression="zstd") as writer:
+            for part in parts:
+                writer.write_table(_conform(pq.read_table(part), schema))
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+
+def _rows_to_table(rows: List[Dict[str, Any]]):
+    import pyarrow as pa
+
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    return pa.Table.from_arrays([_json_column([row.get(key) for row in rows]) for key in keys], names=keys)
+
+
+def _infer_csv_column(column):
+    """Casts a column of CSV strings to the narrowest type that holds every value in it."""
+    import pyarrow as pa
+
+    if column.null_count == len(column):
+        return pa.nulls(len(column))
+    for candidate in (pa.int64(), pa.float64(), pa.bool_(), pa.timestamp("us")):
+        try:
+            return column.cast(candidate)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return column
+
+
+def _convert_csv(path: str, target: str) -> None:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    # pyarrow infers column types from the first block only, so a column that turns from numbers to text
+    # deep into a large file would fail the read. Columns are read as strings and typed batch by batch.
+    parse_options = pacsv.ParseOptions(delimiter=_sniff_delimiter(path))
+    with pacsv.open_csv(path, parse_options=parse_options) as probe:
+        names = probe.schema.names
+    convert_options = pacsv.ConvertOptions(column_types={name: pa.string() for name in names},
+                                           strings_can_be_null=True)
+
+    def tables():
+        with pacsv.open_csv(path, parse_options=parse_options, convert_options=convert_options) as reader:
+            empty = True
+            for batch in reader:
+                empty = False
+                yield pa.Table.from_arrays([_infer_csv_column(c) for c in batch.columns], names=batch.schema.names)
+            if empty:
+                yield reader.schema.empty_table()
+
+    _write_unified(tables(), target)
+
+
+def _convert_jsonl(path: str, target: str) -> None:
+    def tables():
+        rows = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    rows.append(row if isinstance(row, dict) else {"value": row})
+                if len(rows) >= JSONL_BATCH_ROWS:
+                    yield _rows_to_table(rows)
+                    rows = []
+        yield _rows_to_table(rows)
+
+    _write_unified(tables(), target)
+
+
+def _convert_json(path: str, target: str) -> None:
+    import pyarrow.parquet as pq
+
+    if os.path.getsize(path) > JSON_MAX_IN_MEMORY_BYTES:
+        raise ValueError("JSON document is too large to parse in memory; convert it to JSON Lines first")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        # Common API shape: {"data": [...]} or {"results": [...]}
+        lists = [v for v in data.values() if isinstance(v, list)]
+        data = lists[0] if len(lists) == 1 else [data]
+    rows = [r if isinstance(r, dict) else {"value": r} for r in data]
+    pq.write_table(_rows_to_table(rows), target, compression="zstd")
+
+
+def _convert_excel(path: str, target_dir: str, stem: str) -> List[str]:
+    import pandas as pd
+
+    targets = []
+    for sheet, frame in pd.read_excel(path, sheet_name=None).items():
+        target = os.path.join(target_dir, f"{stem}.{sheet}.parquet")
+        frame.columns = [str(c) for c in frame.columns]
+        frame.to_parquet(target, compression="zstd", index=False)
+        targets.append(target)
+    return targets
+
+
+def summarize_dataset(path: str, sample_rows: int = 5) -> Dict[str, Any]:
+    """
+    Summarizes a Parquet file from its metadata: row count, columns with types and null counts, and a few sample rows.
+
+    Use this to understand a converted dataset before writing code to process it.
+
+    Args:
+        path: Path to a Parquet file.
+        sample_rows: Number of leading rows to include.
+
+    Returns:
+        Dict with rows, columns and sample, or error.
+    """
+    try:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.metadata
+        nulls: Dict[str, Optional[int]] = {}
+        for i, field in enumerate(parquet_file.schema_arrow):
+            counts = []
+            for rg in range(metadata.num_row_groups):
+                column = metadata.row_group(rg).column(i)
+                stats = column.statistics if column.is_stats_set else None
+                counts.append(stats.null_count if stats is not None and stats.has_null_count else None)
+            nulls[field.name] = None if None in counts else sum(counts)
+        sample = next(parquet_file.iter_batches(batch_size=sample_rows), None)
+        return {
+            "path": path,
+            "rows": metadata.num_rows,
+            "columns": [
+                {"name": f.name, "type": str(f.type), "null_count": nulls.get(f.name)}
+                for f in parquet_file.schema_arrow
+            ],
+            "sample": sample.to_pylist() if sample is not None else [],
+        }
+    except Exception as e:
+        return {"error": f"Could not summarize {path}: {e}"}
+
+
+async def ingest_file(path: str) -> Dict[str, Any]:
+    """
+    Converts a downloaded CSV, TSV, JSON, JSON Lines or Excel file to Parquet and returns a schema summary.
+
+    Conversions are cached by file content, so ingesting the same file again is free.
+    Read the returned Parquet paths with pandas or pyarrow in code_agent instead of the raw file.
+
+    Args:
+        path: Path to the downloaded file.
+
+    Returns:
+        Dict with the detected format, Parquet paths and a schema summary per table, or error.
+    """
+    return await asyncio.to_thread(_ingest_file, path)
+
+
+def _ingest_file(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {"error": f"File not found: {path}"}
+    fmt = sniff_format(path)
+    if fmt == "parquet":
+        return {"format": fmt, "tables": [summarize_dataset(path)]}
+    if fmt not in ("csv", "tsv", "jsonl", "json", "xlsx", "xls"):
+        return {"format": fmt, "error": f"Format '{fmt}' is not converted; process it with code_agent"}
+
+    os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+    stem = _sha256_file(path)[:16]
+    cached = sorted(
+        os.path.join(DATA_CACHE_DIR, name) for name in os.listdir(DATA_CACHE_DIR)
+        if name.startswith(stem + ".") and name.endswith(".parquet")
+    )
+    if not cached:
+        target = os.path.join(DATA_CACHE_DIR, f"{stem}.data.parquet")
+        tmp = target + ".tmp"
+        try:
+            if fmt in ("csv", "tsv"):
+                _convert_csv(path, tmp)
+            elif fmt == "jsonl":
+                _convert_jsonl(path, tmp)
+            elif fmt == "json":
+                _convert_json(path, tmp)
+            else:
+                cached = _convert_excel(path, DATA_CACHE_DIR, stem)
+        except Exception as e:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return {"format": fmt, "error": f"Conversion to Parquet failed: {e}"}
+        if not cached:
+            os.replace(tmp, target)
+            cached = [target]
+    return {"format": fmt, "source": path, "tables": [summarize_dataset(p) for p in cached]}
+
+
+async def download_and_ingest(url: str, destination: Optional[str] = None, expected_sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Streams a data file to disk and converts it to a Parquet cache with a schema summary.
+
+    Use this for any direct download of CSV, TSV, JSON, JSON Lines or Excel data, including multi-GB files.
+    Interrupted downloads resume when called again with the same URL and destination.
+
+    Args:
+        url: URL of the data file.
+        destination: Where to save the raw file (default: downloads/<file name from URL>).
+        expected_sha256: Optional SHA-256 hex digest to verify the download against.
+
+    Returns:
+        Dict with download details, detected format, Parquet paths and schema summaries, or error.
+    """
+    download = await download_file(url, destination, expected_sha256)
+    if "error" in download:
+        return download
+    return {"download": download, **(await ingest_file(download["path"]))}
+
+
+def get_data_tools(selected_tools: List[str] = ["download_and_ingest", "download_file", "ingest_file", "summarize_dataset"]):
+    tool_mapping = {
+        "download_and_ingest": download_and_ingest,
+        "download_file": download_file,
+        "ingest_file": ingest_file,
+        "summarize_dataset": summarize_dataset,
+    }
+    return [tool_mapping[tool] for tool in selected_tools if tool in tool_mapping]
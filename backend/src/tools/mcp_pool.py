@@ -0,0 +1,247 @@
+"""
+Shared pool of MCP toolsets.
+
+Every agent that asks for the same pool entry receives the same handle, so
+one server process (e.g. the Playwright MCP server) is kept warm and reused
+across agents and sessions instead of each agent spawning its own `npx`
+process. Entries are keyed by alias for the built-in servers and by config
+file, alias and tool filter for servers from MCP config files; registering
+an entry again with different settings replaces its toolset.
+
+Agents hold a `PooledToolsetHandle` rather than the toolset itself, so a
+replaced or evicted toolset is owned by the pool alone and nothing reopens it
+behind the pool's back. Each server connection is opened and closed by one
+owner task per toolset, because the MCP stdio client runs inside anyio
+cancel scopes that must be exited by the task that entered them.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.mcp_tool.mcp_toolset import (
+    MCPToolset,
+    StdioServerParameters,
+    StdioConnectionParams,
+)
+
+logger = logging.getLogger(__name__)
+
+MCP_IDLE_TIMEOUT_SECONDS = float(os.getenv("MCP_IDLE_TIMEOUT_SECONDS", "900"))
+MCP_HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT_SECONDS", "60"))
+MCP_PREWARM_ALIASES = [a.strip() for a in os.getenv("MCP_PREWARM_ALIASES", "playwright").split(",") if a.strip()]
+
+
+class PooledMCPToolset(MCPToolset):
+    """MCPToolset that records when it was last used so idle servers can be stopped."""
+
+    def __init__(self, *, alias: str, **kwargs):
+        super().__init__(**kwargs)
+        self.alias = alias
+        self.last_used = time.monotonic()
+        self.warm = False
+
+    async def get_tools(self, readonly_context=None):
+        self.last_used = time.monotonic()
+        tools = await super().get_tools(readonly_context)
+        self.warm = True
+        return tools
+
+    async def close(self) -> None:
+        self.warm = False
+        await super().close()
+
+
+class _Owner:
+    """Task that opens a toolset's server connection, keeps it open and closes it when asked."""
+
+    def __init__(self, toolset: PooledMCPToolset):
+        self.toolset = toolset
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.stop = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            await asyncio.wait_for(self.toolset.get_tools(), timeout=MCP_HEALTH_CHECK_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            self.ready.cancel()
+            await self.toolset.close()
+            raise
+        except Exception as e:
+            self.ready.set_exception(e)
+            # Release whatever was opened before the failure, from this same task.
+            await self.toolset.close()
+            return
+        self.ready.set_result(None)
+        await self.stop.wait()
+        await self.toolset.close()
+
+    async def close(self) -> None:
+        self.stop.set()
+        await asyncio.shield(self.task)
+
+
+class PooledToolsetHandle(BaseToolset):
+    """
+    What agents hold instead of a pooled toolset: each call goes to the pool's
+    current toolset for the key, and closing it leaves the shared server to the pool.
+    """
+
+    def __init__(self, pool: "MCPServerPool", key: str):
+        super().__init__()
+        self.pool = pool
+        self.key = key
+
+    async def get_tools(self, readonly_context=None):
+        toolset = await self.pool.acquire(self.key)
+        return await toolset.get_tools(readonly_context)
+
+    async def close(self) -> None:
+        # The server is shared; the pool stops it when idle or on shutdown.
+        return None
+
+
+class MCPServerPool:
+    """Keeps one toolset per registered entry, with prewarm, health checks and idle eviction."""
+
+    def __init__(self, idle_timeout: float = MCP_IDLE_TIMEOUT_SECONDS):
+        self.idle_timeout = idle_timeout
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._toolsets: Dict[str, PooledMCPToolset] = {}
+        self._handles: Dict[str, PooledToolsetHandle] = {}
+        self._owners: Dict[int, _Owner] = {}
+        # Toolsets replaced by a changed registration, closed once idle and then dropped.
+        self._retired: List[PooledMCPToolset] = []
+
+    def register(self, alias: str, connection_params: Any, tool_filter: Optional[List[str]] = None,
+                 key: Optional[str] = None) -> str:
+        """
+        Registers how to reach an MCP server under `key` (default: the alias).
+        Registering the same settings again keeps the existing toolset;
+        different settings replace it on the next use.
+
+        Returns:
+            The pool key.
+        """
+        key = key or alias
+        config = {"alias": alias, "connection_params": connection_params, "tool_filter": tool_filter}
+        if self._configs.get(key) != config:
+            self._configs[key] = config
+            toolset = self._toolsets.pop(key, None)
+            if toolset is not None:
+                self._retired.append(toolset)
+        return key
+
+    def is_registered(self, key: str) -> bool:
+        return key in self._configs
+
+    def get(self, key: str) -> PooledToolsetHandle:
+        """
+        Returns the shared handle for `key`. The server process itself is
+        started on first use, or eagerly via `prewarm`.
+        """
+        if key not in self._configs:
+            raise KeyError(f"No MCP server '{key}' registered in pool")
+        if key not in self._handles:
+            self._handles[key] = PooledToolsetHandle(self, key)
+        return self._handles[key]
+
+    def _toolset(self, key: str) -> PooledMCPToolset:
+        if key not in self._toolsets:
+            if key not in self._configs:
+                raise KeyError(f"No MCP server '{key}' registered in pool")
+            self._toolsets[key] = PooledMCPToolset(**self._configs[key])
+        return self._toolsets[key]
+
+    async def acquire(self, key: str) -> PooledMCPToolset:
+        """Returns the current toolset for `key`, with its server connection opened by an owner task."""
+        toolset = self._toolset(key)
+        owner = self._owners.get(id(toolset))
+        if owner is None or owner.task.done():
+            owner = self._owners[id(toolset)] = _Owner(toolset)
+        await asyncio.shield(owner.ready)
+        return toolset
+
+    async def _close(self, toolset: PooledMCPToolset) -> None:
+        owner = self._owners.pop(id(toolset), None)
+        if owner is not None:
+            await owner.close()
+        elif toolset.warm:
+            await toolset.close()
+
+    async def health_check(self, key: str) -> bool:
+        """Opens the server and lists its tools; a failing server is closed so the next use respawns it."""
+        try:
+            toolset = await self.acquire(key)
+            await asyncio.wait_for(toolset.get_tools(), timeout=MCP_HEALTH_CHECK_TIMEOUT_SECONDS)
+            return True
+        except Exception as e:
+            logger.warning("MCP server '%s' failed health check: %s", key, e)
+            await self._close(self._toolset(key))
+            return False
+
+    async def prewarm(self, keys: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Starts the given servers (all registered ones by default) concurrently."""
+        keys = [k for k in (keys or list(self._configs)) if k in self._configs]
+        results = await asyncio.gather(*(self.health_check(k) for k in keys))
+        return dict(zip(keys, results))
+
+    async def evict_idle(self) -> List[str]:
+        """Stops server processes that have not been used within the idle timeout, and drops idle replaced ones."""
+        now = time.monotonic()
+        for toolset in list(self._retired):
+            if now - toolset.last_used > self.idle_timeout or not toolset.warm:
+                await self._close(toolset)
+                self._retired.remove(toolset)
+        evicted = []
+        for key, toolset in list(self._toolsets.items()):
+            if toolset.warm and now - toolset.last_used > self.idle_timeout:
+                await self._close(toolset)
+                evicted.append(key)
+        return evicted
+
+    async def run_eviction_loop(self, interval: float = 60) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.warning("MCP idle eviction failed: %s", e)
+
+    async def close_all(self) -> None:
+        retired, self._retired = self._retired, []
+        for toolset in retired + list(self._toolsets.values()):
+            await self._close(toolset)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        stats = {
+            key: {"warm": toolset.warm, "idle_seconds": round(now - toolset.last_used, 1)}
+            for key, toolset in list(self._toolsets.items())
+        }
+        if self._retired:
+            stats["_retired"] = {"count": len(self._retired), "warm": sum(t.warm for t in list(self._retired))}
+        return stats
+
+
+mcp_pool = MCPServerPool()
+
+mcp_pool.register(
+    "playwright",
+    StdioConnectionParams(
+        server_params=StdioServerParameters(
+            command="npx",
+            args=["-y", "@executeautomation/playwright-mcp-server"],
+        ),
+        timeout=100,
+    ),
+    tool_filter=["*"],  # Optional: "*" means all tools
+)
+
+
+def get_playwright_toolset() -> PooledToolsetHandle:
+    """Returns the shared Playwright MCP toolset."""
+    return mcp_pool.get("playwright")
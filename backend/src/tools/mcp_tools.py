@@ -1,8 +1,11 @@
 import json
 import os
-from typing import Optional, List
+import threading
+from typing import Any, Dict, Optional, List, Literal, Tuple, Union
 from pathlib import Path
 
+from pydantic import BaseModel, ConfigDict, model_validator
+
 from google.adk.tools.mcp_tool.mcp_toolset import (
     MCPToolset,
     StdioServerParameters,
@@ -10,6 +13,179 @@ from google.adk.tools.mcp_tool.mcp_toolset import (
     SseConnectionParams,
 )
 
+from src.tools.mcp_pool import mcp_pool
+
+
+class MCPServerConfig(BaseModel):
+    """A validated server entry from an MCP config file."""
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    alias: str
+    type: Literal["local", "stdio", "sse", "http"] = "stdio"
+    command: Optional[str] = None
+    args: List[str] = []
+    env: Optional[Dict[str, str]] = None
+    url: Optional[str] = None
+    headers: Dict[str, str] = {}
+    tools: List[str] = ["*"]
+    timeout: float = 100
+
+    @model_validator(mode="after")
+    def _check_transport(self):
+        if self.type in ("local", "stdio") and not self.command:
+            raise ValueError(f"MCP server '{self.alias}' of type '{self.type}' requires 'command'")
+        if self.type in ("sse", "http") and not self.url:
+            raise ValueError(f"MCP server '{self.alias}' of type '{self.type}' requires 'url'")
+        return self
+
+    def env_refs(self) -> List[str]:
+        """Names of the environment variables the env and header values refer to."""
+        if self.type in ("local", "stdio"):
+            refs = [_env_ref(v) for v in (self.env or {}).values()]
+        else:
+            refs = [_env_ref(v, header=True) for v in self.headers.values()]
+        return sorted({name for name in refs if name})
+
+    def build_connection_params(self) -> Union[StdioConnectionParams, SseConnectionParams]:
+        """Builds ADK connection params, substituting environment variables."""
+        if self.type in ("local", "stdio"):
+            env = None
+            if self.env is not None:
+                env = {k: _substitute(v) for k, v in self.env.items()}
+            sp = StdioServerParameters(command=self.command, args=self.args, env=env)
+            return StdioConnectionParams(server_params=sp, timeout=self.timeout)
+
+        headers = {k: _substitute(v, header=True) for k, v in self.headers.items()}
+        return SseConnectionParams(url=self.url, headers=headers, timeout=self.timeout)
+
+
+def _env_ref(value: str, header: bool = False) -> Optional[str]:
+    if header:
+        # Copilot convention: "${SECRET_NAME}" → lookup in os.env
+        return value[2:-1] if value.startswith("${") and value.endswith("}") else None
+    return value.split(":", 1)[1].rstrip("}") if value.startswith("${env:") else None
+
+
+def _substitute(value: str, header: bool = False) -> str:
+    name = _env_ref(value, header)
+    return value if name is None else os.getenv(name, "")
+
+
+class _ParsedConfig:
+    def __init__(self, signature: Tuple[int, int], servers: Dict[str, Any]):
+        self.signature = signature
+        self.servers = servers
+        self.validated: Dict[str, MCPServerConfig] = {}
+        # Keyed by alias and the current values of the environment variables it refers to.
+        self.connection_params: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Union[StdioConnectionParams, SseConnectionParams]] = {}
+
+
+class MCPConfigRegistry:
+    """
+    Parses each MCP config file once and caches it keyed by the file's
+    mtime and size. Editing the file triggers a reparse on next access,
+    which also drops the validated entries and connection params memoized
+    for it. Connection params are also rebuilt when an environment variable
+    they substitute changes.
+    """
+
+    def __init__(self):
+        self._configs: Dict[str, _ParsedConfig] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, config_path: str) -> _ParsedConfig:
+        config_file = Path(config_path).resolve()
+        try:
+            stat = config_file.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"MCP config file not found: {config_path}")
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = str(config_file)
+
+        with self._lock:
+            cached = self._configs.get(key)
+            if cached is not None and cached.signature == signature:
+                return cached
+            try:
+                with open(config_file, 'r') as f:
+                    cfg = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in MCP config file: {e}")
+            # Normalize both syntax variants:
+            servers = cfg.get("servers") or cfg.get("mcpServers") or {}
+            parsed = _ParsedConfig(signature, servers)
+            self._configs[key] = parsed
+            return parsed
+
+    def _validated(self, parsed: _ParsedConfig, alias: str) -> MCPServerConfig:
+        with self._lock:
+            if alias in parsed.validated:
+                return parsed.validated[alias]
+        if alias not in parsed.servers:
+            raise KeyError(f"No MCP server '{alias}' found in config")
+        entry = dict(parsed.servers[alias])
+        # The server's name is its key in the config; an "alias" field may only repeat it.
+        if entry.pop("alias", alias) != alias:
+            raise ValueError(f"MCP server '{alias}' has a conflicting 'alias' field")
+        server = MCPServerConfig(alias=alias, **entry)
+        with self._lock:
+            return parsed.validated.setdefault(alias, server)
+
+    def aliases(self, config_path: str) -> List[str]:
+        return list(self._load(config_path).servers.keys())
+
+    def get_server(self, config_path: str, alias: str) -> MCPServerConfig:
+        return self._validated(self._load(config_path), alias)
+
+    def resolve(self, config_path: str, alias: str) -> Tuple[MCPServerConfig, Union[StdioConnectionParams, SseConnectionParams]]:
+        """Returns the validated server entry and its connection params."""
+        parsed = self._load(config_path)
+        server = self._validated(parsed, alias)
+        key = (alias, tuple((name, os.getenv(name, "")) for name in server.env_refs()))
+        with self._lock:
+            conn = parsed.connection_params.get(key)
+        if conn is None:
+            conn = server.build_connection_params()
+            with self._lock:
+                # Drop params built from earlier values of the same variables.
+                for stale in [k for k in parsed.connection_params if k[0] == alias]:
+                    del parsed.connection_params[stale]
+                conn = parsed.connection_params.setdefault(key, conn)
+        return server, conn
+
+    def get_connection_params(self, config_path: str, alias: str) -> Union[StdioConnectionParams, SseConnectionParams]:
+        return self.resolve(config_path, alias)[1]
+
+
+mcp_config_registry = MCPConfigRegistry()
+
+
+def load_mcp_connection_params(
+    config_path: str,
+    alias: str,
+    tool_names: Optional[List[str]] = None
+) -> Tuple[Union[StdioConnectionParams, SseConnectionParams], List[str]]:
+    """
+    Looks up the MCP server named `alias` in .mcp.json (via the cached
+    config registry) and returns its connection parameters together with
+    the tool filter to apply.
+    
+    Args:
+        config_path: Path to the MCP configuration file
+        alias: Name of the MCP server to load
+        tool_names: Optional list of tool names to filter by
+        
+    Returns:
+        Tuple of (connection params, tool filter)
+        
+    Raises:
+        FileNotFoundError: If the config file doesn't exist
+        KeyError: If the specified alias is not found in the config
+        ValueError: If the config is invalid or the server type is not supported
+    """
+    server, conn = mcp_config_registry.resolve(config_path, alias)
+    return conn, tool_names or server.tools
+
 
 def load_mcp_toolset_from_mcp_json(
     config_path: str,
@@ -27,68 +203,13 @@ def load_mcp_toolset_from_mcp_json(
         
     Returns:
         MCPToolset instance configured with the specified server
-        
+
     Raises:
         FileNotFoundError: If the config file doesn't exist
         KeyError: If the specified alias is not found in the config
         ValueError: If the server type is not supported
     """
-    config_file = Path(config_path)
-    if not config_file.exists():
-        raise FileNotFoundError(f"MCP config file not found: {config_path}")
-    
-    try:
-        with open(config_file, 'r') as f:
-            cfg = json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in MCP config file: {e}")
-    
-    # Normalize both syntax variants:
-    servers = cfg.get("servers") or cfg.get("mcpServers")
-    if not servers or alias not in servers:
-        raise KeyError(f"No MCP server '{alias}' found in config")
-
-    srv = servers[alias]
-    server_type = srv.get("type", "stdio")
-    tools_cfg = tool_names or srv.get("tools", ["*"])
-
-    # Build connection parameters based on the MCP server type
-    if server_type in ("local", "stdio"):
-        sp = StdioServerParameters(
-            command=srv["command"],
-            args=srv.get("args", [])
-        )
-        if "env" in srv:
-            env = {}
-            for k, v in srv["env"].items():
-                if isinstance(v, str) and v.startswith("${env:"):
-                    # Handle environment variable substitution
-                    env_var = v.split(":", 1)[1].rstrip("}")
-                    env[k] = os.getenv(env_var, "")
-                else:
-                    env[k] = v
-            sp = StdioServerParameters(
-                command=sp.command,
-                args=sp.args,
-                env=env
-            )
-        conn = StdioConnectionParams(server_params=sp, timeout=srv.get("timeout", 100))
-
-    elif server_type in ("sse", "http"):
-        url = srv["url"]
-        headers = {}
-        for k, v in srv.get("headers", {}).items():
-            # Copilot convention: "${SECRET_NAME}" → lookup in os.env
-            if isinstance(v, str) and v.startswith("${") and v.endswith("}"):
-                secret = v[2:-1]
-                headers[k] = os.getenv(secret, "")
-            else:
-                headers[k] = v
-        conn = SseConnectionParams(url=url, headers=headers, timeout=srv.get("timeout", 100))
-
-    else:
-        raise ValueError(f"Unsupported MCP server type '{server_type}'")
-
+    conn, tools_cfg = load_mcp_connection_params(config_path, alias, tool_names)
     return MCPToolset(connection_params=conn, tool_filter=tools_cfg)
 
 
@@ -102,23 +223,20 @@ def get_available_mcp_servers(config_path: str) -> List[str]:
     Returns:
         List of server aliases
     """
-    config_file = Path(config_path)
-    if not config_file.exists():
-        return []
-    
     try:
-        with open(config_file, 'r') as f:
-            cfg = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
+        return mcp_config_registry.aliases(config_path)
+    except (ValueError, FileNotFoundError):
         return []
-    
-    servers = cfg.get("servers") or cfg.get("mcpServers")
-    return list(servers.keys()) if servers else []
 
 
 def get_mcp_tool(config_path: str = "./deep_researcher/tools/mcp.json", alias: str = "playwright", tool_names: Optional[List[str]] = None):
     """
-    Creates and returns an MCP toolset for the specified server.
+    Returns the shared, pooled MCP toolset for the specified server.
+
+    The server is registered in `mcp_pool` under the config file, alias and
+    tool filter, so agents asking for the same server and tools reuse one
+    server process. When the config file changes, the next request gets a
+    toolset built from the new settings.
     
     Args:
         config_path: Path to the MCP configuration file
@@ -126,10 +244,12 @@ def get_mcp_tool(config_path: str = "./deep_researcher/tools/mcp.json", alias: s
         tool_names: Optional list of tool names to filter by
         
     Returns:
-        MCPToolset instance
+        Pooled toolset handle, or None when the server cannot be loaded
     """
     try:
-        return load_mcp_toolset_from_mcp_json(config_path, alias, tool_names)
+        conn, tools_cfg = load_mcp_connection_params(config_path, alias, tool_names)
+        key = f"{Path(config_path).resolve()}#{alias}[{','.join(sorted(tools_cfg))}]"
+        return mcp_pool.get(mcp_pool.register(alias, conn, tools_cfg, key=key))
     except Exception as e:
         print(f"Warning: Could not load MCP tool '{alias}': {e}")
         return None
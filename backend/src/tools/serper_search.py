@@ -3,14 +3,17 @@
 Web search tool using SERPER API for integration with LLM workflows.
 """
 import os
-import requests
 from dotenv import load_dotenv
 
+from src.utils.cassette import http_request
+from src.utils.telemetry import instrument
+
 load_dotenv()
 
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 SERPER_BASE_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev/search")
 
+@instrument("tool")
 def serper_search(query: str):
     """
     Perform a web search using the SERPER API.
@@ -23,7 +26,7 @@ def serper_search(query: str):
     base_url = SERPER_BASE_URL
     headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
     payload = {"q": query}
-    response = requests.post(base_url, json=payload, headers=headers)
+    response = http_request("POST", base_url, json=payload, headers=headers)
     response.raise_for_status()
     return response.json()
 
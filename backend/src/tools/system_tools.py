@@ -1,12 +1,134 @@
 
+import asyncio
 import os
-import subprocess
+import signal
+import time
+import uuid
 from typing import Dict, Any, Optional, List
 
-def run_shell_command(
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from google.adk.tools import ToolContext
+
+from src.utils.adk_context import context_user_id
+from src.utils.kv_store import get_kv_store
+from src.utils.telemetry import instrument
+
+SHELL_TIMEOUT_SECONDS = float(os.getenv("SHELL_TIMEOUT_SECONDS", "300"))
+SHELL_MAX_OUTPUT_BYTES = int(os.getenv("SHELL_MAX_OUTPUT_BYTES", str(64 * 1024)))
+SHELL_LOG_DIR = os.getenv("SHELL_LOG_DIR", "artifacts/logs")
+# Oldest command logs beyond this many are deleted.
+SHELL_LOG_MAX_FILES = int(os.getenv("SHELL_LOG_MAX_FILES", "200"))
+# How long to keep reading output after the command exits, for background children still holding the pipes.
+SHELL_DRAIN_SECONDS = float(os.getenv("SHELL_DRAIN_SECONDS", "2"))
+SHELL_CPU_LIMIT_SECONDS = os.getenv("SHELL_CPU_LIMIT_SECONDS")
+SHELL_MEMORY_LIMIT_MB = os.getenv("SHELL_MEMORY_LIMIT_MB")
+_READ_CHUNK_BYTES = 8192
+
+
+class _CappedOutput:
+    """Keeps the head and tail of a stream and drops the middle once over the cap."""
+
+    def __init__(self, max_bytes: int):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total_bytes = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.total_bytes += len(chunk)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk:
+            self.tail += chunk
+            del self.tail[:-self.tail_limit or len(self.tail)]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > len(self.head) + len(self.tail)
+
+    def text(self) -> str:
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if self.truncated:
+            omitted = self.total_bytes - len(self.head) - len(self.tail)
+            return f"{head}\n... [{omitted} bytes omitted, see log_file] ...\n{tail}"
+        return head + tail
+
+
+def _apply_rlimits(cpu_seconds: Optional[int], memory_mb: Optional[int]):
+    def _limit() -> None:
+        if cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+        if memory_mb:
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return _limit
+
+
+def _prune_logs(keep: int) -> None:
+    try:
+        logs = [os.path.join(SHELL_LOG_DIR, name) for name in os.listdir(SHELL_LOG_DIR)
+                if name.startswith("shell_") and name.endswith(".log")]
+    except OSError:
+        return
+    if len(logs) <= keep:
+        return
+    logs.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+    for path in logs[:len(logs) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _kill_group(process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _close_pipes(process) -> None:
+    # asyncio.subprocess.Process has no public close(); without it the pipes a
+    # background child still holds are only closed when the transport is
+    # garbage collected, possibly after the event loop is gone.
+    transport = getattr(process, "_transport", None)
+    if transport is not None:
+        transport.close()
+
+
+async def _wait_exit(process) -> int:
+    # process.wait() also waits for the pipes to close, which a backgrounded child can keep open indefinitely.
+    delay = 0.005
+    while process.returncode is None:
+        await asyncio.sleep(delay)
+        delay = min(0.1, delay * 2)
+    return process.returncode
+
+
+async def _pump(stream: asyncio.StreamReader, output: _CappedOutput, log, prefix: bytes) -> None:
+    while True:
+        chunk = await stream.read(_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        output.write(chunk)
+        if log is not None:
+            log.write(prefix + chunk)
+
+
+@instrument("tool")
+async def run_shell_command(
     command: str,
     description: Optional[str] = None,
     directory: Optional[str] = None,
+    timeout_seconds: Optional[float] = None,
 ) -> Dict[str, Any]:
     """
     Executes a given bash shell command using `bash -c <command>`.
@@ -15,37 +137,128 @@ def run_shell_command(
     needing to unzip, rename, or move files. Prefer it over code_agent
     for command-line tasks.
 
+    Long outputs are truncated to their first and last lines; the full
+    output is written to `log_file`. Commands are killed after the timeout.
+
     Args:
         command: The shell command to run.
         description: Optional label for the command (ignored by shell).
         directory: Directory to execute command in.
+        timeout_seconds: Optional timeout, defaults to SHELL_TIMEOUT_SECONDS.
 
     Returns:
-        Dict with stdout, stderr, and exit code.
+        Dict with stdout, stderr, exit code, timings and log file path.
     """
     if directory and not os.path.isdir(directory):
         return {"error": f"Directory not found: {directory}"}
 
+    timeout = timeout_seconds or SHELL_TIMEOUT_SECONDS
+    stdout = _CappedOutput(SHELL_MAX_OUTPUT_BYTES)
+    stderr = _CappedOutput(SHELL_MAX_OUTPUT_BYTES)
+    log_file = None
+    log = None
+    process = None
+    pumps = None
+    timed_out = False
+
     try:
-        process = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
+        if SHELL_LOG_DIR:
+            os.makedirs(SHELL_LOG_DIR, exist_ok=True)
+            _prune_logs(max(0, SHELL_LOG_MAX_FILES - 1))
+            log_file = os.path.join(SHELL_LOG_DIR, f"shell_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.log")
+            log = open(log_file, "wb")
+            log.write(f"$ {command}\n".encode("utf-8"))
+
+        preexec_fn = None
+        if resource is not None and (SHELL_CPU_LIMIT_SECONDS or SHELL_MEMORY_LIMIT_MB):
+            preexec_fn = _apply_rlimits(
+                int(SHELL_CPU_LIMIT_SECONDS) if SHELL_CPU_LIMIT_SECONDS else None,
+                int(SHELL_MEMORY_LIMIT_MB) if SHELL_MEMORY_LIMIT_MB else None,
+            )
+
+        cpu_before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource is not None else None
+        start = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            "bash", "-c", command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
             cwd=directory,
+            start_new_session=True,
+            preexec_fn=preexec_fn,
         )
-        return {
-            "stdout": process.stdout,
-            "stderr": process.stderr,
+        pumps = asyncio.gather(
+            _pump(process.stdout, stdout, log, b""),
+            _pump(process.stderr, stderr, log, b"[stderr] "),
+        )
+        try:
+            await asyncio.wait_for(_wait_exit(process), timeout=timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill_group(process)
+            await _wait_exit(process)
+        # A backgrounded child can keep the pipes open after the command exits; read what it wrote, then stop.
+        try:
+            await asyncio.wait_for(pumps, timeout=SHELL_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        wall_time = time.perf_counter() - start
+
+        result = {
+            "stdout": stdout.text(),
+            "stderr": stderr.text(),
             "exit_code": process.returncode,
+            "truncated": stdout.truncated or stderr.truncated,
+            "wall_time_seconds": round(wall_time, 3),
         }
+        if cpu_before is not None:
+            # RUSAGE_CHILDREN is process-wide, so this is approximate when commands overlap.
+            cpu_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            result["cpu_time_seconds"] = round(
+                (cpu_after.ru_utime - cpu_before.ru_utime) + (cpu_after.ru_stime - cpu_before.ru_stime), 3
+            )
+        if log_file:
+            result["log_file"] = log_file
+        if timed_out:
+            result["error"] = f"Command timed out after {timeout} seconds"
+        return result
     except Exception as e:
         return {"error": str(e)}
+    finally:
+        # Cancelled while the command was running: don't leave it behind.
+        if process is not None and process.returncode is None:
+            _kill_group(process)
+        if pumps is not None and not pumps.done():
+            pumps.cancel()
+            pumps.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if process is not None:
+            _close_pipes(process)
+        if log is not None:
+            log.close()
+
+MEMORY_NAMESPACE_STATE_KEY = "memory_namespace"
+
+
+def _memory_namespace(tool_context: Optional[ToolContext]) -> str:
+    """
+    Scopes memory entries to the caller's user and session. The session part
+    is an ID kept in session state: AgentTool copies state into sub-agent
+    sessions and forwards changes back, so sub-agents share their parent's
+    memory.
+    """
+    if tool_context is None:
+        return "default"
+    session = tool_context.state.get(MEMORY_NAMESPACE_STATE_KEY)
+    if not session:
+        session = uuid.uuid4().hex
+        tool_context.state[MEMORY_NAMESPACE_STATE_KEY] = session
+    return f"{context_user_id(tool_context) or 'anonymous'}/{session}"
 
 def memory(
     operation: str,
-    key: str,
+    key: Optional[str] = None,
     value: Optional[str] = None,
+    ttl_seconds: Optional[float] = None,
+    tool_context: Optional[ToolContext] = None,
 ) -> Dict[str, Any]:
     """
     Saves or retrieves key-value memory pairs between research phases.
@@ -56,25 +269,37 @@ def memory(
     - Important identifiers
     - Intermediate values
 
+    Memory is private to the current session and bounded in size, so old
+    entries may be evicted.
+
     Args:
-        operation: "save" or "load".
-        key: The identifier for the value.
+        operation: "save", "load", "delete", "clear" or "stats".
+        key: The identifier for the value (required for save/load/delete).
         value: Optional value to save (only for 'save').
+        ttl_seconds: Optional lifetime of the saved value in seconds.
 
     Returns:
         Dict with result or error.
     """
-    if 'memory_store' not in globals():
-        global memory_store
-        memory_store = {}
+    store = get_kv_store()
+    namespace = _memory_namespace(tool_context)
+
+    if operation in ("save", "load", "delete") and not key:
+        return {"error": f"Key is required for {operation} operation"}
 
     if operation == "save":
         if value is None:
             return {"error": "Value is required for save operation"}
-        memory_store[key] = value
+        store.set(namespace, key, value, ttl=ttl_seconds)
         return {"status": "success"}
     elif operation == "load":
-        return {"value": memory_store.get(key)}
+        return {"value": store.get(namespace, key)}
+    elif operation == "delete":
+        return {"status": "success" if store.delete(namespace, key) else "not_found"}
+    elif operation == "clear":
+        return {"status": "success", "removed": store.clear(namespace)}
+    elif operation == "stats":
+        return store.stats(namespace)
     else:
         return {"error": f"Unknown operation: {operation}"}
 
@@ -1,13 +1,16 @@
 
 import requests
-from bs4 import BeautifulSoup
 from typing import Dict, Any, List
 
+from src.utils.cassette import http_request
+from src.utils.telemetry import instrument
+
 DEFAULT_USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 )
 
+@instrument("tool")
 def fetch_web_page(url: str) -> Dict[str, Any]:
     """
     Fetches the full HTML content of a static web page.
@@ -23,13 +26,14 @@ def fetch_web_page(url: str) -> Dict[str, Any]:
     """
     try:
         headers = {'User-Agent': DEFAULT_USER_AGENT}
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_request("GET", url, headers=headers, timeout=30)
         response.raise_for_status()
         return {"content": response.text}
     except requests.exceptions.RequestException as e:
         return {"error": str(e)}
 
 
+@instrument("tool")
 def fetch_web_page_simple(url: str) -> Dict[str, Any]:
     """
     Fetches only the **visible text** content from a static page (stripped HTML).
@@ -45,8 +49,9 @@ def fetch_web_page_simple(url: str) -> Dict[str, Any]:
     """
     try:
         headers = {'User-Agent': DEFAULT_USER_AGENT}
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_request("GET", url, headers=headers, timeout=30)
         response.raise_for_status()
+        from bs4 import BeautifulSoup  # deferred: only needed for text extraction
         soup = BeautifulSoup(response.text, 'html.parser')
         for script in soup(["script", "style"]):
             script.decompose()
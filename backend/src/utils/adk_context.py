@@ -0,0 +1,25 @@
+"""
+Access to invocation details that ADK's context objects do not expose publicly.
+
+ADK 1.x callback and tool contexts only carry the user and agent of the
+current invocation on their private `_invocation_context`. Code in this
+repository reads them through these helpers alone, so an ADK upgrade that
+adds public accessors or renames the attribute is a change in one place.
+"""
+from typing import Any, Optional
+
+
+def _invocation(context: Any):
+    return getattr(context, "_invocation_context", None)
+
+
+def context_user_id(context: Any) -> Optional[str]:
+    """User ID of the invocation a callback or tool context belongs to."""
+    invocation = _invocation(context)
+    return invocation.user_id if invocation is not None else None
+
+
+def context_agent(context: Any):
+    """Agent running the invocation a callback or tool context belongs to."""
+    invocation = _invocation(context)
+    return invocation.agent if invocation is not None else None
@@ -0,0 +1,430 @@
+"""
+Content-addressed artifact service backed by the local filesystem.
+
+Artifact bytes are stored once per SHA-256 digest under
+`<root>/blobs/<aa>/<digest>`, optionally zlib-compressed, while a small
+SQLite index maps (app, user, session, filename, version) to a digest.
+Saving the same CSV/JSON result twice therefore costs one blob. Blobs are
+written and read in chunks, so large outputs never have to be held in
+memory outside of the ADK `types.Part` API, and the index records last
+access so the store can be garbage-collected to a size cap (LRU).
+"""
+import asyncio
+import hashlib
+import io
+import mimetypes
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.artifacts.base_artifact_service import BaseArtifactService
+from google.genai import types
+
+ARTIFACT_STORE_DIR = os.getenv("ARTIFACT_STORE_DIR", "artifacts/store")
+ARTIFACT_STORE_MAX_BYTES = int(os.getenv("ARTIFACT_STORE_MAX_BYTES", str(10 * 1024 ** 3)))
+ARTIFACT_COMPRESS = os.getenv("ARTIFACT_COMPRESS", "true").lower() in ("1", "true", "yes")
+# Unreferenced blobs younger than this are kept: their version row may not be committed yet.
+ARTIFACT_GC_GRACE_SECONDS = float(os.getenv("ARTIFACT_GC_GRACE_SECONDS", "3600"))
+_CHUNK_BYTES = 1024 * 1024
+_COMPRESSIBLE_PREFIXES = ("text/", "application/json", "application/xml", "application/csv", "application/x-ndjson")
+
+
+def _is_compressible(mime_type: str) -> bool:
+    return mime_type.startswith(_COMPRESSIBLE_PREFIXES)
+
+
+class ContentAddressedArtifactService(BaseArtifactService):
+    """
+    Filesystem artifact store with dedup, optional compression and LRU GC.
+
+    Args:
+        root_dir: Directory holding blobs and the index database.
+        max_bytes: Size cap for stored blobs enforced by `collect_garbage`.
+        compress: Compress text-like artifacts with zlib.
+    """
+
+    def __init__(self, root_dir: str = ARTIFACT_STORE_DIR, max_bytes: int = ARTIFACT_STORE_MAX_BYTES, compress: bool = ARTIFACT_COMPRESS):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root_dir, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root_dir, "tmp"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root_dir, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                compressed INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS artifact_versions (
+                app_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                digest TEXT NOT NULL REFERENCES blobs (digest),
+                mime_type TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (app_name, user_id, session_id, filename, version)
+            );
+            CREATE INDEX IF NOT EXISTS artifact_versions_digest ON artifact_versions (digest);
+            """
+        )
+        self._conn.commit()
+
+    # ---- keys and paths ----
+
+    @staticmethod
+    def _session_key(session_id: str, filename: str) -> str:
+        # Same convention as ADK's services: "user:" artifacts are shared across sessions.
+        return "user" if filename.startswith("user:") else session_id
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, "blobs", digest[:2], digest)
+
+    # ---- streaming primitives ----
+
+    def put_stream(self, stream: BinaryIO, mime_type: str = "application/octet-stream") -> Tuple[str, int]:
+        """
+        Streams `stream` into the blob store, hashing as it goes.
+
+        Returns:
+            Tuple of (sha256 digest, uncompressed size).
+        """
+        compressed = self.compress and _is_compressible(mime_type)
+        hasher = hashlib.sha256()
+        size = 0
+        compressor = zlib.compressobj(6) if compressed else None
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root_dir, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := stream.read(_CHUNK_BYTES):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    tmp.write(compressor.compress(chunk) if compressor else chunk)
+                if compressor:
+                    tmp.write(compressor.flush())
+            digest = hasher.hexdigest()
+            with self._lock:
+                exists = self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+                if not exists:
+                    path = self._blob_path(digest)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    self._conn.execute(
+                        "INSERT INTO blobs (digest, size, stored_size, compressed, last_access) VALUES (?, ?, ?, ?, ?)",
+                        (digest, size, os.path.getsize(path), int(compressed), time.time()),
+                    )
+                else:
+                    # Refresh the timestamp so garbage collection leaves a reused blob alone until its version is recorded.
+                    self._conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+                self._conn.commit()
+            return digest, size
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def iter_blob(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Yields the uncompressed bytes of a blob from `start` up to and
+        including `end`, reading in chunks.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT compressed FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(f"Blob not found: {digest}")
+            self._conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            self._conn.commit()
+        remaining = None if end is None else end - start + 1
+        with open(self._blob_path(digest), "rb") as f:
+            if not row[0]:
+                f.seek(start)
+                while remaining is None or remaining > 0:
+                    chunk = f.read(_CHUNK_BYTES if remaining is None else min(_CHUNK_BYTES, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+                return
+            # max_length keeps each step to one chunk of output however well the blob compresses;
+            # input the decompressor has not consumed yet waits in unconsumed_tail.
+            decompressor = zlib.decompressobj()
+            skip = start
+            pending = b""
+            while remaining is None or remaining > 0:
+                if not pending:
+                    pending = f.read(_CHUNK_BYTES)
+                    if not pending:
+                        break
+                chunk = decompressor.decompress(pending, _CHUNK_BYTES)
+                pending = decompressor.unconsumed_tail
+                if decompressor.eof and not chunk:
+                    break
+                if skip:
+                    dropped = min(skip, len(chunk))
+                    chunk, skip = chunk[dropped:], skip - dropped
+                if remaining is not None:
+                    chunk = chunk[:remaining]
+                    remaining -= len(chunk)
+                if chunk:
+                    yield chunk
+
+    def _record_version(self, app_name: str, user_id: str, session_id: str, filename: str, digest: str, mime_type: str) -> int:
+        session_key = self._session_key(session_id, filename)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(version) FROM artifact_versions WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ?",
+                (app_name, user_id, session_key, filename),
+            ).fetchone()
+            version = 0 if row[0] is None else row[0] + 1
+            self._conn.execute(
+                "INSERT INTO artifact_versions (app_name, user_id, session_id, filename, version, digest, mime_type, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (app_name, user_id, session_key, filename, version, digest, mime_type, time.time()),
+            )
+            self._conn.commit()
+        return version
+
+    def save_file(self, *, app_name: str, user_id: str, session_id: str, filename: str, stream: BinaryIO, mime_type: Optional[str] = None) -> int:
+        """Streams a file-like object in as a new artifact version and returns the version."""
+        mime_type = mime_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        digest, _ = self.put_stream(stream, mime_type)
+        return self._record_version(app_name, user_id, session_id, filename, digest, mime_type)
+
+    def get_version_info(self, *, app_name: str, user_id: str, session_id: str, filename: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Returns digest, mime type, size and version of an artifact (latest by default)."""
+        query = (
+            "SELECT v.version, v.digest, v.mime_type, b.size FROM artifact_versions v JOIN blobs b ON b.digest = v.digest"
+            " WHERE v.app_name = ? AND v.user_id = ? AND v.session_id = ? AND v.filename = ?"
+        )
+        params: List[Any] = [app_name, user_id, self._session_key(session_id, filename), filename]
+        if version is not None:
+            query += " AND v.version = ?"
+            params.append(version)
+        query += " ORDER BY v.version DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        return {"version": row[0], "digest": row[1], "mime_type": row[2], "size": row[3]}
+
+    # ---- BaseArtifactService ----
+
+    async def save_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str, artifact: types.Part) -> int:
+        if artifact.inline_data is not None:
+            data, mime_type = artifact.inline_data.data or b"", artifact.inline_data.mime_type or "application/octet-stream"
+        elif artifact.text is not None:
+            data, mime_type = artifact.text.encode("utf-8"), "text/plain"
+        else:
+            raise ValueError("Only inline_data and text artifacts can be stored.")
+
+        def _save() -> int:
+            digest, _ = self.put_stream(io.BytesIO(data), mime_type)
+            return self._record_version(app_name, user_id, session_id, filename, digest, mime_type)
+
+        return await asyncio.to_thread(_save)
+
+    async def load_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str, version: Optional[int] = None) -> Optional[types.Part]:
+        def _load() -> Optional[types.Part]:
+            info = self.get_version_info(app_name=app_name, user_id=user_id, session_id=session_id, filename=filename, version=version)
+            if info is None:
+                return None
+            data = b"".join(self.iter_blob(info["digest"]))
+            return types.Part.from_bytes(data=data, mime_type=info["mime_type"])
+
+        return await asyncio.to_thread(_load)
+
+    async def list_artifact_keys(self, *, app_name: str, user_id: str, session_id: str) -> list[str]:
+        def _list() -> list[str]:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT DISTINCT filename FROM artifact_versions WHERE app_name = ? AND user_id = ? AND session_id IN (?, 'user')"
+                    " ORDER BY filename",
+                    (app_name, user_id, session_id),
+                ).fetchall()
+            return [r[0] for r in rows]
+
+        return await asyncio.to_thread(_list)
+
+    async def delete_artifact(self, *, app_name: str, user_id: str, session_id: str, filename: str) -> None:
+        def _delete() -> None:
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM artifact_versions WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ?",
+                    (app_name, user_id, self._session_key(session_id, filename), filename),
+                )
+                self._conn.commit()
+
+        await asyncio.to_thread(_delete)
+
+    async def list_versions(self, *, app_name: str, user_id: str, session_id: str, filename: str) -> list[int]:
+        def _versions() -> list[int]:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT version FROM artifact_versions WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ?"
+                    " ORDER BY version",
+                    (app_name, user_id, self._session_key(session_id, filename), filename),
+                ).fetchall()
+            return [r[0] for r in rows]
+
+        return await asyncio.to_thread(_versions)
+
+    # ---- garbage collection ----
+
+    def collect_garbage(self, grace_seconds: float = ARTIFACT_GC_GRACE_SECONDS) -> Dict[str, int]:
+        """
+        Deletes blobs no artifact version references once they are older
+        than `grace_seconds` (a new blob's version may not be recorded yet),
+        then evicts least recently accessed blobs (and the versions pointing
+        at them) until the store fits within `max_bytes`.
+        """
+        removed_blobs, removed_versions = 0, 0
+        with self._lock:
+            orphans = self._conn.execute(
+                "SELECT digest FROM blobs WHERE digest NOT IN (SELECT DISTINCT digest FROM artifact_versions)"
+                " AND last_access < ?",
+                (time.time() - grace_seconds,),
+            ).fetchall()
+            victims = [r[0] for r in orphans]
+            total = self._conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+            total -= sum(
+                self._conn.execute("SELECT stored_size FROM blobs WHERE digest = ?", (d,)).fetchone()[0] for d in victims
+            )
+            if total > self.max_bytes:
+                for digest, stored_size in self._conn.execute(
+                    "SELECT digest, stored_size FROM blobs WHERE digest IN (SELECT DISTINCT digest FROM artifact_versions)"
+                    " ORDER BY last_access ASC"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append(digest)
+                    total -= stored_size
+            for digest in victims:
+                removed_versions += self._conn.execute("DELETE FROM artifact_versions WHERE digest = ?", (digest,)).rowcount
+                self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                removed_blobs += 1
+            self._conn.commit()
+        for digest in victims:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+        return {"removed_blobs": removed_blobs, "removed_versions": removed_versions}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            blobs, size, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+            versions, logical = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM artifact_versions v JOIN blobs b ON b.digest = v.digest"
+            ).fetchone()
+        return {
+            "blobs": blobs,
+            "versions": versions,
+            "logical_bytes": logical,
+            "unique_bytes": size,
+            "stored_bytes": stored,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_artifact_service: Optional[ContentAddressedArtifactService] = None
+
+
+def get_artifact_service() -> ContentAddressedArtifactService:
+    """Returns the process-wide artifact service rooted at ARTIFACT_STORE_DIR."""
+    global _artifact_service
+    if _artifact_service is None:
+        _artifact_service = ContentAddressedArtifactService()
+    return _artifact_service
+
+
+@contextmanager
+def content_addressed_artifact_service():
+    """
+    Makes `get_fast_api_app` use the content-addressed service when no
+    artifact_service_uri is given. ADK builds an InMemoryArtifactService in
+    that case and offers no other way to supply an artifact service.
+    """
+    from google.adk.cli import fast_api
+
+    original = fast_api.InMemoryArtifactService
+    fast_api.InMemoryArtifactService = get_artifact_service
+    try:
+        yield
+    finally:
+        fast_api.InMemoryArtifactService = original
+
+
+def _parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) of the first range of a "bytes=" Range header, with `end`
+    clamped to the last byte; start > end means the range is unsatisfiable.
+    None when the header is absent or malformed, since HTTP says to ignore
+    a Range header that cannot be parsed.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].split(",")[0].strip().partition("-")
+    try:
+        if start_text:
+            start, end = int(start_text), int(end_text) if end_text else size - 1
+            if end_text and end < start:
+                return None
+        else:
+            start, end = max(size - int(end_text), 0), size - 1
+    except ValueError:
+        return None
+    if start < 0:
+        return None
+    return start, min(end, size - 1)
+
+
+def build_artifact_router():
+    """
+    FastAPI router that streams artifact bytes with HTTP range support, at
+    /artifacts/{app_name}/{user_id}/{session_id}/{filename}?version=N.
+    """
+    from fastapi import APIRouter, HTTPException, Request
+    from fastapi.responses import StreamingResponse
+
+    router = APIRouter()
+
+    @router.get("/artifacts/{app_name}/{user_id}/{session_id}/{filename}")
+    async def download_artifact(app_name: str, user_id: str, session_id: str, filename: str, request: Request, version: Optional[int] = None):
+        service = get_artifact_service()
+        info = await asyncio.to_thread(
+            service.get_version_info, app_name=app_name, user_id=user_id, session_id=session_id, filename=filename, version=version
+        )
+        if info is None:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+
+        size = info["size"]
+        headers = {"Accept-Ranges": "bytes", "ETag": f'"{info["digest"]}"'}
+        byte_range = _parse_range(request.headers.get("range"), size)
+        if byte_range is None:
+            headers["Content-Length"] = str(size)
+            return StreamingResponse(service.iter_blob(info["digest"]), media_type=info["mime_type"], headers=headers)
+
+        start, end = byte_range
+        if start > end:
+            raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            service.iter_blob(info["digest"], start, end), status_code=206, media_type=info["mime_type"], headers=headers
+        )
+
+    return router
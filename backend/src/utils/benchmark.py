@@ -0,0 +1,451 @@
+"""
+Offline throughput and latency benchmarks for the LLM workflows and tools.
+
+Every scenario runs against the local mock OpenAI and Serper endpoints in
+mock_servers.py, so no network access or API keys are needed and results
+only move when our code (or the simulated latency settings) does.
+
+    python main.py benchmark                      # run all scenarios, compare with the baseline
+    python main.py benchmark call_llm tools.serper_search --iterations 50
+    python main.py benchmark --update-baseline    # record a new baseline
+
+For each scenario the report gives throughput, p50/p95/p99 latency and the
+process's peak RSS after the scenario. Peak RSS is a high-water mark, so it
+depends on the order scenarios run in; scenarios always run in
+SCENARIOS order. A baseline is only compared with a run that used the same
+settings, and a regression is a lower throughput, a higher p95 or a higher
+peak RSS than the baseline beyond the tolerance (and, for timings, by more
+than BENCHMARK_MIN_DELTA_MS). Failed iterations always count as a regression.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.hedging import LLM_HEDGE_ENABLED
+from src.utils.mock_servers import LatencyProfile, MockServers
+from src.utils.prompt_cache import prompt_cache_stats
+from src.utils.rate_limit import LLM_RESILIENCE_ENABLED
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCHMARK_BASELINE_PATH = os.getenv("BENCHMARK_BASELINE_PATH", os.path.join(BACKEND_DIR, "benchmarks", "baseline.json"))
+BENCHMARK_TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.25"))
+BENCHMARK_RSS_TOLERANCE = float(os.getenv("BENCHMARK_RSS_TOLERANCE", "0.15"))
+# Slowdowns smaller than this are scheduler noise for the millisecond-scale tool scenarios.
+BENCHMARK_MIN_DELTA_MS = float(os.getenv("BENCHMARK_MIN_DELTA_MS", "25"))
+MOCK_MODEL = "openai/mock-gpt"
+# Rate limited by the mock server at BenchmarkConfig.contended_rpm, and failing at contended_error_rate.
+CONTENDED_MODEL = "openai/mock-contended"
+# Stalls for several seconds on BenchmarkConfig.stall_rate of requests; hedged to MOCK_MODEL.
+STALLING_MODEL = "openai/mock-stalling"
+# Adds BenchmarkConfig.llm_prefill_tokens_per_second of prefill time for uncached prompt tokens.
+LONG_CONTEXT_MODEL = "openai/mock-long-context"
+MULTI_TURN_TURNS = 4
+
+SAMPLE_CV = """
+Jane Doe - Senior Python Developer, Berlin (remote friendly)
+Skills: Python, Django, FastAPI, PostgreSQL, Docker, Kubernetes, AWS, pandas.
+Experience: 6 years building backend services and data pipelines; led a team of four.
+Education: MSc Computer Science, TU Berlin.
+"""
+
+
+@dataclass
+class BenchmarkConfig:
+    iterations: int = 20
+    concurrency: int = 4
+    warmup: int = 1
+    seed: int = 0
+    llm_latency_ms: float = 150.0
+    llm_latency_sigma: float = 0.3
+    llm_tokens_per_second: float = 80.0
+    llm_output_tokens: int = 64
+    serper_latency_ms: float = 80.0
+    serper_latency_sigma: float = 0.3
+    contended_rpm: float = 120.0
+    contended_error_rate: float = 0.05
+    stall_rate: float = 0.04
+    stall_ms: float = 5000.0
+    llm_prefill_tokens_per_second: float = 4000.0
+    llm_resilience: bool = LLM_RESILIENCE_ENABLED
+    llm_hedging: bool = LLM_HEDGE_ENABLED
+
+    def llm_profile(self) -> LatencyProfile:
+        return LatencyProfile(self.llm_latency_ms, self.llm_latency_sigma, self.llm_tokens_per_second,
+                              output_tokens=self.llm_output_tokens)
+
+    def serper_profile(self) -> LatencyProfile:
+        return LatencyProfile(self.serper_latency_ms, self.serper_latency_sigma)
+
+    def stalling_profile(self) -> LatencyProfile:
+        return LatencyProfile(self.llm_latency_ms, self.llm_latency_sigma, self.llm_tokens_per_second,
+                              output_tokens=self.llm_output_tokens, stall_rate=self.stall_rate, stall_ms=self.stall_ms)
+
+    def long_context_profile(self) -> LatencyProfile:
+        return LatencyProfile(self.llm_latency_ms, self.llm_latency_sigma, self.llm_tokens_per_second,
+                              output_tokens=self.llm_output_tokens, prefill_tokens_per_second=self.llm_prefill_tokens_per_second)
+
+
+def _streamlit_module(name: str):
+    """Imports one of the streamlit/ demo modules, which import each other as top-level modules."""
+    import importlib
+
+    streamlit_dir = os.path.join(BACKEND_DIR, "streamlit")
+    if streamlit_dir not in sys.path:
+        sys.path.append(streamlit_dir)
+    return importlib.import_module(name)
+
+
+def _call_llm(servers: MockServers) -> Callable[[int], Any]:
+    from src.utils.llm import call_llm
+
+    return lambda i: call_llm([{"role": "user", "content": f"Summarize the job market for Python developers ({i})."}])
+
+
+def _call_llm_contended(servers: MockServers) -> Callable[[int], Any]:
+    from src.utils.llm import call_llm
+    from src.utils.rate_limit import configure_model_limits
+
+    configure_model_limits(CONTENDED_MODEL, rpm=servers.rate_limits.get(CONTENDED_MODEL.split("/", 1)[1], 0))
+    return lambda i: call_llm([{"role": "user", "content": f"Summarize the job market ({i})."}], model=CONTENDED_MODEL)
+
+
+def _call_llm_hedged(servers: MockServers) -> Callable[[int], Any]:
+    from src.utils.hedging import LLM_HEDGE_MIN_SAMPLES, configure_fallbacks
+    from src.utils.llm import call_llm
+
+    configure_fallbacks(STALLING_MODEL, [MOCK_MODEL])
+    call = lambda i: call_llm([{"role": "user", "content": f"Summarize the job market ({i})."}], model=STALLING_MODEL)
+    # Collect enough latencies for the hedge delay to be the observed p95 before timing starts.
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(call, range(-LLM_HEDGE_MIN_SAMPLES - 10, 0)))
+    return call
+
+
+def _call_llm_multi_turn(servers: MockServers) -> Callable[[int], Any]:
+    from src.agents.deep_research.prompts import SYSTEM_PROMPT
+    from src.utils.llm import call_llm
+
+    def session(i: int) -> None:
+        # The static system prompt first and the conversation after it, as the agents send it.
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        for turn in range(MULTI_TURN_TURNS):
+            messages.append({"role": "user", "content": f"Session {i}, question {turn}: how is demand for Python developers changing?"})
+            response = call_llm(messages, model=LONG_CONTEXT_MODEL)
+            messages.append({"role": "assistant", "content": response.choices[0].message.content})
+    return session
+
+
+def _parallel_processing(servers: MockServers) -> Callable[[int], Any]:
+    run = _streamlit_module("parallel_processing").run
+    return lambda i: run(f"Impact of renewable energy on the global economy ({i})")
+
+
+def _recruitment_workflow(servers: MockServers) -> Callable[[int], Any]:
+    recruitment_workflow = _streamlit_module("recruitment_workflow").recruitment_workflow
+    return lambda i: recruitment_workflow(SAMPLE_CV)
+
+
+def _llm_routing(servers: MockServers) -> Callable[[int], Any]:
+    routing = _streamlit_module("llm_routing")
+
+    def route(i: int) -> str:
+        user_input = f"My laptop does not connect to the VPN since the last update ({i})."
+        return routing.process_routed_request(user_input, routing.classify_user_input(user_input))
+    return route
+
+
+def _serper_search(servers: MockServers) -> Callable[[int], Any]:
+    from src.tools.serper_search import serper_search
+
+    return lambda i: serper_search(f"python developer jobs berlin {i}")
+
+
+def _fetch_web_page(servers: MockServers) -> Callable[[int], Any]:
+    from src.tools.web_tools import fetch_web_page
+
+    return lambda i: fetch_web_page(f"{servers.base_url}/page/{i}")
+
+
+def _fetch_web_page_simple(servers: MockServers) -> Callable[[int], Any]:
+    from src.tools.web_tools import fetch_web_page_simple
+
+    return lambda i: fetch_web_page_simple(f"{servers.base_url}/page/{i}")
+
+
+def _run_shell_command(servers: MockServers) -> Callable[[int], Any]:
+    from src.tools.system_tools import run_shell_command
+
+    return lambda i: asyncio.run(run_shell_command(f"echo {i}"))
+
+
+# Scenario name -> factory that imports the code under test and returns a
+# callable for one iteration. Factories run after the mock servers are up.
+SCENARIOS: Dict[str, Callable[[MockServers], Callable[[int], Any]]] = {
+    "call_llm": _call_llm,
+    "call_llm.contended": _call_llm_contended,
+    "call_llm.hedged": _call_llm_hedged,
+    "call_llm.multi_turn": _call_llm_multi_turn,
+    "parallel_processing": _parallel_processing,
+    "recruitment_workflow": _recruitment_workflow,
+    "llm_routing": _llm_routing,
+    "tools.serper_search": _serper_search,
+    "tools.fetch_web_page": _fetch_web_page,
+    "tools.fetch_web_page_simple": _fetch_web_page_simple,
+    "tools.run_shell_command": _run_shell_command,
+}
+
+
+@contextlib.contextmanager
+def _mock_environment(servers: MockServers):
+    """Points LiteLLM and serper_search at the mock servers for the duration of the run."""
+    overrides = {
+        "LITELLM_MODEL": MOCK_MODEL,
+        "OPENAI_API_KEY": "mock",
+        "OPENAI_API_BASE": servers.openai_base_url,
+        "OPENAI_BASE_URL": servers.openai_base_url,
+        "SERPER_API_KEY": "mock",
+        "SERPER_BASE_URL": servers.serper_url,
+        "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+    }
+    previous = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    # serper_search reads its settings at import time.
+    from src.tools import serper_search as serper_module
+    previous_serper = serper_module.SERPER_API_KEY, serper_module.SERPER_BASE_URL
+    serper_module.SERPER_API_KEY, serper_module.SERPER_BASE_URL = "mock", servers.serper_url
+    try:
+        yield
+    finally:
+        serper_module.SERPER_API_KEY, serper_module.SERPER_BASE_URL = previous_serper
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(name: str, iteration: Callable[[int], Any], config: BenchmarkConfig) -> Dict[str, Any]:
+    """
+    Runs `iteration` config.iterations times on config.concurrency threads.
+
+    Args:
+        name: Scenario name, for the report.
+        iteration: Callable taking the iteration index.
+        config: Iteration count, concurrency and warmup runs.
+
+    Returns:
+        Dict with throughput, latency percentiles in ms, error count and peak RSS.
+    """
+    for i in range(config.warmup):
+        iteration(-1 - i)
+
+    def timed(i: int):
+        start = time.perf_counter()
+        try:
+            iteration(i)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.concurrency) as executor:
+        results = list(executor.map(timed, range(config.iterations)))
+    return summarize(name, results, time.perf_counter() - start)
+
+
+def summarize(name: str, results: List[Tuple[float, Optional[str]]], wall: float) -> Dict[str, Any]:
+    """Report entry for one scenario from (seconds, error or None) per iteration and the wall time."""
+    latencies = np.array([seconds for seconds, _ in results]) * 1000
+    errors = [error for _, error in results if error]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "scenario": name,
+        "iterations": len(results),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_seconds": round(wall, 3),
+        # Successful iterations only, so failures under contention lower the throughput.
+        "throughput_per_second": round((len(results) - len(errors)) / wall, 3) if wall else 0.0,
+        "mean_ms": round(float(latencies.mean()), 2) if len(latencies) else 0.0,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_benchmarks(names: Optional[List[str]] = None, config: Optional[BenchmarkConfig] = None) -> Dict[str, Any]:
+    """
+    Starts the mock servers and runs the selected scenarios in SCENARIOS order.
+
+    Args:
+        names: Scenario names to run; defaults to all of them.
+        config: Iteration, concurrency and simulated latency settings.
+
+    Returns:
+        Dict with the config, the per-scenario results, the mock request counts
+        and the cached share of input tokens per model.
+    """
+    config = config or BenchmarkConfig()
+    names = names or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios {unknown}; choose from {list(SCENARIOS)}")
+
+    results = []
+    rate_limits = {CONTENDED_MODEL.split("/", 1)[1]: config.contended_rpm}
+    with MockServers(config.llm_profile(), config.serper_profile(), seed=config.seed,
+                     rate_limits=rate_limits, error_rate=config.contended_error_rate,
+                     model_profiles={STALLING_MODEL.split("/", 1)[1]: config.stalling_profile(),
+                                     LONG_CONTEXT_MODEL.split("/", 1)[1]: config.long_context_profile()}) as servers, \
+            _mock_environment(servers), contextlib.redirect_stdout(io.StringIO()):
+        for name in SCENARIOS:
+            if name in names:
+                results.append(run_scenario(name, SCENARIOS[name](servers), config))
+        requests_served = servers.counts
+    return {"config": asdict(config), "results": results, "requests_served": requests_served,
+            "prompt_cache": prompt_cache_stats()}
+
+
+async def _replay_session(app_name: str, messages: List[Dict[str, Any]]) -> None:
+    import importlib
+
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    from src.utils.cassette import replay_scope
+    from src.utils.cassette_plugin import CassettePlugin
+
+    agent = importlib.import_module(f"src.agents.{app_name}.agent").root_agent
+    runner = Runner(app_name=app_name, agent=agent, session_service=InMemorySessionService(), plugins=[CassettePlugin()])
+    session = await runner.session_service.create_session(app_name=app_name, user_id="replay")
+    with replay_scope():
+        for message in messages:
+            async for _ in runner.run_async(user_id="replay", session_id=session.id,
+                                            new_message=types.Content.model_validate(message)):
+                pass
+
+
+async def replay_cassette(path: str, concurrency: int = 4, repeat: int = 1) -> Dict[str, Any]:
+    """
+    Replays the agent sessions recorded in a cassette as a load test.
+
+    Every recorded session is run `repeat` times through an in-memory ADK
+    Runner, `concurrency` sessions at a time, with model calls and HTTP tool
+    calls answered from the cassette (see src.utils.cassette).
+
+    Returns:
+        Dict with one report entry per app and the cassette's replay counters.
+    """
+    from src.utils.cassette import get_cassette, recorded_sessions
+
+    sessions = recorded_sessions(path)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(app_name: str, messages: List[Dict[str, Any]]) -> Tuple[str, float, Optional[str]]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await _replay_session(app_name, messages)
+                return app_name, time.perf_counter() - start, None
+            except Exception as e:
+                return app_name, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    start = time.perf_counter()
+    runs = await asyncio.gather(*(timed(app, messages) for _ in range(repeat) for app, messages in sessions))
+    wall = time.perf_counter() - start
+    results = [summarize(f"replay.{app}", [(seconds, error) for name, seconds, error in runs if name == app], wall)
+               for app in sorted({app for app, _ in sessions})]
+    cassette = get_cassette()
+    return {"sessions": len(sessions), "results": results, "cassette": cassette.stats() if cassette else {}}
+
+
+def load_baseline(path: str = BENCHMARK_BASELINE_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(report: Dict[str, Any], path: str = BENCHMARK_BASELINE_PATH) -> None:
+    """Merges the report's scenarios into the baseline file, replacing it if the config changed."""
+    baseline = load_baseline(path)
+    if baseline is None or baseline.get("config") != report["config"]:
+        baseline = {"config": report["config"], "results": {}}
+    for result in report["results"]:
+        baseline["results"][result["scenario"]] = {
+            key: result[key] for key in ("throughput_per_second", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+        }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Optional[Dict[str, Any]],
+                          tolerance: float = BENCHMARK_TOLERANCE,
+                          rss_tolerance: float = BENCHMARK_RSS_TOLERANCE) -> List[str]:
+    """
+    Lists failed scenarios and regressions of the report against the baseline.
+
+    Returns:
+        One message per failing scenario and per regressed metric. Metrics are
+        only compared when the baseline was recorded with the same config.
+    """
+    regressions = [f"{r['scenario']}: {r['errors']} failed iterations ({r['first_error']})"
+                   for r in report["results"] if r["errors"]]
+    if not baseline or baseline.get("config") != report["config"]:
+        return regressions
+    for result in report["results"]:
+        name = result["scenario"]
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        concurrency = report["config"]["concurrency"]
+        request_ms = concurrency * 1000 / max(result["throughput_per_second"], 1e-9)
+        base_request_ms = concurrency * 1000 / max(base["throughput_per_second"], 1e-9)
+        if (result["throughput_per_second"] < base["throughput_per_second"] * (1 - tolerance)
+                and request_ms - base_request_ms > BENCHMARK_MIN_DELTA_MS):
+            regressions.append(f"{name}: throughput {result['throughput_per_second']}/s < baseline {base['throughput_per_second']}/s")
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance) and result["p95_ms"] - base["p95_ms"] > BENCHMARK_MIN_DELTA_MS:
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms > baseline {base['p95_ms']} ms")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mb']} MiB > baseline {base['peak_rss_mb']} MiB")
+    return regressions
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    comparable = bool(baseline) and baseline.get("config") == report["config"]
+    print(f"{'scenario':<30} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MiB':>8} {'errors':>6}  {'vs baseline p95':>15}")
+    for r in report["results"]:
+        base = baseline["results"].get(r["scenario"]) if comparable else None
+        delta = f"{(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.1f}%" if base and base["p95_ms"] else "-"
+        print(f"{r['scenario']:<30} {r['throughput_per_second']:>8.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['peak_rss_mb']:>8.1f} {r['errors']:>6}  {delta:>15}")
+    for model, entry in (report.get("prompt_cache") or {}).items():
+        if entry["cached_tokens"]:
+            print(f"prompt cache: {model} served {entry['cached_ratio']:.0%} of {entry['prompt_tokens']} input tokens from cache")
+    if "config" not in report:
+        return
+    if baseline and not comparable:
+        print("\nBaseline was recorded with different settings; not compared.")
+    elif not baseline:
+        print("\nNo baseline found; run with --update-baseline to record one.")
@@ -0,0 +1,342 @@
+"""
+Record/replay cassettes for LLM completions and outbound HTTP calls.
+
+With CASSETTE_MODE=record, every call that goes through this module is
+appended, with its latency, to a gzip-compressed JSON-lines cassette at
+CASSETTE_PATH. With CASSETTE_MODE=replay, the same calls are answered from
+the cassette instead of the network, so an agent session can be re-run and
+profiled offline. Recorded calls cover:
+
+- `call_llm`/`acall_llm` (litellm completions, kind "litellm"),
+- agent model calls made by the ADK runner, Gemini or LiteLlm (kind "adk",
+  via the plugin in cassette_plugin.py, which main.py registers),
+- Serper searches and page fetches made through `http_request` (kind "http"),
+- user messages sent to agents (kind "user_message"), so `python main.py
+  replay` can drive the recorded sessions again as a load test.
+
+Calls are matched by a hash of the request with volatile fields such as API
+keys and generated tool call ids removed. Identical requests are answered
+in the order they were recorded, and the last answer is repeated once they
+run out. A replayed call waits for its recorded latency times
+CASSETTE_LATENCY_SCALE (1 = as recorded, 0 = instantly). A call missing from
+the cassette raises CassetteMiss unless CASSETTE_PASSTHROUGH=true, in which
+case it goes to the network.
+"""
+import asyncio
+import contextlib
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "artifacts/cassettes/session.jsonl.gz")
+CASSETTE_LATENCY_SCALE = float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0"))
+CASSETTE_PASSTHROUGH = os.getenv("CASSETTE_PASSTHROUGH", "false").lower() in ("1", "true", "yes")
+# Response bodies larger than this are not recorded and always go to the network.
+CASSETTE_MAX_BODY_BYTES = int(os.getenv("CASSETTE_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+
+# Request fields that never take part in matching and are never written to a cassette.
+_SECRET_KEYS = {"api_key", "x-api-key", "authorization", "api_base", "base_url", "metadata"}
+_VOLATILE_KEYS = {"id", "tool_call_id", "function_call_id"}
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a call was not recorded in the cassette."""
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()
+                if k.lower() not in _SECRET_KEYS and k not in _VOLATILE_KEYS and v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if hasattr(value, "model_dump"):
+        return _normalize(value.model_dump(mode="json", exclude_none=True))
+    return value
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Matching key for a request: a hash of its normalized, secret-free content."""
+    canonical = json.dumps(_normalize(request), sort_keys=True, default=str)
+    return hashlib.sha256(f"{kind}\n{canonical}".encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    One cassette file.
+
+    In record mode entries are appended and flushed as they arrive, so a
+    crashed run keeps everything recorded up to the crash. In replay mode the
+    file is read once and entries are served by key in recording order.
+    """
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._counters: Dict[str, int] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if mode == "replay":
+            for entry in read_entries(path):
+                self._entries.setdefault(entry["key"], []).append(entry)
+
+    def record(self, kind: str, key: str, response: Any, latency: float, **extra: Any) -> None:
+        entry = {"kind": kind, "key": key, "latency": round(latency, 4), "time": time.time(), "response": response, **extra}
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = gzip.open(self.path, "ab")
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entries = self._entries.get(key)
+        with self._lock:
+            if not entries:
+                self.misses += 1
+                return None
+            counters = _replay_counters.get()
+            if counters is None:
+                counters = self._counters
+            index = counters.get(key, 0)
+            counters[key] = index + 1
+            self.replayed += 1
+        return entries[min(index, len(entries) - 1)]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "path": self.path, "recorded": self.recorded, "replayed": self.replayed,
+                    "misses": self.misses, "keys": len(self._entries)}
+
+
+def read_entries(path: str) -> Iterator[Dict[str, Any]]:
+    """Yields the entries of a cassette, stopping cleanly at a truncated tail."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except (EOFError, zlib.error, json.JSONDecodeError):
+            return
+
+
+# Per-replay occurrence counters, so concurrent replays of the same session
+# each see the responses in recorded order (see `replay_scope`).
+_replay_counters: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("cassette_counters", default=None)
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The process-wide cassette, or None when CASSETTE_MODE is off."""
+    global _cassette
+    if CASSETTE_MODE not in ("record", "replay"):
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE)
+        return _cassette
+
+
+def use_cassette(path: str, mode: str, latency_scale: Optional[float] = None) -> Cassette:
+    """Switches this process to the given cassette and mode, e.g. for `main.py replay`."""
+    global _cassette, CASSETTE_MODE, CASSETTE_PATH, CASSETTE_LATENCY_SCALE
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+        CASSETTE_MODE, CASSETTE_PATH = mode, path
+        if latency_scale is not None:
+            CASSETTE_LATENCY_SCALE = latency_scale
+        _cassette = Cassette(path, mode)
+        return _cassette
+
+
+@contextlib.contextmanager
+def replay_scope() -> Iterator[None]:
+    """Gives the calls made inside it their own replay position in the cassette."""
+    token = _replay_counters.set({})
+    try:
+        yield
+    finally:
+        _replay_counters.reset(token)
+
+
+def replay_delay(entry: Dict[str, Any]) -> float:
+    return max(0.0, float(entry.get("latency") or 0) * CASSETTE_LATENCY_SCALE)
+
+
+def _miss(kind: str, key: str, description: str) -> None:
+    if not CASSETTE_PASSTHROUGH:
+        raise CassetteMiss(f"No {kind} call recorded in {CASSETTE_PATH} for {description} (key {key})")
+
+
+def _describe_llm(request: Dict[str, Any]) -> str:
+    return f"model {request.get('model')!r}"
+
+
+def call(kind: str, request: Dict[str, Any], live: Callable[[], Any],
+         dump: Callable[[Any], Any], load: Callable[[Any], Any], description: str = "") -> Any:
+    """
+    Runs `live()` through the cassette.
+
+    Args:
+        kind: Entry kind, part of the key.
+        request: Request content the call is matched by.
+        live: Makes the real call.
+        dump: Converts a live response to JSON-serializable data.
+        load: Converts recorded data back to a response.
+        description: Shown in the CassetteMiss message.
+
+    Returns:
+        The live or replayed response.
+    """
+    cassette = get_cassette()
+    if cassette is None:
+        return live()
+    key = request_key(kind, request)
+    if cassette.mode == "replay":
+        entry = cassette.lookup(key)
+        if entry is not None:
+            time.sleep(replay_delay(entry))
+            return load(entry["response"])
+        _miss(kind, key, description)
+        return live()
+    start = time.perf_counter()
+    response = live()
+    cassette.record(kind, key, dump(response), time.perf_counter() - start)
+    return response
+
+
+async def acall(kind: str, request: Dict[str, Any], live: Callable[[], Any],
+                dump: Callable[[Any], Any], load: Callable[[Any], Any], description: str = "") -> Any:
+    """Async variant of `call`; `live` returns an awaitable."""
+    cassette = get_cassette()
+    if cassette is None:
+        return await live()
+    key = request_key(kind, request)
+    if cassette.mode == "replay":
+        entry = cassette.lookup(key)
+        if entry is not None:
+            await asyncio.sleep(replay_delay(entry))
+            return load(entry["response"])
+        _miss(kind, key, description)
+        return await live()
+    start = time.perf_counter()
+    response = await live()
+    cassette.record(kind, key, dump(response), time.perf_counter() - start)
+    return response
+
+
+def _dump_litellm(response: Any) -> Any:
+    return response.model_dump() if hasattr(response, "model_dump") else response
+
+
+def _load_litellm(data: Any) -> Any:
+    import litellm
+
+    return litellm.ModelResponse(**data)
+
+
+def litellm_completion(params: Dict[str, Any], live: Callable[[], Any]) -> Any:
+    """Runs a litellm.completion() call through the cassette; streaming calls bypass it."""
+    if params.get("stream"):
+        return live()
+    return call("litellm", params, live, _dump_litellm, _load_litellm, _describe_llm(params))
+
+
+async def alitellm_completion(params: Dict[str, Any], live: Callable[[], Any]) -> Any:
+    """Async variant of `litellm_completion` for litellm.acompletion()."""
+    if params.get("stream"):
+        return await live()
+    return await acall("litellm", params, live, _dump_litellm, _load_litellm, _describe_llm(params))
+
+
+class ReplayedResponse(requests.Response):
+    """A requests.Response rebuilt from a cassette entry."""
+
+    @classmethod
+    def from_entry(cls, data: Dict[str, Any]) -> "ReplayedResponse":
+        response = cls()
+        response.status_code = data["status_code"]
+        response.headers.update(data.get("headers") or {})
+        response.url = data.get("url", "")
+        response.encoding = data.get("encoding")
+        response._content = data["body"].encode("latin-1")
+        response.reason = data.get("reason", "")
+        return response
+
+
+def _dump_http(response: requests.Response) -> Dict[str, Any]:
+    return {
+        "status_code": response.status_code,
+        "reason": response.reason,
+        "url": response.url,
+        "encoding": response.encoding,
+        "headers": {k: v for k, v in response.headers.items() if k.lower() not in ("set-cookie", "content-encoding", "transfer-encoding")},
+        # latin-1 round-trips arbitrary bytes through JSON.
+        "body": response.content.decode("latin-1"),
+    }
+
+
+def http_request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """
+    `requests.request` through the cassette. Headers are not part of the
+    match (they carry API keys); the method, URL, params and body are.
+    Streaming requests and bodies over CASSETTE_MAX_BODY_BYTES are not recorded.
+    """
+    live = lambda: requests.request(method, url, **kwargs)
+    if kwargs.get("stream") or get_cassette() is None:
+        return live()
+    request = {"method": method.upper(), "url": url, "params": kwargs.get("params"),
+               "json": kwargs.get("json"), "data": kwargs.get("data")}
+
+    def dump(response: requests.Response) -> Dict[str, Any]:
+        data = _dump_http(response)
+        return data if len(response.content) <= CASSETTE_MAX_BODY_BYTES else {**data, "body": None}
+
+    def load(data: Dict[str, Any]) -> requests.Response:
+        return live() if data.get("body") is None else ReplayedResponse.from_entry(data)
+
+    return call("http", request, live, dump, load, f"{method.upper()} {url}")
+
+
+def record_user_message(app_name: str, user_id: str, session_id: str, message: Dict[str, Any]) -> None:
+    """Records a user message so the session can be driven again by `recorded_sessions`."""
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "record":
+        cassette.record("user_message", session_id, message, 0.0, app=app_name, user=user_id)
+
+
+def recorded_sessions(path: str) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """(app name, user messages in order) for every session recorded in a cassette."""
+    sessions: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+    for entry in read_entries(path):
+        if entry["kind"] == "user_message":
+            sessions.setdefault(entry["key"], (entry["app"], []))[1].append(entry["response"])
+    return list(sessions.values())
+
+
+def cassette_plugins() -> List[str]:
+    """Qualified names of the ADK plugins to register, for get_fast_api_app(extra_plugins=...)."""
+    return ["src.utils.cassette_plugin.CassettePlugin"] if CASSETTE_MODE in ("record", "replay") else []
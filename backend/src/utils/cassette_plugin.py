@@ -0,0 +1,71 @@
+"""ADK plugin that records and replays agent model calls and user messages through src.utils.cassette."""
+import asyncio
+import os
+import time
+from typing import Any, Dict, Tuple
+
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+from src.utils.cassette import CASSETTE_PASSTHROUGH, CassetteMiss, get_cassette, record_user_message, replay_delay, request_key
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "agents")
+
+
+def _request_content(llm_request) -> Dict[str, Any]:
+    config = llm_request.config
+    return {
+        "model": llm_request.model,
+        "contents": llm_request.contents,
+        "system_instruction": config.system_instruction if config else None,
+        "response_schema": config.response_schema if config else None,
+        "tools": sorted(llm_request.tools_dict),
+    }
+
+
+class CassettePlugin(BasePlugin):
+    """Serves agent model calls from the cassette in replay mode and records them in record mode."""
+
+    def __init__(self, name: str = "cassette"):
+        super().__init__(name=name)
+        self._pending: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+    async def on_user_message_callback(self, *, invocation_context, user_message):
+        session = invocation_context.session
+        # AgentTool runs sub-agents in their own runner; only top-level app sessions can be replayed.
+        if not os.path.isdir(os.path.join(AGENTS_DIR, session.app_name)):
+            return None
+        record_user_message(session.app_name, session.user_id, session.id,
+                            user_message.model_dump(mode="json", exclude_none=True))
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        cassette = get_cassette()
+        if cassette is None:
+            return None
+        key = request_key("adk", _request_content(llm_request))
+        if cassette.mode == "record":
+            self._pending[(callback_context.invocation_id, callback_context.agent_name)] = (key, time.perf_counter())
+            return None
+        entry = cassette.lookup(key)
+        if entry is None:
+            if CASSETTE_PASSTHROUGH:
+                return None
+            raise CassetteMiss(f"No model call recorded for {callback_context.agent_name} (key {key})")
+        await asyncio.sleep(replay_delay(entry))
+        return LlmResponse.model_validate(entry["response"])
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        pending = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        cassette = get_cassette()
+        if pending and cassette is not None and not llm_response.error_code:
+            key, start = pending
+            cassette.record("adk", key, llm_response.model_dump(mode="json", exclude_none=True),
+                            time.perf_counter() - start, agent=callback_context.agent_name)
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        return None
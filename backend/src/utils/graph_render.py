@@ -0,0 +1,112 @@
+"""
+Local rendering of LangGraph workflow diagrams.
+
+`graph.get_graph().draw_mermaid_png()` sends the diagram to the mermaid.ink
+web service on every call, which adds a network round trip and fails
+offline. Instead, the diagram is turned into Graphviz DOT source here and
+rendered:
+
+- to PNG/SVG with a local Graphviz `dot` binary when one is installed, or
+- in the browser by Streamlit's bundled Graphviz renderer
+  (`st.graphviz_chart(to_dot(graph))`), which needs nothing on the server.
+
+Rendered images are cached by a hash of the graph's structure (nodes, edges
+and their conditions), in memory and under GRAPH_RENDER_CACHE_DIR, so a
+diagram is rendered once per structure rather than on every page load.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GRAPH_RENDER_CACHE_DIR = os.getenv("GRAPH_RENDER_CACHE_DIR", "artifacts/graph_renders")
+GRAPH_RENDER_TIMEOUT_SECONDS = float(os.getenv("GRAPH_RENDER_TIMEOUT_SECONDS", "10"))
+
+_START, _END = "__start__", "__end__"
+
+_cache: Dict[Tuple[str, str], bytes] = {}
+_cache_lock = threading.Lock()
+
+
+def _edges(graph: Any):
+    return sorted(
+        ((edge.source, edge.target, str(edge.data) if edge.data is not None else "", bool(edge.conditional))
+         for edge in graph.edges),
+    )
+
+
+def graph_fingerprint(graph: Any) -> str:
+    """Hash of a drawable graph's structure (langchain_core Graph, as returned by `compiled.get_graph()`)."""
+    structure = {"nodes": sorted(graph.nodes), "edges": _edges(graph)}
+    return hashlib.sha256(json.dumps(structure).encode()).hexdigest()[:16]
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def to_dot(graph: Any) -> str:
+    """Graphviz DOT source for a drawable graph; conditional edges are dashed."""
+    lines = ["digraph G {", '  node [shape=box, style="rounded,filled", fillcolor="#f2f0ff", fontname="Helvetica"];',
+             '  edge [fontname="Helvetica", fontsize=10];']
+    for node_id in graph.nodes:
+        label = node_id.strip("_") if node_id in (_START, _END) else node_id
+        attrs = f"label={_quote(label)}"
+        if node_id in (_START, _END):
+            attrs += ', shape=oval, fillcolor="#bfb6fc"'
+        lines.append(f"  {_quote(node_id)} [{attrs}];")
+    for source, target, data, conditional in _edges(graph):
+        attrs = []
+        if data:
+            attrs.append(f"label={_quote(data)}")
+        if conditional:
+            attrs.append("style=dashed")
+        lines.append(f"  {_quote(source)} -> {_quote(target)}" + (f" [{', '.join(attrs)}]" if attrs else "") + ";")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def render_graph(graph: Any, fmt: str = "png") -> Optional[bytes]:
+    """
+    Renders a drawable graph with the local Graphviz `dot` binary.
+
+    Args:
+        graph: langchain_core Graph, e.g. `compiled_graph.get_graph()`.
+        fmt: "png" or "svg".
+
+    Returns:
+        The image bytes, from the cache when this structure was rendered
+        before, or None when Graphviz is not installed or rendering failed.
+    """
+    key = (graph_fingerprint(graph), fmt)
+    with _cache_lock:
+        if key in _cache:
+            return _cache[key]
+    path = os.path.join(GRAPH_RENDER_CACHE_DIR, f"{key[0]}.{fmt}")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            image = f.read()
+    else:
+        dot = shutil.which("dot")
+        if dot is None:
+            return None
+        try:
+            image = subprocess.run([dot, f"-T{fmt}"], input=to_dot(graph).encode(), capture_output=True,
+                                   check=True, timeout=GRAPH_RENDER_TIMEOUT_SECONDS).stdout
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning("Graphviz rendering failed: %s", e)
+            return None
+        os.makedirs(GRAPH_RENDER_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(image)
+        os.replace(tmp, path)
+    with _cache_lock:
+        _cache[key] = image
+    return image
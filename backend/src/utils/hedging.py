@@ -0,0 +1,281 @@
+"""
+Hedged requests and multi-provider failover for `call_llm`.
+
+LLM_FALLBACKS lists equivalent models per model, in order of preference:
+
+    LLM_FALLBACKS="openai/gpt-4o-mini=anthropic/claude-3-5-haiku-latest|gemini/gemini-2.0-flash"
+
+For a model with fallbacks:
+
+- Hedging: if the request has not completed within the model's observed p95
+  latency, the same request is sent to the first fallback and whichever
+  succeeds first is returned. In async calls the loser is cancelled; in sync
+  calls it runs to completion in a worker thread and its result is dropped.
+  Until LLM_HEDGE_MIN_SAMPLES latencies have been seen, the hedge fires after
+  LLM_HEDGE_DEFAULT_DELAY_SECONDS.
+- Budget: each request adds LLM_HEDGE_BUDGET_RATIO to a hedge budget that is
+  capped at LLM_HEDGE_BUDGET_BURST, and each hedge spends 1. At the default
+  ratio at most about 10% of requests are duplicated.
+- Failover: if a request fails (after the retries in rate_limit.py, or with
+  an open circuit breaker), the fallbacks are tried in order.
+
+Since `call_llm` does not stream, "no first token yet" is measured as "no
+response yet". Outcomes are counted in `hedge_stats` and as the
+`llm_hedges_total` metric.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from src.utils.telemetry import record_hedge
+
+logger = logging.getLogger(__name__)
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() not in ("0", "false", "no")
+LLM_HEDGE_BUDGET_RATIO = float(os.getenv("LLM_HEDGE_BUDGET_RATIO", "0.1"))
+LLM_HEDGE_BUDGET_BURST = float(os.getenv("LLM_HEDGE_BUDGET_BURST", "5"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "10"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+
+
+def _parse_fallbacks(value: str) -> Dict[str, List[str]]:
+    fallbacks = {}
+    for item in value.split(","):
+        if "=" in item:
+            model, alternatives = item.split("=", 1)
+            fallbacks[model.strip()] = [m.strip() for m in alternatives.split("|") if m.strip()]
+    return fallbacks
+
+
+LLM_FALLBACKS = _parse_fallbacks(os.getenv("LLM_FALLBACKS", ""))
+
+
+def configure_fallbacks(model: str, fallbacks: List[str]) -> None:
+    """Sets a model's fallback models at runtime."""
+    LLM_FALLBACKS[model] = list(fallbacks)
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies per model."""
+
+    def __init__(self, window: int = LLM_HEDGE_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, model: str) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples.get(model, ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        # The last of the 19 cut points splitting the samples into 20 groups is the 95th percentile.
+        return statistics.quantiles(samples, n=20, method="inclusive")[-1]
+
+    def hedge_delay(self, model: str) -> float:
+        p95 = self.p95(model)
+        return LLM_HEDGE_DEFAULT_DELAY_SECONDS if p95 is None else p95
+
+
+class HedgeBudget:
+    """Caps hedges at a fraction of requests, with a small burst allowance."""
+
+    def __init__(self, ratio: float = LLM_HEDGE_BUDGET_RATIO, burst: float = LLM_HEDGE_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._balance = burst
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance = min(self.burst, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._balance >= 1:
+                self._balance -= 1
+                return True
+            return False
+
+
+latencies = LatencyTracker()
+budget = HedgeBudget()
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"requests": 0, "hedged": 0, "hedge_won": 0, "primary_won": 0, "budget_exhausted": 0, "failovers": 0}
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _count(name: str, model: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+    record_hedge(model, name)
+
+
+def hedge_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["hedge_win_rate"] = round(stats["hedge_won"] / stats["hedged"], 3) if stats["hedged"] else None
+    stats["p95_seconds"] = {model: latencies.p95(model) for model in LLM_FALLBACKS}
+    return stats
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _stats_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+        return _executor
+
+
+def _timed(attempt: Callable[[Dict[str, Any]], Any], params: Dict[str, Any]) -> Any:
+    start = time.perf_counter()
+    response = attempt(params)
+    latencies.observe(params["model"], time.perf_counter() - start)
+    return response
+
+
+def _failover(params: Dict[str, Any], attempt: Callable[[Dict[str, Any]], Any], error: Exception, tried: List[str]) -> Any:
+    for fallback in LLM_FALLBACKS.get(params["model"], []):
+        if fallback in tried:
+            continue
+        logger.warning("LLM request to %s failed (%s); failing over to %s", params["model"], type(error).__name__, fallback)
+        _count("failovers", params["model"])
+        try:
+            return _timed(attempt, {**params, "model": fallback})
+        except Exception as e:
+            error = e
+    raise error
+
+
+def hedged_call(params: Dict[str, Any], attempt: Callable[[Dict[str, Any]], Any]) -> Any:
+    """
+    Runs `attempt(params)` with hedging and failover across LLM_FALLBACKS.
+
+    Args:
+        params: Completion parameters; "model" selects the fallbacks.
+        attempt: Makes one (guarded) request for the given params.
+
+    Returns:
+        The first successful response.
+    """
+    model = params["model"]
+    fallbacks = LLM_FALLBACKS.get(model)
+    if not fallbacks:
+        return attempt(params)
+    with _stats_lock:
+        _stats["requests"] += 1
+    budget.deposit()
+    if not LLM_HEDGE_ENABLED:
+        try:
+            return _timed(attempt, params)
+        except Exception as e:
+            return _failover(params, attempt, e, [model])
+
+    executor = _get_executor()
+    # Copy the caller's context so spans and cassette state carry over to the worker threads.
+    primary = executor.submit(contextvars.copy_context().run, _timed, attempt, params)
+    done, _ = wait([primary], timeout=latencies.hedge_delay(model))
+    if done or not budget.try_spend():
+        if not done:
+            _count("budget_exhausted", model)
+        try:
+            return primary.result()
+        except Exception as e:
+            return _failover(params, attempt, e, [model])
+
+    _count("hedged", model)
+    hedge = executor.submit(contextvars.copy_context().run, _timed, attempt, {**params, "model": fallbacks[0]})
+    pending = {primary, hedge}
+    error: Optional[Exception] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except Exception as e:
+                error = e
+                continue
+            _count("hedge_won" if future is hedge else "primary_won", model)
+            return response
+    return _failover(params, attempt, error, [model, fallbacks[0]])
+
+
+async def _atimed(attempt: Callable[[Dict[str, Any]], Any], params: Dict[str, Any]) -> Any:
+    start = time.perf_counter()
+    response = await attempt(params)
+    latencies.observe(params["model"], time.perf_counter() - start)
+    return response
+
+
+async def _afailover(params: Dict[str, Any], attempt: Callable[[Dict[str, Any]], Any], error: Exception, tried: List[str]) -> Any:
+    for fallback in LLM_FALLBACKS.get(params["model"], []):
+        if fallback in tried:
+            continue
+        logger.warning("LLM request to %s failed (%s); failing over to %s", params["model"], type(error).__name__, fallback)
+        _count("failovers", params["model"])
+        try:
+            return await _atimed(attempt, {**params, "model": fallback})
+        except Exception as e:
+            error = e
+    raise error
+
+
+async def ahedged_call(params: Dict[str, Any], attempt: Callable[[Dict[str, Any]], Any]) -> Any:
+    """Async variant of `hedged_call`; `attempt` returns an awaitable and the losing request is cancelled."""
+    model = params["model"]
+    fallbacks = LLM_FALLBACKS.get(model)
+    if not fallbacks:
+        return await attempt(params)
+    with _stats_lock:
+        _stats["requests"] += 1
+    budget.deposit()
+    if not LLM_HEDGE_ENABLED:
+        try:
+            return await _atimed(attempt, params)
+        except Exception as e:
+            return await _afailover(params, attempt, e, [model])
+
+    primary = asyncio.ensure_future(_atimed(attempt, params))
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=latencies.hedge_delay(model))
+        if done or not budget.try_spend():
+            if not done:
+                _count("budget_exhausted", model)
+            try:
+                return await primary
+            except Exception as e:
+                error: Optional[BaseException] = e
+                tried = [model]
+        else:
+            _count("hedged", model)
+            hedge = asyncio.ensure_future(_atimed(attempt, {**params, "model": fallbacks[0]}))
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            error = None
+            tried = [model, fallbacks[0]]
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    _count("hedge_won" if task is hedge else "primary_won", model)
+                    return task.result()
+    finally:
+        # Also reached when the caller is cancelled while waiting: don't leave requests running.
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    return await _afailover(params, attempt, error, tried)
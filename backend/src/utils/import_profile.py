@@ -0,0 +1,87 @@
+"""
+Cold-start import profiling, based on `python -X importtime`.
+
+Each module is imported in a fresh interpreter so results reflect a real
+cold start rather than whatever this process has already imported.
+"""
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MODULES = [
+    "main",
+    "src.agents.deep_research.agent",
+    "src.agents.job_application.agent",
+]
+
+_PROBE = """
+import importlib, sys, time
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+if sys.argv[2] == "1":
+    getattr(module, "root_agent", None)
+built = time.perf_counter()
+print(f"{imported - start:.6f} {built - imported:.6f}")
+"""
+
+
+def _parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+
+def profile_import(module: str, build_root_agent: bool = False, top: int = 15, cwd: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Imports `module` in a subprocess with `-X importtime` and summarizes it.
+
+    Args:
+        module: Dotted module name to import.
+        build_root_agent: Also time the first access of `module.root_agent`.
+        top: Number of slowest imports (by cumulative time) to return.
+        cwd: Working directory for the subprocess.
+
+    Returns:
+        Dict with total import time, agent build time and the slowest imports.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, module, "1" if build_root_agent else "0"],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+    )
+    if process.returncode != 0:
+        return {"module": module, "error": process.stderr.strip().splitlines()[-1:] or ["unknown error"]}
+
+    import_seconds, build_seconds = (float(v) for v in process.stdout.strip().splitlines()[-1].split())
+    rows = _parse_importtime(process.stderr)
+    return {
+        "module": module,
+        "import_ms": round(import_seconds * 1000, 1),
+        "build_root_agent_ms": round(build_seconds * 1000, 1) if build_root_agent else None,
+        "modules_imported": len(rows),
+        "slowest": sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:top],
+    }
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    for result in results:
+        print(f"== {result['module']}")
+        if "error" in result:
+            print(f"   error: {result['error'][0]}")
+            continue
+        line = f"   import: {result['import_ms']} ms, {result['modules_imported']} modules"
+        if result["build_root_agent_ms"] is not None:
+            line += f", root_agent build: {result['build_root_agent_ms']} ms"
+        print(line)
+        for row in result["slowest"]:
+            print(f"   {row['cumulative_ms']:>10.1f} ms  {row['self_ms']:>8.1f} ms  {row['module']}")
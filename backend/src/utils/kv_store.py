@@ -0,0 +1,270 @@
+"""
+Pluggable key-value stores backing the `memory` system tool.
+
+Two backends are available:
+- LRUKVStore: in-process, bounded by entry count and bytes per namespace,
+  plus a cap on total bytes that drops whole idle namespaces.
+- SQLiteKVStore: persisted to disk, bounded per namespace.
+
+Values are namespaced (typically by user and session) and may carry a TTL.
+"""
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class KVStore(ABC):
+    """Base interface for namespaced key-value stores."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def clear(self, namespace: str) -> int:
+        ...
+
+    @abstractmethod
+    def stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        ...
+
+
+def _entry_size(key: str, value: str) -> int:
+    return len(key.encode("utf-8")) + len(value.encode("utf-8"))
+
+
+class LRUKVStore(KVStore):
+    """
+    In-process store. Each namespace evicts its own least recently used
+    entries once it holds more than `max_entries` entries or `max_bytes`
+    bytes, so one busy session cannot push out another session's memory.
+    When all namespaces together exceed `max_total_bytes`, the least
+    recently used namespaces other than the one being written are dropped.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 8 * 1024 * 1024,
+                 max_total_bytes: int = 64 * 1024 * 1024, default_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.default_ttl = default_ttl
+        self._spaces: "OrderedDict[str, OrderedDict[str, Tuple[str, Optional[float]]]]" = OrderedDict()
+        self._space_bytes: Dict[str, int] = {}
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, namespace: str, key: str) -> None:
+        space = self._spaces[namespace]
+        value, _ = space.pop(key)
+        size = _entry_size(key, value)
+        self._space_bytes[namespace] -= size
+        self._bytes -= size
+        if not space:
+            del self._spaces[namespace]
+            del self._space_bytes[namespace]
+
+    def _drop_namespace(self, namespace: str) -> int:
+        space = self._spaces.pop(namespace)
+        self._bytes -= self._space_bytes.pop(namespace)
+        return len(space)
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            space = self._spaces.get(namespace)
+            item = space.get(key) if space is not None else None
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(namespace, key)
+                return None
+            space.move_to_end(key)
+            self._spaces.move_to_end(namespace)
+            return value
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl else None
+        size = _entry_size(key, value)
+        with self._lock:
+            if namespace in self._spaces and key in self._spaces[namespace]:
+                self._remove(namespace, key)
+            space = self._spaces.setdefault(namespace, OrderedDict())
+            self._spaces.move_to_end(namespace)
+            space[key] = (value, expires_at)
+            self._space_bytes[namespace] = self._space_bytes.get(namespace, 0) + size
+            self._bytes += size
+            while namespace in self._spaces and (
+                len(space) > self.max_entries or self._space_bytes[namespace] > self.max_bytes
+            ):
+                self._remove(namespace, next(iter(space)))
+                self._evictions += 1
+            while self._bytes > self.max_total_bytes and len(self._spaces) > 1:
+                oldest = next(iter(self._spaces))
+                if oldest == namespace:
+                    break
+                self._evictions += self._drop_namespace(oldest)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            if key not in self._spaces.get(namespace, {}):
+                return False
+            self._remove(namespace, key)
+            return True
+
+    def clear(self, namespace: str) -> int:
+        with self._lock:
+            return self._drop_namespace(namespace) if namespace in self._spaces else 0
+
+    def stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            if namespace is None:
+                entries, size = sum(len(space) for space in self._spaces.values()), self._bytes
+            else:
+                entries = len(self._spaces.get(namespace, {}))
+                size = self._space_bytes.get(namespace, 0)
+            return {
+                "backend": "lru",
+                "entries": entries,
+                "bytes": size,
+                "namespaces": len(self._spaces),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "evictions": self._evictions,
+            }
+
+
+class SQLiteKVStore(KVStore):
+    """
+    Disk-backed store. Each namespace keeps at most `max_entries_per_namespace`
+    entries; the least recently written ones are dropped first.
+    """
+
+    def __init__(self, db_path: str = "artifacts/memory.db", max_entries_per_namespace: int = 1000, default_ttl: Optional[float] = None):
+        self.db_path = db_path
+        self.max_entries_per_namespace = max_entries_per_namespace
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS kv_updated ON kv (namespace, updated_at)")
+        self._conn.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self._conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+                self._conn.commit()
+                return None
+            return value
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, value, expires_at, now),
+            )
+            self._conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND key NOT IN ("
+                " SELECT key FROM kv WHERE namespace = ? ORDER BY updated_at DESC LIMIT ?)",
+                (namespace, namespace, self.max_entries_per_namespace),
+            )
+            self._conn.commit()
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+            self._conn.commit()
+            return cur.rowcount > 0
+
+    def clear(self, namespace: str) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+            return cur.rowcount
+
+    def stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        query = "SELECT COUNT(*), COALESCE(SUM(LENGTH(key) + LENGTH(value)), 0) FROM kv"
+        params: Tuple = ()
+        if namespace is not None:
+            query += " WHERE namespace = ?"
+            params = (namespace,)
+        with self._lock:
+            entries, size = self._conn.execute(query, params).fetchone()
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "bytes": size,
+            "file_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+            "max_entries_per_namespace": self.max_entries_per_namespace,
+        }
+
+
+_store: Optional[KVStore] = None
+_store_lock = threading.Lock()
+
+
+def get_kv_store() -> KVStore:
+    """
+    Returns the process-wide store configured through environment variables:
+    MEMORY_BACKEND ("lru" or "sqlite"), MEMORY_DB_PATH, MEMORY_MAX_ENTRIES
+    and MEMORY_MAX_BYTES (both per namespace), MEMORY_MAX_TOTAL_BYTES and
+    MEMORY_TTL_SECONDS.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            ttl = os.getenv("MEMORY_TTL_SECONDS")
+            default_ttl = float(ttl) if ttl else None
+            max_entries = int(os.getenv("MEMORY_MAX_ENTRIES", "10000"))
+            if os.getenv("MEMORY_BACKEND", "lru").lower() == "sqlite":
+                _store = SQLiteKVStore(
+                    db_path=os.getenv("MEMORY_DB_PATH", "artifacts/memory.db"),
+                    max_entries_per_namespace=max_entries,
+                    default_ttl=default_ttl,
+                )
+            else:
+                _store = LRUKVStore(
+                    max_entries=max_entries,
+                    max_bytes=int(os.getenv("MEMORY_MAX_BYTES", str(8 * 1024 * 1024))),
+                    max_total_bytes=int(os.getenv("MEMORY_MAX_TOTAL_BYTES", str(64 * 1024 * 1024))),
+                    default_ttl=default_ttl,
+                )
+        return _store
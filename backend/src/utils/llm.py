@@ -1,12 +1,57 @@
 
 
 # Minimal LiteLLM-based LLM client (supports OpenAI, Gemini, Azure, etc.)
+import json
+import logging
+import math
 import os
+import re
+from functools import lru_cache
 from dotenv import load_dotenv
 import litellm
 
+from src.utils.cassette import alitellm_completion, litellm_completion
+from src.utils.hedging import ahedged_call, hedged_call
+from src.utils.prompt_cache import mark_cache_breakpoints, record_usage
+from src.utils.rate_limit import LLM_RESILIENCE_ENABLED, aguarded_call, guarded_call
+from src.utils.telemetry import llm_call
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# "auto" uses enum-constrained JSON output where the model supports it, "true"/"false" force it on/off.
+LLM_CLASSIFY_STRUCTURED = os.getenv("LLM_CLASSIFY_STRUCTURED", "auto").lower()
+LLM_CLASSIFY_LOGPROBS = os.getenv("LLM_CLASSIFY_LOGPROBS", "true").lower() not in ("0", "false", "no")
+# Output tokens allowed on top of the longest label (JSON punctuation and tokenizer slack).
+LLM_CLASSIFY_MAX_TOKENS_PAD = int(os.getenv("LLM_CLASSIFY_MAX_TOKENS_PAD", "12"))
+# Reasoning models spend output tokens on thinking before the label: they get this extra
+# budget and the lowest reasoning effort instead of a label-sized cap.
+LLM_CLASSIFY_REASONING_MAX_TOKENS = int(os.getenv("LLM_CLASSIFY_REASONING_MAX_TOKENS", "2048"))
+LLM_CLASSIFY_REASONING_EFFORT = os.getenv("LLM_CLASSIFY_REASONING_EFFORT", "low")
+# Reasoning model names LiteLLM cannot identify, e.g. behind an OpenAI-compatible proxy ("openai/gemini-2.5-flash").
+_REASONING_MODEL_RE = re.compile(r"(?:^|/)(?:o\d|gpt-5|gemini-2\.5|gemini-3|deepseek-r1|qwq)|thinking|reasoner", re.IGNORECASE)
+
+
+def _attempt_params(params):
+    # Cache markers depend on the provider, which changes when hedging or failing over.
+    params = {**params, "messages": mark_cache_breakpoints(params["model"], params["messages"])}
+    # Retries are done by src.utils.rate_limit; stop the provider SDK from retrying as well.
+    return {"max_retries": 0, **params} if LLM_RESILIENCE_ENABLED else params
+
+
+def _attempt(params):
+    response = guarded_call(params["model"], params, lambda: litellm.completion(**_attempt_params(params)))
+    # Counted per live attempt, under the model that answered; cassette replays never get here.
+    record_usage(params["model"], response)
+    return response
+
+
+async def _aattempt(params):
+    response = await aguarded_call(params["model"], params, lambda: litellm.acompletion(**_attempt_params(params)))
+    record_usage(params["model"], response)
+    return response
+
 
 def call_llm(messages, model=None, tools=None, tool_choice="auto", **kwargs):
     """
@@ -29,7 +74,151 @@ def call_llm(messages, model=None, tools=None, tool_choice="auto", **kwargs):
         params["tools"] = tools
         params["tool_choice"] = tool_choice
     params.update(kwargs)
-    return litellm.completion(**params)
+    with llm_call(model) as record:
+        response = litellm_completion(params, lambda: hedged_call(params, _attempt))
+        record(response)
+    return response
+
+
+async def acall_llm(messages, model=None, tools=None, tool_choice="auto", **kwargs):
+    """
+    Async variant of `call_llm`, for issuing many requests concurrently.
+    Takes the same arguments and returns the litellm.acompletion() response.
+    """
+    model = model or os.getenv("LITELLM_MODEL", "gpt-3.5-turbo")
+    params = {
+        "model": model,
+        "messages": messages,
+    }
+    if tools:
+        params["tools"] = tools
+        params["tool_choice"] = tool_choice
+    params.update(kwargs)
+    with llm_call(model) as record:
+        response = await alitellm_completion(params, lambda: ahedged_call(params, _aattempt))
+        record(response)
+    return response
+
+
+@lru_cache(maxsize=None)
+def _supports_enum_output(model):
+    if LLM_CLASSIFY_STRUCTURED in ("true", "false"):
+        return LLM_CLASSIFY_STRUCTURED == "true"
+    try:
+        litellm.get_model_info(model)
+    except Exception:
+        # Models missing from LiteLLM's map are OpenAI-compatible endpoints (proxies, local
+        # servers), which accept json_schema.
+        return True
+    return litellm.supports_response_schema(model=model)
+
+
+@lru_cache(maxsize=None)
+def _is_reasoning_model(model):
+    try:
+        if litellm.supports_reasoning(model=model):
+            return True
+    except Exception:
+        pass
+    return bool(_REASONING_MODEL_RE.search(model))
+
+
+@lru_cache(maxsize=None)
+def _supports_reasoning_effort(model):
+    return "reasoning_effort" in (litellm.get_supported_openai_params(model=model) or [])
+
+
+@lru_cache(maxsize=None)
+def _supports_logprobs(model):
+    return LLM_CLASSIFY_LOGPROBS and "logprobs" in (litellm.get_supported_openai_params(model=model) or [])
+
+
+def _field(obj, key):
+    return obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+
+
+def _confidence(choice):
+    # Probability of the whole completion; every token but the label's is forced by the format.
+    tokens = _field(_field(choice, "logprobs"), "content")
+    if not tokens:
+        return None
+    return round(math.exp(sum(_field(token, "logprob") or 0.0 for token in tokens)), 4)
+
+
+def _match_label(text, labels):
+    text = text.strip().strip("\"'`*.").lower()
+    by_name = {label.lower(): label for label in labels}
+    if text in by_name:
+        return by_name[text]
+    # Longest first, so "Data Science" wins over "Data" when both are labels.
+    for name in sorted(by_name, key=len, reverse=True):
+        if re.search(rf"(?<!\w){re.escape(name)}(?!\w)", text):
+            return by_name[name]
+    return None
+
+
+def classify(text, labels, instructions=None, model=None, default=None, **kwargs):
+    """
+    Classify text into one of a fixed set of labels with a single short completion.
+
+    Where the model supports it the output is constrained to a JSON object whose
+    "label" is one of `labels`; otherwise the label is matched in the free-text
+    answer. max_tokens only covers the longest label (plus a thinking budget at
+    the lowest reasoning effort on reasoning models), and token logprobs (where
+    the provider returns them) give the confidence.
+    Args:
+        text (str): Text to classify.
+        labels (list): Allowed labels.
+        instructions (str): What to classify the text by; goes in the system prompt before the labels.
+        model (str): Model name; defaults to LITELLM_MODEL.
+        default (str): Label returned when the answer matches no label; defaults to the first label.
+        **kwargs: Extra params for call_llm.
+    Returns:
+        dict: "label" and "confidence" (0-1, or None if the provider returned no logprobs).
+    """
+    labels = list(labels)
+    model = model or os.getenv("LITELLM_MODEL", "gpt-3.5-turbo")
+    default = default if default is not None else labels[0]
+    structured = _supports_enum_output(model)
+    # Static instructions and label list first so the prompt prefix is cacheable.
+    system = (instructions.strip() + "\n\n" if instructions else "") + "Labels:\n" + "\n".join(f"- {label}" for label in labels)
+    system += "\n\nAnswer with the label only." if not structured else ""
+    params = {"max_tokens": max(len(label) for label in labels) // 2 + LLM_CLASSIFY_MAX_TOKENS_PAD}
+    if _is_reasoning_model(model):
+        # Thinking tokens count against max_tokens; a label-sized cap would leave the answer empty.
+        params["max_tokens"] += LLM_CLASSIFY_REASONING_MAX_TOKENS
+        if LLM_CLASSIFY_REASONING_EFFORT and _supports_reasoning_effort(model):
+            params["reasoning_effort"] = LLM_CLASSIFY_REASONING_EFFORT
+    if structured:
+        params["response_format"] = {"type": "json_schema", "json_schema": {
+            "name": "classification",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {"label": {"type": "string", "enum": labels}},
+                "required": ["label"],
+                "additionalProperties": False,
+            },
+        }}
+    if _supports_logprobs(model):
+        params["logprobs"] = True
+    params.update(kwargs)
+    response = call_llm([{"role": "system", "content": system}, {"role": "user", "content": text}], model=model, **params)
+    choice = response.choices[0]
+    content = choice.message.content or ""
+    label = None
+    if structured:
+        try:
+            label = json.loads(content).get("label")
+        except (json.JSONDecodeError, AttributeError):
+            label = None
+        label = label if label in labels else _match_label(content, labels)
+    else:
+        label = _match_label(content, labels)
+    if label is None:
+        logger.warning("Classification answer %r matched no label; using %r", content[:80], default)
+        return {"label": default, "confidence": 0.0}
+    return {"label": label, "confidence": _confidence(choice)}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,375 @@
+"""
+Local stand-ins for the OpenAI chat completions API and the Serper search API.
+
+Used by the offline benchmarks so LLM and search workloads can be timed
+without network access or API quota. One HTTP server serves:
+
+- POST /v1/chat/completions: OpenAI-compatible response after a simulated
+  delay of time-to-first-token plus output tokens / tokens-per-second.
+  Models given a requests-per-minute limit answer 429 with Retry-After once
+  it is exceeded, and fail with 503 at `error_rate`, to simulate contention.
+  Prompt prefixes are cached per model the way OpenAI does it: a request of
+  1024+ tokens that repeats the leading messages of an earlier request
+  reports them as `cached_tokens` (in 128 token steps) and skips their
+  prefill time.
+- POST /search: Serper-style organic results after a simulated delay.
+- GET /page/<n>: a static HTML page, the target of the search result links.
+
+Delays are drawn from lognormal distributions around the configured medians
+with a seeded RNG, so runs with the same settings see the same workload.
+Completion text is shaped after the prompt (routing keys, query lists,
+<matched_role> tags, JSON, enum-constrained labels) so callers that parse
+the output keep working.
+"""
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+_FILLER = (
+    "The analysis shows steady demand for experienced engineers with strong "
+    "Python cloud and data skills across remote and hybrid roles in Europe"
+).split()
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Simulated latency of one endpoint.
+
+    Args:
+        latency_ms: Median time to first byte.
+        latency_sigma: Lognormal shape of the latency; 0 makes it constant.
+        tokens_per_second: Median generation rate; 0 disables the token term.
+        tokens_per_second_sigma: Lognormal shape of the generation rate.
+        output_tokens: Completion length reported and generated for free text.
+        prefill_tokens_per_second: Rate at which uncached prompt tokens add to
+            the time to first token; 0 disables the prompt term.
+        stall_rate: Fraction of requests that stall, as a stuck provider would.
+        stall_ms: Extra delay of a stalled request.
+    """
+    latency_ms: float = 150.0
+    latency_sigma: float = 0.3
+    tokens_per_second: float = 0.0
+    tokens_per_second_sigma: float = 0.2
+    output_tokens: int = 64
+    stall_rate: float = 0.0
+    stall_ms: float = 0.0
+    prefill_tokens_per_second: float = 0.0
+
+    def sample_seconds(self, rng: random.Random, output_tokens: int, prefill_tokens: int = 0) -> float:
+        delay = _lognormal(rng, self.latency_ms, self.latency_sigma) / 1000
+        if self.prefill_tokens_per_second > 0 and prefill_tokens:
+            delay += prefill_tokens / self.prefill_tokens_per_second
+        if self.stall_rate and rng.random() < self.stall_rate:
+            delay += self.stall_ms / 1000
+        if self.tokens_per_second > 0 and output_tokens:
+            delay += output_tokens / _lognormal(rng, self.tokens_per_second, self.tokens_per_second_sigma)
+        return delay
+
+
+DEFAULT_LLM_PROFILE = LatencyProfile(latency_ms=150, latency_sigma=0.3, tokens_per_second=80, output_tokens=64)
+DEFAULT_SERPER_PROFILE = LatencyProfile(latency_ms=80, latency_sigma=0.3)
+
+
+def _lognormal(rng: random.Random, median: float, sigma: float) -> float:
+    if sigma <= 0:
+        return median
+    return rng.lognormvariate(math.log(median), sigma)
+
+
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_STEP_TOKENS = 128
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, round(len(text.split()) * 1.3))
+
+
+def _filler(tokens: int) -> str:
+    words = max(1, round(tokens / 1.3))
+    return " ".join(_FILLER[i % len(_FILLER)] for i in range(words))
+
+
+def _closest_label(messages: List[Dict[str, Any]], labels: List[str]) -> str:
+    """The label sharing the most words with the last user message."""
+    user = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "").lower()
+    words = set(user.replace(",", " ").replace(".", " ").split())
+    return max(labels, key=lambda label: len(words & set(label.lower().replace("_", " ").split())))
+
+
+def mock_completion_text(messages: List[Dict[str, Any]], output_tokens: int, json_mode: bool = False,
+                         schema: Optional[Dict[str, Any]] = None) -> str:
+    """Completion text shaped after what the prompt asks for."""
+    system = " ".join(str(m.get("content", "")) for m in messages if m.get("role") == "system").lower()
+    labels = ((schema or {}).get("properties") or {}).get("label", {}).get("enum")
+    if labels:
+        return json.dumps({"label": _closest_label(messages, labels)})
+    listed = [line[2:].strip() for line in system.split("labels:", 1)[-1].splitlines() if line.startswith("- ")]
+    if "answer with the label only" in system and listed:
+        return _closest_label(messages, listed)
+    if json_mode:
+        return json.dumps({"score": 72, "matched_skills": ["Python"], "missing_requirements": [], "reasoning": _filler(24)})
+    if "routing classifier" in system:
+        return "technical_support"
+    if "search queries" in system:
+        return "\n".join(f"- benchmark query {i} {_filler(6)}" for i in range(1, 5))
+    if "<matched_role>" in system:
+        return "<matched_role>Python Developer</matched_role><reasoning>Strong Python background.</reasoning>"
+    if "only the label" in system or "only the category" in system:
+        return "Python"
+    return _filler(output_tokens)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_MockHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/chat/completions"):
+            request = self._read_json()
+            rejection = self.server.reject(request.get("model", ""))
+            if rejection:
+                status, retry_after = rejection
+                data = json.dumps({"error": {"message": "Rate limit exceeded" if status == 429 else "Overloaded",
+                                             "type": "rate_limit_error" if status == 429 else "server_error"}}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if retry_after is not None:
+                    self.send_header("Retry-After", str(math.ceil(retry_after)))
+                    self.send_header("retry-after-ms", str(int(retry_after * 1000)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            self._send_json(200, self.server.chat_completion(request))
+        elif path.endswith("/search"):
+            self._send_json(200, self.server.search(self._read_json()))
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_GET(self):
+        if not self.path.startswith("/page/"):
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        data = self.server.page(self.path[len("/page/"):]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, llm: LatencyProfile, serper: LatencyProfile, seed: int,
+                 rate_limits: Dict[str, float], error_rate: float, model_profiles: Dict[str, LatencyProfile]):
+        super().__init__(address, _Handler)
+        self.llm = llm
+        self.model_profiles = model_profiles
+        self.serper = serper
+        self.rate_limits = rate_limits
+        self.error_rate = error_rate
+        # model -> (available requests, last refill time), refilled at rpm / 60 per second up to one second's worth.
+        self._buckets: Dict[str, List[float]] = {}
+        # Hashes of every message prefix seen, per model.
+        self._prefixes: Dict[str, set] = {}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.counts = {"chat_completions": 0, "search": 0, "page": 0, "rate_limited": 0, "server_errors": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients that cancel a request (e.g. the loser of a hedged call) close the socket mid-response.
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def _delay(self, profile: LatencyProfile, output_tokens: int = 0, prefill_tokens: int = 0) -> None:
+        with self._rng_lock:
+            seconds = profile.sample_seconds(self._rng, output_tokens, prefill_tokens)
+        time.sleep(seconds)
+
+    def cached_prefix_tokens(self, model: str, messages: List[Dict[str, Any]]) -> int:
+        """Tokens of the longest run of leading messages already seen for `model`, and remembers this request's."""
+        digest = hashlib.sha256()
+        prefixes, tokens, cached = [], 0, 0
+        for message in messages:
+            digest.update(json.dumps([message.get("role"), message.get("content")], sort_keys=True).encode())
+            tokens += _count_tokens(str(message.get("content") or ""))
+            prefixes.append((digest.hexdigest(), tokens))
+        with self._counts_lock:
+            seen = self._prefixes.setdefault(model, set())
+            for key, prefix_tokens in prefixes:
+                if key in seen:
+                    cached = prefix_tokens
+            seen.update(key for key, _ in prefixes)
+        if tokens < PREFIX_CACHE_MIN_TOKENS or cached < PREFIX_CACHE_MIN_TOKENS:
+            return 0
+        return cached - cached % PREFIX_CACHE_STEP_TOKENS
+
+    def _count(self, name: str) -> None:
+        with self._counts_lock:
+            self.counts[name] += 1
+
+    def reject(self, model: str) -> Optional[Tuple[int, Optional[float]]]:
+        """(status, retry-after seconds) if a contended model refuses this request, else None."""
+        model = model.split("/", 1)[-1]
+        rpm = self.rate_limits.get(model)
+        if not rpm:
+            return None
+        rate = rpm / 60
+        with self._rng_lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self._count("server_errors")
+                return 503, None
+            now = time.monotonic()
+            bucket = self._buckets.setdefault(model, [max(1.0, rate), now])
+            bucket[0] = min(max(1.0, rate), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return None
+            retry_after = (1 - bucket[0]) / rate
+        self._count("rate_limited")
+        return 429, retry_after
+
+    def chat_completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        messages = request.get("messages") or []
+        profile = self.model_profiles.get(str(request.get("model", "")).split("/", 1)[-1], self.llm)
+        response_format = request.get("response_format") or {}
+        json_mode = response_format.get("type") in ("json_object", "json_schema")
+        output_tokens = min(profile.output_tokens, request.get("max_tokens") or request.get("max_completion_tokens") or profile.output_tokens)
+        text = mock_completion_text(messages, output_tokens, json_mode, (response_format.get("json_schema") or {}).get("schema"))
+        completion_tokens = _count_tokens(text)
+        prompt_tokens = sum(_count_tokens(str(m.get("content") or "")) for m in messages)
+        cached_tokens = self.cached_prefix_tokens(str(request.get("model", "")), messages)
+        self._delay(profile, completion_tokens, prompt_tokens - cached_tokens)
+        self._count("chat_completions")
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+                # A confident model: every token at probability ~0.99.
+                "logprobs": {"content": [{"token": token, "logprob": -0.01, "bytes": None, "top_logprobs": []}
+                                         for token in text.split()]} if request.get("logprobs") else None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    def search(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        query = str(request.get("q", ""))
+        self._delay(self.serper)
+        self._count("search")
+        organic = [{
+            "title": f"{query} - result {i}",
+            "link": f"{self.base_url}/page/{i}",
+            "snippet": _filler(30),
+            "position": i,
+        } for i in range(1, 11)]
+        return {"searchParameters": {"q": query, "type": "search"}, "organic": organic}
+
+    def page(self, name: str) -> str:
+        self._count("page")
+        paragraphs = "".join(f"<p>{_filler(80)}</p>" for _ in range(20))
+        return (f"<html><head><title>Page {name}</title><style>p {{margin: 0}}</style></head>"
+                f"<body><h1>Page {name}</h1>{paragraphs}<script>var x = 1;</script></body></html>")
+
+
+class MockServers:
+    """
+    Runs the mock OpenAI and Serper endpoints on a local port in a background thread.
+
+    `rate_limits` maps model names (without provider prefix) to requests per
+    minute; only those models are rate limited and fail at `error_rate`.
+    `model_profiles` gives individual models their own latency profile.
+
+        with MockServers() as servers:
+            litellm.completion(model="openai/mock", api_base=servers.openai_base_url, ...)
+            requests.post(servers.serper_url, json={"q": "python jobs"})
+    """
+
+    def __init__(self, llm: Optional[LatencyProfile] = None, serper: Optional[LatencyProfile] = None,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0,
+                 rate_limits: Optional[Dict[str, float]] = None, error_rate: float = 0.0,
+                 model_profiles: Optional[Dict[str, LatencyProfile]] = None):
+        self._server = _MockHTTPServer((host, port), llm or DEFAULT_LLM_PROFILE, serper or DEFAULT_SERPER_PROFILE, seed,
+                                       rate_limits or {}, error_rate, model_profiles or {})
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return self._server.base_url
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def serper_url(self) -> str:
+        return f"{self.base_url}/search"
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return dict(self._server.counts)
+
+    @property
+    def rate_limits(self) -> Dict[str, float]:
+        return dict(self._server.rate_limits)
+
+    def start(self) -> "MockServers":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="mock-servers", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockServers":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
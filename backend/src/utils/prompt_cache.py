@@ -0,0 +1,182 @@
+"""
+Provider-side prompt prefix caching.
+
+Providers can reuse the prefix of a request they have already processed,
+which cuts input cost and time to first token. That only works if the
+prefix (system prompt, tools, earlier turns) is the same on every request,
+so requests keep static content first and dynamic content last:
+
+- Gemini models called directly by ADK agents (deep_research): the
+  PromptCachePlugin turns on ADK context caching, which stores the system
+  instruction, tools and earlier turns as Gemini cached content and reuses
+  it for up to PROMPT_CACHE_INTERVALS invocations or PROMPT_CACHE_TTL_SECONDS.
+  The plugin also moves recalled memories (PreloadMemoryTool) out of the
+  system instruction into the conversation, so the instruction stays stable.
+- Anthropic, Bedrock and Gemini/Vertex models through LiteLLM:
+  `mark_cache_breakpoints` adds `cache_control` to the system message, and for
+  Anthropic to the last message as well so each turn reuses the previous one.
+  LiteLLM turns the markers into Anthropic cache breakpoints or Gemini
+  cached content.
+- OpenAI and OpenAI-compatible endpoints cache prompts of 1024+ tokens
+  automatically; only the stable prefix matters there.
+
+Markers are only added to system prompts of at least PROMPT_CACHE_MIN_TOKENS
+(providers reject or ignore smaller cache entries). Cached input tokens per
+model are reported by `prompt_cache_stats`, at /health/llm and as
+llm_tokens_total{direction="cached"}.
+"""
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "1800"))
+PROMPT_CACHE_INTERVALS = int(os.getenv("PROMPT_CACHE_INTERVALS", "10"))
+# LiteLLM providers that need explicit cache_control markers.
+PROMPT_CACHE_PROVIDERS = [p.strip() for p in os.getenv("PROMPT_CACHE_PROVIDERS", "anthropic,bedrock,gemini,vertex_ai").split(",") if p.strip()]
+
+# Start of the block PreloadMemoryTool appends to the system instruction.
+_MEMORY_PREAMBLE = "The following content is from your previous conversations with the user."
+_INSTRUCTION_ROLES = ("system", "developer")
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def provider_of(model: str) -> str:
+    """LiteLLM provider of a model name, e.g. "anthropic" for "anthropic/claude-3-5-haiku-latest"."""
+    if "/" in model:
+        return model.split("/", 1)[0]
+    if model.startswith("claude"):
+        return "anthropic"
+    if model.startswith("gemini"):
+        return "gemini"
+    return "openai"
+
+
+def _text_of(content: Any) -> str:
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+def _with_cache_control(message: Dict[str, Any]) -> Dict[str, Any]:
+    content = message.get("content")
+    if isinstance(content, str):
+        parts = [{"type": "text", "text": content}]
+    elif isinstance(content, list) and content and all(isinstance(part, dict) for part in content):
+        parts = [dict(part) for part in content]
+    else:
+        return message
+    parts[-1]["cache_control"] = {"type": "ephemeral"}
+    return {**message, "content": parts}
+
+
+def mark_cache_breakpoints(model: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Adds `cache_control` markers for providers that need them.
+
+    Args:
+        model: LiteLLM model name; selects the provider.
+        messages: OpenAI-style messages. Not modified.
+
+    Returns:
+        The messages, with the system message (and for Anthropic the last
+        message) marked as cacheable, or unchanged when caching does not apply.
+    """
+    provider = provider_of(model)
+    if not PROMPT_CACHE_ENABLED or provider not in PROMPT_CACHE_PROVIDERS or not messages:
+        return messages
+    first = messages[0]
+    if first.get("role") not in _INSTRUCTION_ROLES or len(_text_of(first.get("content"))) // 4 < PROMPT_CACHE_MIN_TOKENS:
+        return messages
+    marked = [_with_cache_control(first)] + list(messages[1:])
+    # Gemini caches one contiguous block, so only Anthropic-style providers get a breakpoint on the latest turn.
+    if provider in ("anthropic", "bedrock") and len(marked) > 2:
+        marked[-1] = _with_cache_control(marked[-1])
+    return marked
+
+
+def _usage_get(usage: Any, key: str) -> Any:
+    return usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+
+
+def usage_cache_counts(usage: Any) -> Tuple[int, int, int]:
+    """(prompt, cached, cache write) tokens from an OpenAI-style usage object or dict."""
+    if usage is None:
+        return 0, 0, 0
+    details = _usage_get(usage, "prompt_tokens_details")
+    cached = (_usage_get(details, "cached_tokens") if details is not None else None) or _usage_get(usage, "cache_read_input_tokens") or 0
+    written = _usage_get(usage, "cache_creation_input_tokens") or 0
+    return _usage_get(usage, "prompt_tokens") or 0, cached, written
+
+
+def record_prompt_cache(model: str, prompt_tokens: int, cached_tokens: int, cache_write_tokens: int = 0) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(model, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "cache_write_tokens": 0})
+        entry["requests"] += 1
+        entry["prompt_tokens"] += prompt_tokens
+        entry["cached_tokens"] += cached_tokens
+        entry["cache_write_tokens"] += cache_write_tokens
+
+
+def record_usage(model: str, response: Any) -> None:
+    """Counts the prompt and cached tokens of a LiteLLM response."""
+    usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+    if usage is not None:
+        record_prompt_cache(model, *usage_cache_counts(usage))
+
+
+def prompt_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Prompt and cached input tokens per model, with the share of input tokens served from cache."""
+    with _stats_lock:
+        stats = {model: dict(entry) for model, entry in _stats.items()}
+    for entry in stats.values():
+        entry["cached_ratio"] = round(entry["cached_tokens"] / entry["prompt_tokens"], 3) if entry["prompt_tokens"] else None
+    return stats
+
+
+@lru_cache(maxsize=None)
+def context_cache_config():
+    """ADK context cache settings for agents on Gemini models, or None when prompt caching is off."""
+    if not PROMPT_CACHE_ENABLED:
+        return None
+    from google.adk.agents.context_cache_config import ContextCacheConfig
+
+    return ContextCacheConfig(cache_intervals=PROMPT_CACHE_INTERVALS, ttl_seconds=PROMPT_CACHE_TTL_SECONDS,
+                              min_tokens=PROMPT_CACHE_MIN_TOKENS)
+
+
+def stabilize_instruction(llm_request) -> Optional[str]:
+    """
+    Moves the memories PreloadMemoryTool appends to the system instruction
+    into the conversation, just before the latest user turn, so the system
+    instruction is the same on every request of an agent.
+
+    Returns:
+        The moved text, or None when the instruction had no dynamic block.
+    """
+    from google.genai import types
+
+    config = llm_request.config
+    instruction = config.system_instruction if config else None
+    if not isinstance(instruction, str) or _MEMORY_PREAMBLE not in instruction:
+        return None
+    # The latest user text turn; inserting after it could split a function call from its response.
+    position = next((i for i in range(len(llm_request.contents) - 1, -1, -1)
+                     if llm_request.contents[i].role == "user"
+                     and any(part.text and not part.function_response for part in llm_request.contents[i].parts or [])), None)
+    if position is None:
+        return None
+    static, dynamic = instruction.split(_MEMORY_PREAMBLE, 1)
+    config.system_instruction = static.rstrip()
+    dynamic = _MEMORY_PREAMBLE + dynamic
+    llm_request.contents.insert(position, types.Content(role="user", parts=[types.Part(text=dynamic)]))
+    return dynamic
+
+
+def prompt_cache_plugins() -> List[str]:
+    """Qualified names of the ADK plugins to register, for get_fast_api_app(extra_plugins=...)."""
+    return ["src.utils.prompt_cache_plugin.PromptCachePlugin"] if PROMPT_CACHE_ENABLED else []
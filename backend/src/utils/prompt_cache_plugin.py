@@ -0,0 +1,44 @@
+"""ADK plugin that keeps agent prompt prefixes stable and turns on Gemini context caching through src.utils.prompt_cache."""
+from typing import Dict, Tuple
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from src.utils.adk_context import context_agent
+from src.utils.prompt_cache import context_cache_config, record_prompt_cache, stabilize_instruction
+
+
+class PromptCachePlugin(BasePlugin):
+    """Enables context caching for every run and reports cached tokens of agents on Gemini models."""
+
+    def __init__(self, name: str = "prompt_cache"):
+        super().__init__(name=name)
+        self._pending: Dict[Tuple[str, str], str] = {}
+
+    async def before_run_callback(self, *, invocation_context):
+        # get_fast_api_app rebuilds the App without its context_cache_config, so set it per run.
+        # LiteLlm models ignore it; their caching is handled in src.utils.prompt_cache.
+        if invocation_context.context_cache_config is None:
+            invocation_context.context_cache_config = context_cache_config()
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        from google.adk.models.google_llm import Gemini
+
+        stabilize_instruction(llm_request)
+        agent = context_agent(callback_context)
+        if isinstance(getattr(agent, "canonical_model", None), Gemini):
+            self._pending[(callback_context.invocation_id, callback_context.agent_name)] = llm_request.model
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        model = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        usage = llm_response.usage_metadata
+        if model and usage:
+            record_prompt_cache(model, usage.prompt_token_count or 0, usage.cached_content_token_count or 0)
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        return None
@@ -0,0 +1,388 @@
+"""
+Client-side rate limiting, retries and circuit breaking for `call_llm`.
+
+Each model gets:
+
+- A requests bucket and a tokens bucket, filled at the provider's RPM/TPM
+  limits from LLM_RATE_LIMITS (e.g. "openai/gpt-4o=500:30000,gemini/*=60:0";
+  model patterns use fnmatch, 0 means no limit). Calls wait for capacity
+  instead of being rejected by the provider. The buckets run at
+  LLM_RATE_LIMIT_HEADROOM of the limits; a 429 cuts the model's rate by 30%
+  and each success restores 5% of it, so the client settles just under the
+  limit the provider actually enforces.
+- Retries for 429s, 5xx responses, timeouts and connection errors, waiting
+  for the provider's Retry-After when it sends one and for a jittered
+  exponential backoff otherwise.
+- A circuit breaker that opens after LLM_BREAKER_FAILURES consecutive
+  provider failures: transient errors other than 429s, and authentication
+  or permission errors (401/403), which are not retried. Errors about the
+  request itself (e.g. 400s, local exceptions) count neither way. While
+  open, calls fail fast with CircuitOpenError; after
+  LLM_BREAKER_COOLDOWN_SECONDS one probe call is let through, and its
+  outcome closes or re-opens the breaker. A probe that is cancelled, ends
+  with an error about the request, or has not finished after another
+  cooldown, is replaced by the next call.
+
+Waits, retries and breaker trips are reported through src.utils.telemetry.
+LLM_RESILIENCE_ENABLED=false turns all of this off, for comparing
+throughput under contention with `python main.py benchmark call_llm.contended`.
+"""
+import asyncio
+import email.utils
+import fnmatch
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import litellm
+
+from src.utils.telemetry import record_queue_wait, record_retry
+
+logger = logging.getLogger(__name__)
+
+LLM_RESILIENCE_ENABLED = os.getenv("LLM_RESILIENCE_ENABLED", "true").lower() not in ("0", "false", "no")
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+# Fraction of the configured RPM/TPM the client aims for, leaving room for clock skew and burst accounting.
+LLM_RATE_LIMIT_HEADROOM = float(os.getenv("LLM_RATE_LIMIT_HEADROOM", "0.9"))
+
+_RETRYABLE_ERRORS = (
+    litellm.RateLimitError,
+    litellm.InternalServerError,
+    litellm.ServiceUnavailableError,
+    litellm.BadGatewayError,
+    litellm.APIConnectionError,
+    litellm.Timeout,
+)
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Not worth retrying, but a sign that the provider (or our access to it) is broken.
+_AUTH_ERRORS = (litellm.AuthenticationError, litellm.PermissionDeniedError)
+_AUTH_STATUS = {401, 403}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a model whose circuit breaker is open."""
+
+
+def _parse_limits(value: str) -> Dict[str, Tuple[float, float]]:
+    limits = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        pattern, numbers = item.rsplit("=", 1)
+        rpm, _, tpm = numbers.partition(":")
+        limits[pattern.strip()] = (float(rpm or 0), float(tpm or 0))
+    return limits
+
+
+LLM_RATE_LIMITS = _parse_limits(os.getenv("LLM_RATE_LIMITS", ""))
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations: `reserve` takes the tokens
+    immediately, possibly going into debt, and returns how long the caller
+    must wait before using them. Callers therefore queue in arrival order
+    without holding a lock while they sleep.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._available = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+            self._updated = now
+            # A single request larger than the bucket still goes through once the bucket is full.
+            self._available -= min(amount, self.capacity)
+            return max(0.0, -self._available / self.rate)
+
+    def set_rate(self, rate_per_second: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = rate_per_second
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown_seconds: float = LLM_BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if (self.state == "open" and now - self.opened_at >= self.cooldown_seconds) or (
+                    self.state == "half_open" and now - self.probe_started >= self.cooldown_seconds):
+                self.state = "half_open"
+                self.probe_started = now
+                return True
+            return False
+
+    def release(self) -> None:
+        """Re-opens the breaker after a probe ended without an outcome (e.g. cancelled), so the next call probes."""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> bool:
+        """Counts a transient failure; returns True if this opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                return True
+            return False
+
+
+class ModelGuard:
+    """Rate limits, adaptive throttling and the circuit breaker of one model."""
+
+    def __init__(self, model: str, rpm: float = 0, tpm: float = 0):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.scale = 1.0
+        self.requests = TokenBucket(self._rate(rpm), max(1.0, rpm / 60)) if rpm else None
+        self.tokens = TokenBucket(self._rate(tpm), max(1.0, tpm / 60)) if tpm else None
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self._last_throttle = 0.0
+        self.stats = {"calls": 0, "failures": 0, "throttled": 0, "waited_seconds": 0.0, "rejected": 0}
+
+    def reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait:
+            with self._lock:
+                self.stats["waited_seconds"] += wait
+            record_queue_wait("llm_rate_limit", wait)
+        return wait
+
+    def _rate(self, per_minute: float) -> float:
+        return per_minute / 60 * LLM_RATE_LIMIT_HEADROOM * self.scale
+
+    def _rescale(self, scale: float) -> None:
+        self.scale = scale
+        if self.requests:
+            self.requests.set_rate(self._rate(self.rpm))
+        if self.tokens:
+            self.tokens.set_rate(self._rate(self.tpm))
+
+    def on_success(self) -> None:
+        self.breaker.record_success()
+        with self._lock:
+            self.stats["calls"] += 1
+            if self.scale < 1.0:
+                self._rescale(min(1.0, self.scale + 0.05))
+
+    def on_failure(self, error: Exception) -> None:
+        with self._lock:
+            self.stats["failures"] += 1
+            if _status_code(error) == 429:
+                self.stats["throttled"] += 1
+                # Concurrent calls hit by the same burst of 429s count as one signal.
+                if time.monotonic() - self._last_throttle >= 1.0:
+                    self._last_throttle = time.monotonic()
+                    self._rescale(max(0.1, self.scale * 0.7))
+        # 429s are backpressure, handled by throttling above; only errors count towards the breaker.
+        if _status_code(error) != 429 and self.breaker.record_failure():
+            logger.warning("Circuit breaker for %s opened after %s", self.model, type(error).__name__)
+            record_retry(self.model, "circuit_open")
+
+    def check(self) -> None:
+        if not self.breaker.allow():
+            with self._lock:
+                self.stats["rejected"] += 1
+            remaining = self.breaker.cooldown_seconds - (time.monotonic() - self.breaker.opened_at)
+            raise CircuitOpenError(f"Circuit breaker for {self.model} is open; retry in {max(0.0, remaining):.0f}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "rpm": self.rpm, "tpm": self.tpm, "scale": round(self.scale, 3),
+                    "breaker": self.breaker.state, "breaker_trips": self.breaker.trips}
+
+
+_guards: Dict[str, ModelGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(model: str) -> ModelGuard:
+    with _guards_lock:
+        if model not in _guards:
+            rpm, tpm = next((limits for pattern, limits in LLM_RATE_LIMITS.items() if fnmatch.fnmatch(model, pattern)), (0, 0))
+            _guards[model] = ModelGuard(model, rpm, tpm)
+        return _guards[model]
+
+
+def configure_model_limits(model: str, rpm: float = 0, tpm: float = 0) -> ModelGuard:
+    """Sets a model's RPM/TPM limits at runtime, replacing its guard."""
+    with _guards_lock:
+        _guards[model] = ModelGuard(model, rpm, tpm)
+        return _guards[model]
+
+
+def guard_stats() -> Dict[str, Dict[str, Any]]:
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.model: guard.snapshot() for guard in guards}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    return isinstance(error, _RETRYABLE_ERRORS) or _status_code(error) in _RETRYABLE_STATUS
+
+
+def is_auth_error(error: Exception) -> bool:
+    return isinstance(error, _AUTH_ERRORS) or _status_code(error) in _AUTH_STATUS
+
+
+def _settle_non_retryable(guard: ModelGuard, error: Exception) -> None:
+    if is_auth_error(error):
+        guard.on_failure(error)
+    else:
+        # Says nothing about the provider's health; only hand a half-open probe to the next call.
+        guard.breaker.release()
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The provider's Retry-After (or retry-after-ms) from a failed response, in seconds."""
+    headers = getattr(error, "litellm_response_headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def backoff_seconds(attempt: int, error: Exception) -> float:
+    """Retry-After plus a little jitter if given, else full-jitter exponential backoff."""
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return min(LLM_BACKOFF_MAX_SECONDS, retry_after + random.uniform(0, LLM_BACKOFF_BASE_SECONDS / 2))
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def estimate_tokens(params: Dict[str, Any]) -> int:
+    """Rough prompt + completion token count (4 characters per token) for the TPM bucket."""
+    chars = sum(len(str(m.get("content") or "")) for m in params.get("messages") or [])
+    return chars // 4 + int(params.get("max_tokens") or params.get("max_completion_tokens") or 256)
+
+
+def _retry_reason(error: Exception) -> str:
+    return "rate_limit" if _status_code(error) == 429 else "transient_error"
+
+
+def guarded_call(model: str, params: Dict[str, Any], live: Callable[[], Any]) -> Any:
+    """
+    Runs `live()` under the model's rate limits, retries and circuit breaker.
+
+    Args:
+        model: Model name the limits and breaker belong to.
+        params: Completion parameters, for the token estimate.
+        live: Makes one attempt.
+
+    Returns:
+        The response of the first successful attempt.
+    """
+    if not LLM_RESILIENCE_ENABLED:
+        return live()
+    guard = get_guard(model)
+    tokens = estimate_tokens(params)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        guard.check()
+        try:
+            time.sleep(guard.reserve(tokens))
+            response = live()
+        except Exception as e:
+            if not is_retryable(e):
+                _settle_non_retryable(guard, e)
+                raise
+            guard.on_failure(e)
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            record_retry(model, _retry_reason(e))
+            time.sleep(backoff_seconds(attempt, e))
+            continue
+        except BaseException:
+            # Cancelled or interrupted without an outcome; don't leave a half-open probe pending.
+            guard.breaker.release()
+            raise
+        guard.on_success()
+        return response
+
+
+async def aguarded_call(model: str, params: Dict[str, Any], live: Callable[[], Any]) -> Any:
+    """Async variant of `guarded_call`; `live` returns an awaitable."""
+    if not LLM_RESILIENCE_ENABLED:
+        return await live()
+    guard = get_guard(model)
+    tokens = estimate_tokens(params)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        guard.check()
+        try:
+            await asyncio.sleep(guard.reserve(tokens))
+            response = await live()
+        except Exception as e:
+            if not is_retryable(e):
+                _settle_non_retryable(guard, e)
+                raise
+            guard.on_failure(e)
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            record_retry(model, _retry_reason(e))
+            await asyncio.sleep(backoff_seconds(attempt, e))
+            continue
+        except BaseException:
+            # Cancelled (client disconnect, losing hedge) without an outcome; don't leave a half-open probe pending.
+            guard.breaker.release()
+            raise
+        guard.on_success()
+        return response
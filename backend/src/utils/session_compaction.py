@@ -0,0 +1,251 @@
+"""
+Compaction and archival of long-running ADK session histories.
+
+Sessions from the deep research and job application agents accumulate
+hundreds of events, all of which are loaded and replayed into context on
+every turn. SessionCompactor keeps the most recent events of a session,
+moves older ones to a zlib-compressed archive table and replaces them with
+a single summary event, so session load time stays roughly constant as
+sessions age. The summary of an earlier compaction is folded into the next
+one, so a session carries at most one summary. The cut between archived and
+kept events never separates a tool call from its response. State deltas of
+archived events have already been applied to the stored session state, so
+dropping them does not change session state.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions.database_session_service import DatabaseSessionService, StorageEvent
+from google.adk.sessions.session import Session
+from google.genai import types
+from sqlalchemy import DateTime, Integer, LargeBinary, String, delete, func, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+SESSION_COMPACT_MAX_EVENTS = int(os.getenv("SESSION_COMPACT_MAX_EVENTS", "200"))
+SESSION_COMPACT_KEEP_RECENT = int(os.getenv("SESSION_COMPACT_KEEP_RECENT", "50"))
+SESSION_COMPACT_INTERVAL_SECONDS = float(os.getenv("SESSION_COMPACT_INTERVAL_SECONDS", "600"))
+SUMMARY_AUTHOR = "session_compactor"
+
+
+class _ArchiveBase(DeclarativeBase):
+    pass
+
+
+class StorageEventArchive(_ArchiveBase):
+    """One row per compaction run, holding the compressed events it removed."""
+    __tablename__ = "event_archives"
+
+    id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    app_name: Mapped[str] = mapped_column(String(128), index=True)
+    user_id: Mapped[str] = mapped_column(String(128), index=True)
+    session_id: Mapped[str] = mapped_column(String(128), index=True)
+    event_count: Mapped[int] = mapped_column(Integer)
+    first_timestamp: Mapped[datetime] = mapped_column(DateTime)
+    last_timestamp: Mapped[datetime] = mapped_column(DateTime)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    payload: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+def _truncate(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _compacted_count(event: Event) -> int:
+    return int((event.custom_metadata or {}).get("compacted_events", 0))
+
+
+def summarize_events(events: List[Event], max_chars: int = 4000, max_line_chars: int = 200) -> str:
+    """
+    Builds a deterministic, truncated digest of events: text turns, tool
+    calls and tool results, keeping the most recent lines within `max_chars`.
+    Entries of earlier summaries are carried over ahead of the newer ones.
+    """
+    lines = []
+    total = 0
+    for event in events:
+        if event.author == SUMMARY_AUTHOR:
+            total += _compacted_count(event)
+            text = "".join(p.text or "" for p in (event.content.parts if event.content else []) or [])
+            lines.extend(text.splitlines()[1:])
+            continue
+        total += 1
+        if not event.content or not event.content.parts:
+            continue
+        for part in event.content.parts:
+            if part.text and not part.thought:
+                lines.append(f"[{event.author}] {_truncate(part.text, max_line_chars)}")
+            elif part.function_call:
+                args = _truncate(json.dumps(part.function_call.args or {}, default=str), max_line_chars)
+                lines.append(f"[{event.author}] called {part.function_call.name}({args})")
+            elif part.function_response:
+                lines.append(f"[{event.author}] received result from {part.function_response.name}")
+
+    kept, size = [], 0
+    for line in reversed(lines):
+        if size + len(line) > max_chars:
+            break
+        kept.append(line)
+        size += len(line) + 1
+    header = f"Summary of {total} earlier events (full history archived):"
+    if len(kept) < len(lines):
+        header += f" showing the last {len(kept)} of {len(lines)} entries."
+    return "\n".join([header] + list(reversed(kept)))
+
+
+class SessionCompactor:
+    """
+    Compacts sessions stored by a DatabaseSessionService.
+
+    Args:
+        session_service: The service whose engine and tables are compacted.
+        max_events: Sessions with more stored events than this are compacted.
+        keep_recent: Number of most recent events kept verbatim.
+        summarizer: Turns archived events into the summary text.
+    """
+
+    def __init__(
+        self,
+        session_service: DatabaseSessionService,
+        max_events: int = SESSION_COMPACT_MAX_EVENTS,
+        keep_recent: int = SESSION_COMPACT_KEEP_RECENT,
+        summarizer: Callable[[List[Event]], str] = summarize_events,
+    ):
+        self.session_service = session_service
+        self.max_events = max_events
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer
+        _ArchiveBase.metadata.create_all(session_service.db_engine)
+
+    def find_candidates(self) -> List[tuple]:
+        """Returns (app_name, user_id, session_id) of sessions over the event limit."""
+        with self.session_service.database_session_factory() as sql_session:
+            rows = sql_session.execute(
+                select(StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id)
+                .group_by(StorageEvent.app_name, StorageEvent.user_id, StorageEvent.session_id)
+                .having(func.count() > self.max_events)
+            ).all()
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def _split_index(events: List[Event], cut: int) -> int:
+        """
+        Returns the largest index <= `cut` at which no tool call before the
+        index is answered by a response after it.
+        """
+        pending = set()
+        boundary = 0
+        for i, event in enumerate(events[:cut]):
+            if not pending:
+                boundary = i
+            for call in event.get_function_calls():
+                pending.add(call.id or call.name)
+            for response in event.get_function_responses():
+                pending.discard(response.id or response.name)
+        return cut if not pending else boundary
+
+    def compact_session(self, app_name: str, user_id: str, session_id: str) -> Dict[str, int]:
+        """
+        Archives all but the most recent events of one session and replaces
+        them, together with any earlier summary, by a single summary event.
+        """
+        with self.session_service.database_session_factory() as sql_session:
+            storage_events = (
+                sql_session.query(StorageEvent)
+                .filter(StorageEvent.app_name == app_name)
+                .filter(StorageEvent.user_id == user_id)
+                .filter(StorageEvent.session_id == session_id)
+                .order_by(StorageEvent.timestamp.asc())
+                .all()
+            )
+            if len(storage_events) <= self.max_events:
+                return {"archived": 0, "kept": len(storage_events)}
+
+            events = [e.to_event() for e in storage_events]
+            cut = self._split_index(events, len(storage_events) - self.keep_recent)
+            old, old_events = storage_events[:cut], events[:cut]
+            if not any(e.author != SUMMARY_AUTHOR for e in old_events):
+                return {"archived": 0, "kept": len(storage_events)}
+            payload = json.dumps(
+                [e.model_dump(mode="json", by_alias=True, exclude_none=True) for e in old_events]
+            ).encode("utf-8")
+            sql_session.add(StorageEventArchive(
+                id=str(uuid.uuid4()),
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+                event_count=len(old),
+                first_timestamp=old[0].timestamp,
+                last_timestamp=old[-1].timestamp,
+                payload=zlib.compress(payload, level=6),
+            ))
+
+            sql_session.execute(
+                delete(StorageEvent).where(
+                    StorageEvent.app_name == app_name,
+                    StorageEvent.user_id == user_id,
+                    StorageEvent.session_id == session_id,
+                    StorageEvent.id.in_([e.id for e in old]),
+                )
+            )
+
+            summary = Event(
+                author=SUMMARY_AUTHOR,
+                invocation_id=old_events[-1].invocation_id,
+                timestamp=old_events[-1].timestamp,
+                content=types.Content(role="model", parts=[types.Part(text=self.summarizer(old_events))]),
+                custom_metadata={"compacted_events": sum(
+                    _compacted_count(e) if e.author == SUMMARY_AUTHOR else 1 for e in old_events
+                )},
+            )
+            owner = Session(app_name=app_name, user_id=user_id, id=session_id)
+            sql_session.add(StorageEvent.from_event(owner, summary))
+            sql_session.commit()
+        return {"archived": len(old), "kept": len(storage_events) - len(old)}
+
+    def compact_all(self) -> Dict[str, int]:
+        """Compacts every session over the event limit."""
+        totals = {"sessions": 0, "archived": 0}
+        for app_name, user_id, session_id in self.find_candidates():
+            result = self.compact_session(app_name, user_id, session_id)
+            if result["archived"]:
+                totals["sessions"] += 1
+                totals["archived"] += result["archived"]
+        return totals
+
+    def load_archived_events(self, app_name: str, user_id: str, session_id: str) -> List[Event]:
+        """Returns archived events of a session, oldest first."""
+        with self.session_service.database_session_factory() as sql_session:
+            archives = (
+                sql_session.query(StorageEventArchive)
+                .filter(StorageEventArchive.app_name == app_name)
+                .filter(StorageEventArchive.user_id == user_id)
+                .filter(StorageEventArchive.session_id == session_id)
+                .order_by(StorageEventArchive.first_timestamp.asc())
+                .all()
+            )
+            events = []
+            for archive in archives:
+                events.extend(Event.model_validate(e) for e in json.loads(zlib.decompress(archive.payload)))
+        return events
+
+    async def run_loop(self, interval: float = SESSION_COMPACT_INTERVAL_SECONDS) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                start = time.perf_counter()
+                totals = await asyncio.to_thread(self.compact_all)
+                if totals["sessions"]:
+                    print(
+                        f"Compacted {totals['sessions']} sessions, archived {totals['archived']} events "
+                        f"in {time.perf_counter() - start:.2f}s"
+                    )
+            except Exception as e:
+                print(f"Warning: session compaction failed: {e}")
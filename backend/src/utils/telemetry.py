@@ -0,0 +1,282 @@
+"""
+Latency, token and cache metrics plus OpenTelemetry spans for the hot paths.
+
+Enabled with TELEMETRY_ENABLED=true. When disabled, `instrument` returns the
+function unchanged, the `record_*` helpers return immediately and no ADK
+plugin is installed, so instrumented code runs as before.
+
+- `call_llm`/`acall_llm` are wrapped with `llm_call`, which opens an
+  `llm.call` span and records latency, status and token usage per model.
+- Tool functions are decorated with `instrument("tool")`.
+- Agent hops, model calls and any tool not decorated above are recorded by
+  the ADK plugin in telemetry_plugin.py, which main.py registers.
+- Caches, retries, hedges and queue waits are reported through
+  `record_cache`, `record_retry`, `record_hedge` and `record_queue_wait`.
+
+Metrics are kept in-process and served in the Prometheus text format at
+`/metrics` (see `build_metrics_router`). Spans go to the global
+OpenTelemetry tracer provider, so they are exported wherever the process's
+OpenTelemetry SDK is configured to send them (and dropped otherwise).
+"""
+import asyncio
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class _Metric:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, key)) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter(_Metric):
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            lines += [f"{self.name}{self._format_labels(k)} {v}" for k, v in sorted(self._values.items())]
+        return lines
+
+
+class Histogram(_Metric):
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = buckets
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts followed by the +Inf count and the sum.
+            counts = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, counts in sorted(self._values.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + (float("inf"),), counts[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {int(cumulative)}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {counts[-1]}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {int(cumulative)}")
+        return lines
+
+
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM request latency.", ("model", "agent"))
+LLM_REQUESTS = Counter("llm_requests_total", "LLM requests by outcome.", ("model", "agent", "status"))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by direction (input, output, cached).", ("model", "agent", "direction"))
+LLM_RETRIES = Counter("llm_retries_total", "LLM request retries and fallbacks.", ("model", "reason"))
+LLM_HEDGES = Counter("llm_hedges_total", "Hedged and failed-over LLM requests by outcome.", ("model", "outcome"))
+TOOL_LATENCY = Histogram("tool_duration_seconds", "Tool call latency.", ("tool",))
+TOOL_CALLS = Counter("tool_calls_total", "Tool calls by outcome.", ("tool", "status"))
+AGENT_LATENCY = Histogram("agent_duration_seconds", "Agent run latency, including sub-agents and tools.", ("agent",))
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by result.", ("cache", "result"))
+QUEUE_WAIT = Histogram("queue_wait_seconds", "Time spent waiting for a concurrency slot or batch.", ("queue",))
+
+METRICS = [LLM_LATENCY, LLM_REQUESTS, LLM_TOKENS, LLM_RETRIES, LLM_HEDGES, TOOL_LATENCY, TOOL_CALLS, AGENT_LATENCY, CACHE_REQUESTS, QUEUE_WAIT]
+
+_tracer = None
+
+
+def _get_tracer():
+    global _tracer
+    if _tracer is None:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("adk-agents-meetup")
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Opens an OpenTelemetry span when telemetry is enabled; yields the span or None."""
+    if not TELEMETRY_ENABLED:
+        yield None
+        return
+    with _get_tracer().start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        yield current
+
+
+def _usage_counts(usage: Any) -> Tuple[int, int, int]:
+    """(input, output, cached) tokens from an OpenAI-style usage object or dict."""
+    if usage is None:
+        return 0, 0, 0
+    get = usage.get if isinstance(usage, dict) else lambda k, d=None: getattr(usage, k, d)
+    details = get("prompt_tokens_details")
+    cached = 0
+    if details is not None:
+        cached = (details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)) or 0
+    return get("prompt_tokens", 0) or 0, get("completion_tokens", 0) or 0, cached
+
+
+def record_llm_call(model: str, duration: float, status: str = "ok", input_tokens: int = 0,
+                    output_tokens: int = 0, cached_tokens: int = 0, agent: str = "") -> None:
+    if not TELEMETRY_ENABLED:
+        return
+    LLM_LATENCY.observe(duration, model=model, agent=agent)
+    LLM_REQUESTS.inc(model=model, agent=agent, status=status)
+    for direction, count in (("input", input_tokens), ("output", output_tokens), ("cached", cached_tokens)):
+        if count:
+            LLM_TOKENS.inc(count, model=model, agent=agent, direction=direction)
+
+
+@contextmanager
+def llm_call(model: str, agent: str = "") -> Iterator[Callable[[Any], None]]:
+    """
+    Times one LLM request. Call the yielded function with the response so its
+    token usage is recorded; an exception is recorded with its type as status.
+    """
+    if not TELEMETRY_ENABLED:
+        yield lambda response: None
+        return
+    usage: List[Any] = []
+
+    def record(response: Any) -> None:
+        usage.append(response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None))
+
+    start = time.perf_counter()
+    with span("llm.call", model=model, agent=agent or None) as current:
+        try:
+            yield record
+        except BaseException as e:
+            record_llm_call(model, time.perf_counter() - start, status=type(e).__name__, agent=agent)
+            raise
+        input_tokens, output_tokens, cached_tokens = _usage_counts(usage[0] if usage else None)
+        if current is not None:
+            current.set_attribute("llm.input_tokens", input_tokens)
+            current.set_attribute("llm.output_tokens", output_tokens)
+            current.set_attribute("llm.cached_tokens", cached_tokens)
+        record_llm_call(model, time.perf_counter() - start, "ok", input_tokens, output_tokens, cached_tokens, agent)
+
+
+def record_retry(model: str, reason: str) -> None:
+    if TELEMETRY_ENABLED:
+        LLM_RETRIES.inc(model=model, reason=reason)
+
+
+def record_hedge(model: str, outcome: str) -> None:
+    if TELEMETRY_ENABLED:
+        LLM_HEDGES.inc(model=model, outcome=outcome)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    if TELEMETRY_ENABLED:
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_queue_wait(queue: str, seconds: float) -> None:
+    if TELEMETRY_ENABLED:
+        QUEUE_WAIT.observe(seconds, queue=queue)
+
+
+def record_tool_call(tool: str, duration: float, status: str) -> None:
+    if TELEMETRY_ENABLED:
+        TOOL_LATENCY.observe(duration, tool=tool)
+        TOOL_CALLS.inc(tool=tool, status=status)
+
+
+def tool_status(result: Any) -> str:
+    return "error" if isinstance(result, dict) and "error" in result else "ok"
+
+
+def instrument(kind: str = "tool", name: Optional[str] = None) -> Callable:
+    """
+    Decorator that times a sync or async tool function and wraps it in a span.
+    Returns the function unchanged when telemetry is disabled. Tools that
+    return a dict with an "error" key are counted with status "error".
+    """
+    def decorator(func: Callable) -> Callable:
+        if not TELEMETRY_ENABLED:
+            return func
+        label = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                status = "exception"
+                with span(f"{kind}.{label}"):
+                    try:
+                        result = await func(*args, **kwargs)
+                        status = tool_status(result)
+                        return result
+                    finally:
+                        record_tool_call(label, time.perf_counter() - start, status)
+            async_wrapper._telemetry_instrumented = True
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = "exception"
+            with span(f"{kind}.{label}"):
+                try:
+                    result = func(*args, **kwargs)
+                    status = tool_status(result)
+                    return result
+                finally:
+                    record_tool_call(label, time.perf_counter() - start, status)
+        wrapper._telemetry_instrumented = True
+        return wrapper
+
+    return decorator
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def build_metrics_router():
+    """FastAPI router serving the metrics in the Prometheus text format at /metrics."""
+    from fastapi import APIRouter
+    from fastapi.responses import PlainTextResponse
+
+    router = APIRouter()
+
+    @router.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        if not TELEMETRY_ENABLED:
+            return PlainTextResponse("# telemetry disabled; set TELEMETRY_ENABLED=true\n")
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+    return router
+
+
+def telemetry_plugins() -> List[str]:
+    """Qualified names of the ADK plugins to register, for get_fast_api_app(extra_plugins=...)."""
+    return ["src.utils.telemetry_plugin.TelemetryPlugin"] if TELEMETRY_ENABLED else []
@@ -0,0 +1,80 @@
+"""ADK plugin that feeds agent, model and tool timings into src.utils.telemetry."""
+import time
+from typing import Dict, Tuple
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+from src.utils.telemetry import AGENT_LATENCY, record_llm_call, record_tool_call, tool_status
+
+
+class TelemetryPlugin(BasePlugin):
+    """Records agent, model and tool metrics for every agent run by the ADK app."""
+
+    def __init__(self, name: str = "telemetry"):
+        super().__init__(name=name)
+        self._started: Dict[Tuple[str, ...], Tuple[float, str]] = {}
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        self._started[("agent", callback_context.invocation_id, agent.name)] = (time.perf_counter(), "")
+        return None
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        started = self._started.pop(("agent", callback_context.invocation_id, agent.name), None)
+        if started:
+            AGENT_LATENCY.observe(time.perf_counter() - started[0], agent=agent.name)
+        # An agent's own before_model_callback can answer in place of the model, in which
+        # case no after_model_callback runs for the start time recorded above it.
+        self._started.pop(("model", callback_context.invocation_id, agent.name), None)
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        self._started[key] = (time.perf_counter(), llm_request.model or "unknown")
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        started = self._started.pop(("model", callback_context.invocation_id, callback_context.agent_name), None)
+        if not started:
+            return None
+        usage = llm_response.usage_metadata
+        record_llm_call(
+            started[1],
+            time.perf_counter() - started[0],
+            status="error" if llm_response.error_code else "ok",
+            input_tokens=(usage.prompt_token_count or 0) if usage else 0,
+            output_tokens=(usage.candidates_token_count or 0) if usage else 0,
+            cached_tokens=(usage.cached_content_token_count or 0) if usage else 0,
+            agent=callback_context.agent_name,
+        )
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        started = self._started.pop(("model", callback_context.invocation_id, callback_context.agent_name), None)
+        if started:
+            record_llm_call(started[1], time.perf_counter() - started[0], status=type(error).__name__,
+                            agent=callback_context.agent_name)
+        return None
+
+    @staticmethod
+    def _self_recorded(tool) -> bool:
+        # Function tools decorated with telemetry.instrument record themselves.
+        return getattr(getattr(tool, "func", None), "_telemetry_instrumented", False)
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        if not self._self_recorded(tool):
+            self._started[("tool", tool_context.function_call_id)] = (time.perf_counter(), tool.name)
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        started = self._started.pop(("tool", tool_context.function_call_id), None)
+        if started:
+            record_tool_call(started[1], time.perf_counter() - started[0], tool_status(result))
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        started = self._started.pop(("tool", tool_context.function_call_id), None)
+        if started:
+            record_tool_call(started[1], time.perf_counter() - started[0], "exception")
+        return None
@@ -10,6 +10,7 @@ import importlib
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from recruitment_workflow import recruitment_workflow
+from background_jobs import follow_job, get_executor, session_owner
 
 
 st.set_page_config(page_title="LLM Chat Playground", page_icon="💬", layout="wide")
@@ -78,6 +79,52 @@ def load_and_run_workflow_module(workflow_name: str, module_name: str):
         st.exception(e)
 
 
+def recruitment_workflow_job(report, cv_text: str) -> dict:
+    return recruitment_workflow(cv_text, report=report)
+
+
+def render_recruitment_job(job):
+    """Renders the steps of a recruitment workflow job finished so far."""
+    if job.status == "error":
+        st.error(f"❌ {job.message}")
+        with st.expander("Details"):
+            st.code(job.error)
+        return
+    if job.status == "cancelled":
+        st.warning("Workflow cancelled.")
+        return
+    result = job.result if job.status == "done" else job.data
+
+    # Step 1: Domain classification
+    if "domain" in result:
+        st.markdown("### 📝 Step 1: Classify Domain/Technology")
+        st.success(f"**Identified Domain:** {result['domain']}")
+
+    # Step 2: Match requirements
+    if "matched" in result:
+        st.markdown("### 🎯 Step 2: Match Against Open Requirements")
+        if result["matched"]:
+            st.success(f"✅ Match Found → {result['matched_role']}")
+            st.info(f"**Match Reasoning:** {result['reasoning']}")
+        else:
+            st.success(f"✅ Closest Match Found → {result['matched_role']}")
+            st.info(f"**Match Reasoning:** {result['reasoning']}")
+
+    # Step 3: Email drafting (only if matched)
+    if "email" in result:
+        st.markdown("### 📧 Step 3: Email to Hiring Manager")
+        if result["email"]:
+            st.info(result["email"])
+        else:
+            st.warning("No email generated since no match was found.")
+
+    if job.status == "done":
+        # Final Output
+        st.markdown("---")
+        st.subheader("✅ Final Workflow Result")
+        st.json(result)
+
+
 # --- Sidebar: App Selection with Button Group and Contextual Sidebar ---
 with st.sidebar:
     if "app_tab" not in st.session_state:
@@ -105,7 +152,7 @@ with st.sidebar:
         # Reset session state if selection changes
         if prev_selected is not None and prev_selected != selected:
             for k in st.session_state.keys():
-                if k not in ("use_case_selector", "_prev_use_case_selector"):
+                if k not in ("use_case_selector", "_prev_use_case_selector", "job_owner"):
                     del st.session_state[k]
         st.session_state["_prev_use_case_selector"] = selected
 
@@ -139,7 +186,7 @@ with st.sidebar:
         # Reset session state if selection changes
         if prev_selected_workflow is not None and prev_selected_workflow != selected_workflow:
             for k in st.session_state.keys():
-                if k not in ("workflow_selector", "_prev_workflow_selector", "app_tab"):
+                if k not in ("workflow_selector", "_prev_workflow_selector", "app_tab", "job_owner"):
                     del st.session_state[k]
         st.session_state["_prev_workflow_selector"] = selected_workflow
 
@@ -198,33 +245,12 @@ elif app_tab == "Workflow Execution Demo":
             if not cv_text.strip():
                 st.warning("Please provide some resume text.")
             else:
-                with st.spinner("Running recruitment workflow..."):
-                    result = recruitment_workflow(cv_text)
-
-                # Step 1: Domain classification
-                st.markdown("### 📝 Step 1: Classify Domain/Technology")
-                st.success(f"**Identified Domain:** {result['domain']}")
-
-                # Step 2: Match requirements
-                st.markdown("### 🎯 Step 2: Match Against Open Requirements")
-                if result["matched"]:
-                    st.success(f"✅ Match Found → {result['matched_role']}")
-                    st.info(f"**Match Reasoning:** {result['reasoning']}")
-                else:
-                    st.success(f"✅ Closest Match Found → {result['matched_role']}")
-                    st.info(f"**Match Reasoning:** {result['reasoning']}")
-
-                # Step 3: Email drafting (only if matched)
-                st.markdown("### 📧 Step 3: Email to Hiring Manager")
-                if result["email"]:
-                    st.info(result["email"])
-                else:
-                    st.warning("No email generated since no match was found.")
-
-                # Final Output
-                st.markdown("---")
-                st.subheader("✅ Final Workflow Result")
-                st.json(result)
+                # Runs in the shared background executor; the job ID survives reruns
+                st.session_state["recruitment_job"] = get_executor().submit(
+                    session_owner(), "Recruitment workflow", recruitment_workflow_job, cv_text
+                )
+
+        follow_job(st.session_state.get("recruitment_job"), render_recruitment_job)
                 
     elif selected_workflow == "LLM-Based Routing":
         # Load and run the LLM routing module
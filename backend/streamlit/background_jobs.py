@@ -0,0 +1,263 @@
+"""
+Background execution of long workflows for the Streamlit pages.
+
+A script run that calls a workflow directly blocks that session until the
+workflow finishes, and a rerun (any widget click) abandons it. Instead,
+pages submit the workflow to a JobExecutor shared by all sessions through
+st.cache_resource and keep only the job ID in st.session_state. The job
+runs on a worker thread (the workflows wait on LLM and search calls, so
+threads are enough), reports progress through a callback, and its result
+stays in the executor until JOB_RETENTION_SECONDS after it finishes, so a
+rerun or a reconnect picks it up again.
+
+Fairness: each session runs at most STREAMLIT_JOBS_PER_SESSION jobs at a
+time, and when a worker frees up the next job comes from the session with
+the fewest running jobs (the least recently served among equals), so one user queueing
+many jobs does not starve the rest.
+
+    executor = get_executor()
+    job_id = executor.submit(session_owner(), "report", run_report, query)
+    job = executor.get(job_id)   # job.status, job.progress, job.message, job.result
+
+Job functions take a `report(progress, message=None, **data)` callback as
+their first argument. Calling it records progress, merges `data` into
+`job.data` for the page to render, and raises JobCancelled once the job
+has been cancelled.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+STREAMLIT_JOB_WORKERS = int(os.getenv("STREAMLIT_JOB_WORKERS", "8"))
+STREAMLIT_JOBS_PER_SESSION = int(os.getenv("STREAMLIT_JOBS_PER_SESSION", "2"))
+JOB_RETENTION_SECONDS = float(os.getenv("STREAMLIT_JOB_RETENTION_SECONDS", "3600"))
+JOB_POLL_SECONDS = float(os.getenv("STREAMLIT_JOB_POLL_SECONDS", "1"))
+
+FINISHED = ("done", "error", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by its progress callback once the job is cancelled."""
+
+
+@dataclass
+class Job:
+    id: str
+    owner: str
+    name: str
+    status: str = "queued"
+    progress: float = 0.0
+    message: str = "Queued"
+    data: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+
+class JobExecutor:
+    """Thread pool that runs submitted jobs fairly across sessions and keeps their state and results."""
+
+    def __init__(self, workers: int = STREAMLIT_JOB_WORKERS, per_owner: int = STREAMLIT_JOBS_PER_SESSION):
+        self.workers = workers
+        self.per_owner = per_owner
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="streamlit-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._calls: Dict[str, tuple] = {}
+        self._cancelled: set = set()
+        self._queues: Dict[str, Deque[str]] = {}
+        self._running: Dict[str, int] = {}
+        # owner -> when it last had a job started, for least-recently-served ordering.
+        self._served: Dict[str, int] = {}
+        self._ticket = itertools.count()
+
+    def submit(self, owner: str, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> str:
+        """
+        Queues `fn(report, *args, **kwargs)` as a job.
+
+        Args:
+            owner: Session the job belongs to; the unit of fairness.
+            name: Label for the job, shown in job lists.
+            fn: The workflow; receives the progress callback first.
+
+        Returns:
+            The job ID.
+        """
+        job = Job(id=uuid.uuid4().hex[:12], owner=owner, name=name)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._calls[job.id] = (fn, args, kwargs)
+            self._queues.setdefault(owner, deque()).append(job.id)
+        self._dispatch()
+        return job.id
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        """A snapshot of the job, or None if it is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job, data=dict(job.data)) if job else None
+
+    def jobs(self, owner: str) -> List[Job]:
+        with self._lock:
+            return [replace(job, data=dict(job.data)) for job in self._jobs.values() if job.owner == owner]
+
+    def cancel(self, job_id: str) -> None:
+        """Cancels a queued job at once and a running one at its next progress report."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return
+            queue = self._queues.get(job.owner)
+            if queue is not None and job_id in queue:
+                queue.remove(job_id)
+                self._calls.pop(job_id, None)
+                self._finish(job, "cancelled", message="Cancelled")
+            else:
+                self._cancelled.add(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                "workers": self.workers,
+                "per_session": self.per_owner,
+                "sessions": len({job.owner for job in self._jobs.values()}),
+                **{status: statuses.count(status) for status in ("queued", "running", *FINISHED)},
+            }
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            while sum(self._running.values()) < self.workers:
+                job_id = self._next_job()
+                if job_id is None:
+                    return
+                job = self._jobs[job_id]
+                job.status, job.message, job.started = "running", "Started", time.time()
+                self._running[job.owner] = self._running.get(job.owner, 0) + 1
+                self._pool.submit(self._run, job_id)
+
+    def _next_job(self) -> Optional[str]:
+        for owner in [owner for owner, queue in self._queues.items() if not queue]:
+            del self._queues[owner]
+        ready = [owner for owner in self._queues if self._running.get(owner, 0) < self.per_owner]
+        if not ready:
+            return None
+        # The session with the fewest running jobs goes first, then the one served least recently.
+        owner = min(ready, key=lambda o: (self._running.get(o, 0), self._served.get(o, -1)))
+        self._served[owner] = next(self._ticket)
+        return self._queues[owner].popleft()
+
+    def _report(self, job_id: str) -> Callable[..., None]:
+        def report(progress: float, message: Optional[str] = None, **data: Any) -> None:
+            with self._lock:
+                if job_id in self._cancelled:
+                    raise JobCancelled(job_id)
+                job = self._jobs[job_id]
+                job.progress = max(0.0, min(1.0, progress))
+                if message is not None:
+                    job.message = message
+                job.data.update(data)
+        return report
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            fn, args, kwargs = self._calls.pop(job_id)
+        try:
+            result = fn(self._report(job_id), *args, **kwargs)
+        except JobCancelled:
+            self._complete(job_id, "cancelled", message="Cancelled")
+        except Exception as e:
+            logger.warning("Job %s failed: %s", job_id, e)
+            self._complete(job_id, "error", message=f"Failed: {e}", error=traceback.format_exc())
+        else:
+            self._complete(job_id, "done", message="Done", result=result)
+        self._dispatch()
+
+    def _complete(self, job_id: str, status: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            self._running[job.owner] -= 1
+            if not self._running[job.owner]:
+                del self._running[job.owner]
+            self._cancelled.discard(job_id)
+            self._finish(job, status, **fields)
+
+    @staticmethod
+    def _finish(job: Job, status: str, **fields: Any) -> None:
+        job.status, job.finished = status, time.time()
+        if status == "done":
+            job.progress = 1.0
+        for name, value in fields.items():
+            setattr(job, name, value)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [job.id for job in self._jobs.values() if job.done and job.finished < cutoff]:
+            del self._jobs[job_id]
+        owners = {job.owner for job in self._jobs.values()}
+        for owner in [owner for owner in self._served if owner not in owners]:
+            del self._served[owner]
+
+
+@st.cache_resource
+def get_executor() -> JobExecutor:
+    """The process-wide JobExecutor, shared by all Streamlit sessions."""
+    return JobExecutor()
+
+
+def session_owner() -> str:
+    """A stable ID for the current Streamlit session, kept in st.session_state."""
+    if "job_owner" not in st.session_state:
+        st.session_state["job_owner"] = uuid.uuid4().hex
+    return st.session_state["job_owner"]
+
+
+def follow_job(job_id: Optional[str], render: Callable[[Job], None]) -> Optional[Job]:
+    """
+    Renders a job with `render(job)`. While the job is unfinished it is
+    re-rendered every JOB_POLL_SECONDS in a fragment, with a progress bar and
+    a cancel button, without rerunning the rest of the page; once it finishes
+    the page reruns to show the final state.
+
+    Returns:
+        The job as first rendered, or None if there is no such job.
+    """
+    job = get_executor().get(job_id)
+    if job is None or job.done:
+        if job is not None:
+            render(job)
+        return job
+
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def poll():
+        current = get_executor().get(job_id)
+        if current is None or current.done:
+            st.rerun()
+        render(current)
+        st.progress(current.progress, text=current.message)
+        waited = time.time() - (current.started or current.created)
+        st.caption(f"Job {current.id} · {current.status} · {waited:.0f}s")
+        if st.button("Cancel", key=f"cancel-{job_id}"):
+            get_executor().cancel(job_id)
+
+    poll()
+    return job
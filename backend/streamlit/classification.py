@@ -2,10 +2,15 @@
 
 
 import streamlit as st
-from src.utils.llm import call_llm
+from src.utils.llm import classify
 from chatgpt_ui import render_chatgpt_ui
 from llm_retry_utils import llm_handle_send_with_retry, llm_handle_retry
 
+RESUME_CATEGORIES = [
+	"Human Resources", "Marketing", "Communications", "Technology", "Finance",
+	"Operations", "Sales", "Customer Service", "Management", "Other",
+]
+
 def main():
 	st.title("Resume Classification with LLM")
 	if "messages" not in st.session_state:
@@ -17,16 +22,15 @@ def main():
 
 	def handle_send(user_input):
 		def llm_call(messages):
-			prompt = [
-				{"role": "system", "content": (
-					"Classify the following resume into one of these categories: "
-					"Human Resources, Marketing, Communications, Technology, Finance, Operations, Sales, Customer Service, Management, Other. "
-					"Respond with only the category label."
-				)},
-				{"role": "user", "content": user_input}
-			]
-			response = call_llm(prompt)
-			label = response.choices[0].message.content
+			result = classify(
+				user_input,
+				RESUME_CATEGORIES,
+				instructions="Classify the following resume into one of these categories.",
+				default="Other",
+			)
+			label = result["label"]
+			if result["confidence"] is not None:
+				label += f" (confidence {result['confidence']:.0%})"
 			# Overwrite the last user message with the prompt for retry
 			if messages and messages[-1]["role"] == "user":
 				messages[-1]["content"] = user_input
@@ -1,5 +1,5 @@
 import streamlit as st
-from src.utils.llm import call_llm
+from src.utils.llm import call_llm, classify
 from chatgpt_ui import render_chatgpt_ui
 from llm_retry_utils import llm_handle_send_with_retry, llm_handle_retry
 
@@ -38,6 +38,9 @@ ROUTING_CATEGORIES = {
     }
 }
 
+# Below this confidence a classification is routed to general_question
+ROUTING_MIN_CONFIDENCE = 0.5
+
 
 def classify_user_input(user_input: str) -> str:
     """
@@ -48,26 +51,24 @@ def classify_user_input(user_input: str) -> str:
         for key, info in ROUTING_CATEGORIES.items()
     ])
     
-    prompt = [
-        {"role": "system", "content": f"""
+    result = classify(
+        user_input,
+        list(ROUTING_CATEGORIES),
+        instructions=f"""
 You are a routing classifier. Analyze the user input and classify it into ONE of these categories:
 
 {categories_list}
 
-Respond with ONLY the category key (e.g., 'general_question', 'refund_request', etc.).
-If the input doesn't clearly fit any category, use 'general_question' as default.
-"""},
-        {"role": "user", "content": user_input}
-    ]
-    
-    response = call_llm(prompt)
-    classification = response.choices[0].message.content.strip().lower()
+If the input doesn't clearly fit any category, use 'general_question'.
+""",
+        default="general_question",
+    )
     
-    # Validate classification is in our categories
-    if classification not in ROUTING_CATEGORIES:
-        classification = "general_question"
+    # Unsure classifications go to the general handler
+    if result["confidence"] is not None and result["confidence"] < ROUTING_MIN_CONFIDENCE:
+        return "general_question"
     
-    return classification
+    return result["label"]
 
 
 def process_routed_request(user_input: str, category: str) -> str:
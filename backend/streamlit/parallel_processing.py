@@ -2,12 +2,16 @@
 Student-Friendly Parallel Research with LLM-generated Report
 """
 
-from typing import TypedDict, List, Annotated
+from typing import TypedDict, List, Annotated, Dict, Iterator, Optional, Tuple
+from functools import lru_cache
+import uuid
+from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import StateGraph, START, END
 from langgraph.types import Send
 import operator
 from src.utils.llm import call_llm
 from src.tools.serper_search import serper_search
+from src.utils.graph_render import render_graph, to_dot
 
 # ---- STATE ----
 class ResearchState(TypedDict):
@@ -77,7 +81,7 @@ def aggregate(state: ResearchState) -> ResearchState:
     return {"report_md": resp.choices[0].message.content.strip()}
 
 # ---- GRAPH BUILDER ----
-def build_graph():
+def build_graph(checkpointer=None):
     g = StateGraph(ResearchState)
     g.add_node("plan_queries", plan_queries)
     g.add_node("research_worker", research_worker)
@@ -93,19 +97,106 @@ def build_graph():
     g.add_edge("research_worker", "aggregate")
     g.add_edge("aggregate", END)
 
-    return g.compile()
+    return g.compile(checkpointer=checkpointer)
+
+@lru_cache(maxsize=1)
+def get_graph():
+    """The compiled graph, built once per process and shared by all runs."""
+    return build_graph(checkpointer=InMemorySaver())
 
 # ---- RUNNER ----
-def run(user_query: str) -> str:
-    graph = build_graph()
+def stream_research(user_query: str, thread_id: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Runs the workflow once, yielding (node, state update) as each node
+    finishes: plan_queries, then research_worker once per query as the
+    parallel searches complete, then aggregate. The last item is
+    (END, final state), read from the run's checkpoint.
+    """
+    graph = get_graph()
+    config = {"configurable": {"thread_id": thread_id or uuid.uuid4().hex}}
     init = {"user_query": user_query, "sub_queries": [], "notes": [], "report_md": ""}
-    final = graph.invoke(init)
-    return final["report_md"]
+    try:
+        for chunk in graph.stream(init, config, stream_mode="updates"):
+            for node, update in chunk.items():
+                yield node, update or {}
+        yield END, graph.get_state(config).values
+    finally:
+        # Finished runs are not resumed; drop their checkpoints so memory stays flat
+        graph.checkpointer.delete_thread(config["configurable"]["thread_id"])
+
+def run(user_query: str) -> str:
+    for node, state in stream_research(user_query):
+        if node == END:
+            return state["report_md"]
+
+# ---- BACKGROUND JOB ----
+def research_job(report, user_query: str) -> dict:
+    """Runs the research workflow as a background job (see background_jobs.py), reporting each node."""
+    report(0.05, "Breaking down your question into focused search queries...", user_query=user_query)
+    queries, notes = [], []
+    for node, update in stream_research(user_query):
+        if node == "plan_queries":
+            queries = update["sub_queries"]
+            report(0.2, "Executing searches in parallel...", queries=queries, notes=[])
+        elif node == "research_worker":
+            notes = notes + update["notes"]
+            done = len(notes) == len(queries)
+            report(0.2 + 0.7 * len(notes) / max(1, len(queries)),
+                   "Synthesizing findings into a comprehensive report..." if done else f"Searched {len(notes)} of {len(queries)} queries...",
+                   notes=notes)
+        elif node == END:
+            return {"user_query": user_query, "queries": queries, "notes": update["notes"], "report_md": update["report_md"]}
+
 
 # ---- STREAMLIT INTERFACE ----
+def render_research_job(job):
+    """Renders the steps of a research job finished so far."""
+    import streamlit as st
+
+    if job.status == "error":
+        st.error(f"❌ Error generating report: {job.message}")
+        with st.expander("Details"):
+            st.code(job.error)
+        return
+    if job.status == "cancelled":
+        st.warning("Research cancelled.")
+        return
+    result = job.result if job.status == "done" else job.data
+
+    if "queries" in result:
+        st.markdown("### 🔍 Step 1: Query Planning")
+        st.success(f"✅ Generated {len(result['queries'])} search queries:")
+        for i, query in enumerate(result["queries"], 1):
+            st.write(f"{i}. {query}")
+
+    if result.get("notes") or "report_md" in result:
+        st.markdown("### 🌐 Step 2: Parallel Web Searches")
+        # Columns for parallel execution visualization, max 3 for readability
+        cols = st.columns(max(1, min(len(result["notes"]), 3)))
+        for i, note in enumerate(result["notes"]):
+            with cols[i % len(cols)]:
+                st.markdown(f"**Query {i+1} Results:**")
+                st.markdown(note)
+        if len(result["notes"]) == len(result["queries"]):
+            st.success("✅ All searches completed!")
+
+    if "report_md" in result:
+        st.markdown("### 📊 Final Research Report")
+        st.markdown(result["report_md"])
+        
+        # Download option
+        st.download_button(
+            label="📥 Download Report as Markdown",
+            data=result["report_md"],
+            file_name=f"research_report_{result['user_query'][:30].replace(' ', '_')}.md",
+            mime="text/markdown"
+        )
+
+
 def main():
     """Streamlit interface for parallel research workflow."""
     import streamlit as st
+    from background_jobs import follow_job, get_executor, session_owner
     
     st.title("🔍 Parallel Research with LangGraph")
     st.write("Enter a research question to generate a comprehensive report using parallel web searches.")
@@ -113,9 +204,15 @@ def main():
     # Show workflow graph visualization
     if st.checkbox("📊 Show Workflow Graph", value=True):
         try:
-            graph = build_graph()
-            mermaid_png = graph.get_graph().draw_mermaid_png()
-            st.image(mermaid_png, caption="LangGraph Workflow Visualization", width=200)
+            # Rendered locally and cached by graph structure; draw_mermaid_png calls a web service
+            drawable = get_graph().get_graph()
+            graph_png = render_graph(drawable, "png")
+            if graph_png:
+                st.image(graph_png, caption="LangGraph Workflow Visualization", width=200)
+            else:
+                # No Graphviz binary on the server: Streamlit renders the DOT source in the browser
+                st.graphviz_chart(to_dot(drawable))
+                st.caption("LangGraph Workflow Visualization")
             
             # Add explanation of parallel execution
             st.info("""
@@ -140,74 +237,12 @@ def main():
         if not user_query.strip():
             st.warning("Please enter a research question.")
             return
-            
-        try:
-            # Create containers for step-by-step visualization
-            step1_container = st.container()
-            step2_container = st.container()
-            step3_container = st.container()
-            step4_container = st.container()
-            
-            with step1_container:
-                st.markdown("### 🔍 Step 1: Query Planning")
-                with st.spinner("Breaking down your question into focused search queries..."):
-                    # Execute just the planning step
-                    graph = build_graph()
-                    init_state = {"user_query": user_query, "sub_queries": [], "notes": [], "report_md": ""}
-                    
-                    # Get planned queries
-                    planned_state = plan_queries(init_state)
-                    queries = planned_state["sub_queries"]
-                    
-                    st.success(f"✅ Generated {len(queries)} search queries:")
-                    for i, query in enumerate(queries, 1):
-                        st.write(f"{i}. {query}")
-            
-            with step2_container:
-                st.markdown("### 🌐 Step 2: Parallel Web Searches")
-                st.info("🔄 Executing searches in parallel...")
-                
-                # Create columns for parallel execution visualization
-                cols = st.columns(min(len(queries), 3))  # Max 3 columns for readability
-                
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                # Execute the full workflow but capture intermediate states
-                final_state = graph.invoke(init_state)
-                
-                # Show the parallel execution results
-                notes = final_state["notes"]
-                for i, note in enumerate(notes):
-                    col_idx = i % len(cols)
-                    with cols[col_idx]:
-                        st.markdown(f"**Query {i+1} Results:**")
-                        st.markdown(note)
-                
-                progress_bar.progress(1.0)
-                status_text.success("✅ All searches completed!")
-            
-            with step3_container:
-                st.markdown("### 📝 Step 3: Report Generation")
-                with st.spinner("Synthesizing findings into a comprehensive report..."):
-                    report = final_state["report_md"]
-                    st.success("✅ Research report generated!")
-            
-            with step4_container:
-                st.markdown("### 📊 Final Research Report")
-                st.markdown(report)
-                
-                # Download option
-                st.download_button(
-                    label="📥 Download Report as Markdown",
-                    data=report,
-                    file_name=f"research_report_{user_query[:30].replace(' ', '_')}.md",
-                    mime="text/markdown"
-                )
-                
-        except Exception as e:
-            st.error(f"❌ Error generating report: {str(e)}")
-            st.exception(e)
+        # Runs in the shared background executor so reruns don't interrupt it
+        st.session_state["research_job"] = get_executor().submit(
+            session_owner(), f"Research: {user_query[:40]}", research_job, user_query
+        )
+
+    follow_job(st.session_state.get("research_job"), render_research_job)
 
 if __name__ == "__main__":
     print(run("Impact of renewable energy on global economy 2025"))
\ No newline at end of file
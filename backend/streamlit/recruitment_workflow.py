@@ -1,19 +1,20 @@
 import re
-from src.utils.llm import call_llm
+from src.utils.llm import call_llm, classify
+
+DOMAIN_LABELS = [
+    "Python", "Data Science", "Frontend", "Backend", "Cloud", "DevOps", "HR", "Project Manager",
+    "Business Analyst", "Business Development", "Marketing", "Sales", "Finance", "Legal", "Other",
+]
 
 def classify_domain(cv_text: str) -> str:
     """Classify the main technology/domain of a CV using LLM."""
-    prompt = [
-        {"role": "system", "content": (
-            "You are an expert recruiter. "
-            "Read the CV and classify the **main technology/domain** into one label "
-            "(e.g., Python, Data Science, Frontend, Backend, Cloud, DevOps, HR, Project Manager, Business Analyst, Business Development, Marketing, Sales, Finance, Legal, etc.). "
-            "Respond with only the label."
-        )},
-        {"role": "user", "content": cv_text}
-    ]
-    response = call_llm(prompt)
-    return response.choices[0].message.content.strip()
+    result = classify(
+        cv_text,
+        DOMAIN_LABELS,
+        instructions="You are an expert recruiter. Read the CV and classify the **main technology/domain** into one label.",
+        default="Other",
+    )
+    return result["label"]
 
 def match_requirements(domain: str, open_requirements=None) -> tuple[bool, str]:
     """
@@ -64,26 +65,35 @@ def send_email(email_address: str, email_text: str) -> str:
     print(f"Sending email to {email_address} with text: {email_text}")
     return "Email sent successfully"
 
-def recruitment_workflow(cv_text: str) -> dict:
-    """Run the recruitment workflow step by step with real LLM calls."""
+def recruitment_workflow(cv_text: str, report=None) -> dict:
+    """
+    Run the recruitment workflow step by step with real LLM calls.
+    When given, `report(progress, message, **steps)` is called before each
+    step with the results so far (see background_jobs.py).
+    """
     steps = {}
+    report = report or (lambda progress, message=None, **data: None)
 
     # Step 1: classify
+    report(0.0, "Classifying domain")
     domain = classify_domain(cv_text)
     steps["domain"] = domain
 
     # Step 2: check match
+    report(0.25, "Matching against open requirements", domain=domain)
     matched, matched_role, reasoning = match_requirements(domain)
     steps["matched"] = matched
     steps["matched_role"] = matched_role
     steps["reasoning"] = reasoning
 
     # Step 3: email draft
+    report(0.5, "Drafting email", matched=matched, matched_role=matched_role, reasoning=reasoning)
     email = write_email(cv_text, domain, matched_role, reasoning)
     steps["email"] = email
     
     email_address = "hiring-manager@example.com"
     # Step 4: send email
+    report(0.9, "Sending email", email=email)
     send_email(email_address, email)
     steps["email_sent"] = True
 
@@ -0,0 +1,95 @@
+"""Ranged reads of artifacts: Range header parsing, blob slicing and the download route."""
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.utils import artifacts_service
+from src.utils.artifacts_service import ContentAddressedArtifactService, _parse_range, build_artifact_router
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("items=0-1", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 10239)),
+    ("bytes=-100", (10140, 10239)),
+    ("bytes=-20000", (0, 10239)),
+    ("bytes=10000-20000", (10000, 10239)),
+    ("bytes=0-9, 20-29", (0, 9)),
+    ("bytes=10240-", (10240, 10239)),
+    ("bytes=-0", (10240, 10239)),
+    ("bytes=9-0", None),
+    ("bytes=a-b", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, len(DATA)) == expected
+
+
+@pytest.fixture
+def service(tmp_path):
+    return ContentAddressedArtifactService(root_dir=str(tmp_path), compress=True)
+
+
+@pytest.mark.parametrize("mime_type", ["text/plain", "application/octet-stream"])
+@pytest.mark.parametrize("start, end", [(0, None), (0, 0), (5, 4999), (10000, 10239), (3000, 99999)])
+def test_iter_blob_slices(service, mime_type, start, end):
+    digest, size = service.put_stream(io.BytesIO(DATA), mime_type)
+    assert size == len(DATA)
+    expected = DATA[start:] if end is None else DATA[start:end + 1]
+    assert b"".join(service.iter_blob(digest, start, end)) == expected
+
+
+def test_iter_blob_bounds_chunks_of_compressed_blob(service, monkeypatch):
+    monkeypatch.setattr(artifacts_service, "_CHUNK_BYTES", 1024)
+    data = b"a" * 100_000
+    digest, _ = service.put_stream(io.BytesIO(data), "text/plain")
+    chunks = list(service.iter_blob(digest, 50_000, None))
+    assert b"".join(chunks) == data[50_000:]
+    assert max(len(chunk) for chunk in chunks) <= 1024
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    monkeypatch.setattr(artifacts_service, "_artifact_service", service)
+    service.save_file(app_name="app", user_id="u", session_id="s", filename="data.txt",
+                      stream=io.BytesIO(DATA), mime_type="text/plain")
+    app = FastAPI()
+    app.include_router(build_artifact_router())
+    return TestClient(app)
+
+
+def test_download_without_range(client):
+    response = client.get("/artifacts/app/u/s/data.txt")
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.content == DATA
+
+
+def test_download_range(client):
+    response = client.get("/artifacts/app/u/s/data.txt", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+    assert response.headers["content-length"] == "100"
+    assert response.content == DATA[100:200]
+
+
+def test_download_suffix_range(client):
+    response = client.get("/artifacts/app/u/s/data.txt", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == DATA[-10:]
+
+
+def test_download_unsatisfiable_range(client):
+    response = client.get("/artifacts/app/u/s/data.txt", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_download_missing_artifact(client):
+    assert client.get("/artifacts/app/u/s/missing.txt").status_code == 404
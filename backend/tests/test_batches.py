@@ -0,0 +1,124 @@
+"""Round trips of job application records through record batches, Arrow and Parquet."""
+import pytest
+
+from src.agents.job_application.batches import (
+    CVProfileBatch,
+    EducationBatch,
+    JobPostingBatch,
+    WorkExperienceBatch,
+)
+from src.agents.job_application.models import (
+    Certification,
+    CVScreenerOutput,
+    Education,
+    JobPosting,
+    LanguageProficiency,
+    Project,
+    WorkExperience,
+)
+
+
+def _work(**overrides):
+    values = dict(job_title="Data Engineer", company="Acme", location="Berlin", start_date="2020-01",
+                  end_date="present", description="Built pipelines")
+    return WorkExperience(**{**values, **overrides})
+
+
+def _education(**overrides):
+    values = dict(degree="MSc Computer Science", institution="TU Berlin", location="Berlin",
+                  start_date="2016", end_date="2018", grade="1.3")
+    return Education(**{**values, **overrides})
+
+
+def _cv(**overrides):
+    values = dict(
+        full_name="Jane Doe", email="jane@example.com", phone=None, linkedin=None, github="janedoe",
+        website=None, address="Berlin", professional_summary="Engineer.",
+        skills=["python", "sql"],
+        work_experience=[_work(), _work(company="Initech", location=None, end_date=None, description=None)],
+        education=[_education()],
+        certifications=[Certification(name="CKA", issuer=None, issue_date="2021", expiry_date=None,
+                                      credential_id=None, credential_url=None)],
+        projects=[Project(name="etl", description="ETL tool", technologies=[], link=None)],
+        languages=[LanguageProficiency(language="German", proficiency="Native")],
+        total_experience_years=5.5, preferred_roles=["Data Engineer"], preferred_locations=[],
+        availability=None,
+    )
+    return CVScreenerOutput(**{**values, **overrides})
+
+
+def _posting(**overrides):
+    values = dict(job_title="Backend Engineer", company="Globex", location="Remote",
+                  job_description="Build APIs", requirements=["python", "postgres"],
+                  application_link="https://example.com/jobs/1", posted_date=None, employment_type="Full-time")
+    return JobPosting(**{**values, **overrides})
+
+
+CASES = [
+    (CVProfileBatch, [
+        _cv(),
+        # Empty lists and None for every optional field.
+        _cv(email=None, github=None, address=None, professional_summary=None, skills=[], work_experience=[],
+            education=[], certifications=None, projects=None, languages=None, total_experience_years=None,
+            preferred_roles=None, preferred_locations=None),
+        _cv(certifications=[], projects=[], languages=[], preferred_roles=[]),
+    ]),
+    (JobPostingBatch, [
+        _posting(),
+        _posting(location=None, requirements=[], application_link=None, employment_type=None),
+    ]),
+    (WorkExperienceBatch, [
+        _work(),
+        _work(location=None, start_date=None, end_date=None, description=None),
+    ]),
+    (EducationBatch, [
+        _education(),
+        _education(location=None, start_date=None, end_date=None, grade=None),
+    ]),
+]
+IDS = [batch.__name__ for batch, _ in CASES]
+
+
+@pytest.mark.parametrize("batch_type, records", CASES, ids=IDS)
+def test_models_round_trip(batch_type, records):
+    batch = batch_type.from_models(records)
+
+    assert len(batch) == len(records)
+    assert batch.to_models() == records
+
+
+@pytest.mark.parametrize("batch_type, records", CASES, ids=IDS)
+def test_arrow_round_trip(batch_type, records):
+    table = batch_type.from_models(records).to_arrow()
+
+    assert table.num_rows == len(records)
+    assert batch_type.from_arrow(table).to_models() == records
+
+
+@pytest.mark.parametrize("batch_type, records", CASES, ids=IDS)
+def test_parquet_round_trip(batch_type, records, tmp_path):
+    path = str(tmp_path / "records.parquet")
+    batch_type.from_models(records).to_parquet(path)
+
+    restored = batch_type.from_parquet(path).to_models()
+
+    assert restored == records
+    assert [r.model_dump() for r in restored] == [r.model_dump() for r in records]
+
+
+def test_nested_models_are_rebuilt():
+    restored = CVProfileBatch.from_models([_cv()]).to_models()[0]
+
+    assert isinstance(restored.work_experience[0], WorkExperience)
+    assert isinstance(restored.education[0], Education)
+    assert restored.work_experience[1].end_date is None
+    assert restored.certifications[0].issuer is None
+
+
+def test_take_and_filter_keep_records():
+    records = [_posting(job_title=f"Role {i}", location="Remote" if i % 2 else "Berlin") for i in range(6)]
+    batch = JobPostingBatch.from_models(records)
+
+    assert batch.take([4, 1]).to_models() == [records[4], records[1]]
+    remote = batch.filter([r.location == "Remote" for r in records])
+    assert remote.to_models() == [r for r in records if r.location == "Remote"]
@@ -0,0 +1,80 @@
+"""Cassette matching keys, recording order on replay and truncated cassettes."""
+import gzip
+
+import pytest
+
+from src.utils import cassette
+from src.utils.cassette import CassetteMiss, call, read_entries, replay_scope, request_key, use_cassette
+
+REQUEST = {"model": "openai/gpt-4o", "messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+
+
+def test_request_key_ignores_secrets_volatile_ids_and_key_order():
+    noisy = {
+        "temperature": 0, "api_key": "sk-1", "api_base": "https://proxy", "metadata": {"run": 1}, "stop": None,
+        "messages": [{"content": "hi", "role": "user", "id": "msg_123"}], "model": "openai/gpt-4o",
+        "extra_headers": {"Authorization": "Bearer x"},
+    }
+    assert request_key("litellm", noisy) == request_key("litellm", {**REQUEST, "extra_headers": {}})
+
+
+def test_request_key_depends_on_kind_and_content():
+    assert request_key("litellm", REQUEST) != request_key("http", REQUEST)
+    assert request_key("litellm", REQUEST) != request_key("litellm", {**REQUEST, "temperature": 1})
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    for name in ("_cassette", "CASSETTE_MODE", "CASSETTE_PATH", "CASSETTE_LATENCY_SCALE", "CASSETTE_PASSTHROUGH"):
+        monkeypatch.setattr(cassette, name, getattr(cassette, name))
+    yield str(tmp_path / "session.jsonl.gz")
+    if cassette._cassette is not None:
+        cassette._cassette.close()
+
+
+def _record(path, answers):
+    use_cassette(path, "record")
+    for answer in answers:
+        call("litellm", REQUEST, lambda: answer, dump=lambda r: r, load=lambda r: r)
+    cassette._cassette.close()
+
+
+def _replay(live=lambda: "live"):
+    return call("litellm", REQUEST, live, dump=lambda r: r, load=lambda r: r)
+
+
+def test_identical_requests_replay_in_recorded_order(path):
+    _record(path, ["first", "second"])
+    use_cassette(path, "replay", latency_scale=0)
+    assert [_replay() for _ in range(3)] == ["first", "second", "second"]
+    assert cassette._cassette.stats()["replayed"] == 3
+
+
+def test_replay_scope_restarts_recorded_order(path):
+    _record(path, ["first", "second"])
+    use_cassette(path, "replay", latency_scale=0)
+    assert _replay() == "first"
+    with replay_scope():
+        assert [_replay(), _replay()] == ["first", "second"]
+    assert _replay() == "second"
+
+
+def test_unrecorded_call_raises_unless_passthrough(path, monkeypatch):
+    _record(path, ["first"])
+    use_cassette(path, "replay", latency_scale=0)
+    other = {**REQUEST, "temperature": 1}
+    with pytest.raises(CassetteMiss):
+        call("litellm", other, lambda: "live", dump=lambda r: r, load=lambda r: r)
+    monkeypatch.setattr(cassette, "CASSETTE_PASSTHROUGH", True)
+    assert call("litellm", other, lambda: "live", dump=lambda r: r, load=lambda r: r) == "live"
+    assert _replay() == "first"
+
+
+def test_truncated_cassette_keeps_complete_entries(path):
+    _record(path, ["first", "second"])
+    with gzip.open(path, "rb") as f:
+        data = f.read()
+    # A run that crashed mid-write leaves a partial last line.
+    with open(path, "wb") as f:
+        f.write(gzip.compress(data[:-10]))
+    assert [entry["response"] for entry in read_entries(path)] == ["first"]
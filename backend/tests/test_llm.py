@@ -0,0 +1,22 @@
+"""Matching a free-text answer from `classify` to one of its labels."""
+import pytest
+
+from src.utils.llm import _match_label
+
+LABELS = ["Data", "Data Science", "Backend", "Other"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Backend", "Backend"),
+    ("  backend. ", "Backend"),
+    ('"Data Science"', "Data Science"),
+    ("**Other**", "Other"),
+    ("The posting is about data science.", "Data Science"),
+    ("Mostly data work.", "Data"),
+    ("Label: BACKEND", "Backend"),
+    ("backends", None),
+    ("Frontend", None),
+    ("", None),
+])
+def test_match_label(text, expected):
+    assert _match_label(text, LABELS) == expected
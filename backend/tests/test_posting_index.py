@@ -0,0 +1,118 @@
+"""Job posting index: URL canonicalization, SimHash and near-duplicate detection."""
+import pytest
+
+from src.agents.job_application.models import JobPosting
+from src.agents.job_application.posting_index import (
+    JobPostingIndex,
+    canonicalize_url,
+    hamming_distance,
+    simhash,
+)
+
+DESCRIPTION = (
+    "We are looking for a backend engineer to design, build and operate the services behind our "
+    "payments platform. You will own APIs written in Python and Go, work with PostgreSQL and Kafka, "
+    "review code, mentor junior engineers and take part in the on-call rotation. Experience with "
+    "distributed systems, observability and cloud infrastructure on AWS is a plus. We offer flexible "
+    "hours, a learning budget and the option to work from home two days a week."
+)
+
+
+def _posting(**overrides):
+    values = dict(job_title="Backend Engineer", company="Globex", location="Berlin, Germany",
+                  job_description=DESCRIPTION, requirements=["python"],
+                  application_link="https://globex.com/careers/backend-engineer", posted_date=None,
+                  employment_type="Full-time")
+    return JobPosting(**{**values, **overrides})
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.Example.com/jobs/42/", "https://example.com/jobs/42"),
+    ("example.com/jobs/42", "https://example.com/jobs/42"),
+    ("http://example.com//jobs//42#apply", "https://example.com/jobs/42"),
+    ("https://example.com/jobs?id=42&utm_source=x&gclid=y&ref=feed", "https://example.com/jobs?id=42"),
+    ("https://example.com/jobs?b=2&a=1", "https://example.com/jobs?a=1&b=2"),
+    ("https://www.linkedin.com/jobs/view/backend-engineer-at-globex-3812345678/?trk=abc",
+     "https://linkedin.com/jobs/view/3812345678"),
+    ("https://de.linkedin.com/jobs/search/?currentJobId=3812345678&keywords=python",
+     "https://linkedin.com/jobs/view/3812345678"),
+    ("https://de.indeed.com/viewjob?jk=ab12cd34ef&from=serp", "https://indeed.com/viewjob?jk=ab12cd34ef"),
+    ("https://www.indeed.com/jobs?q=python&vjk=ab12cd34ef", "https://indeed.com/viewjob?jk=ab12cd34ef"),
+    ("https://www.glassdoor.com/job-listing/x?jobListingId=1009", "https://glassdoor.com/job-listing/?jl=1009"),
+    ("https://job-boards.greenhouse.io/globex/jobs/4567?gh_src=abc", "https://boards.greenhouse.io/globex/jobs/4567"),
+    ("https://jobs.lever.co/globex/0f6b3c1e-8a2d-4c5e-9f10-1a2b3c4d5e6f/apply",
+     "https://jobs.lever.co/globex/0f6b3c1e-8a2d-4c5e-9f10-1a2b3c4d5e6f"),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_simhash_is_deterministic_and_64_bit():
+    assert simhash(DESCRIPTION) == simhash(DESCRIPTION)
+    assert 0 <= simhash(DESCRIPTION) < 1 << 64
+    assert simhash("") == simhash("")
+
+
+def test_simhash_ignores_case_punctuation_and_whitespace():
+    reformatted = "  " + DESCRIPTION.upper().replace(", ", " ; ").replace(". ", "\n\n")
+    assert hamming_distance(simhash(DESCRIPTION), simhash(reformatted)) == 0
+
+
+def test_simhash_distance_reflects_similarity():
+    edited = DESCRIPTION.replace("two days", "three days")
+    unrelated = "Registered nurse for the intensive care unit, night shifts, German B2 required."
+    assert hamming_distance(simhash(DESCRIPTION), simhash(edited)) < hamming_distance(
+        simhash(DESCRIPTION), simhash(unrelated))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return JobPostingIndex(db_path=str(tmp_path / "postings.db"))
+
+
+def test_url_variants_resolve_to_one_entry(index):
+    first = index.add(_posting())
+    second = index.add(_posting(application_link="https://www.globex.com/careers/backend-engineer/?utm_source=li",
+                                job_description="Short copy."))
+    assert second == {"posting_id": first["posting_id"], "duplicate": True, "matched_by": "url"}
+    entry = index.lookup_url("globex.com/careers/backend-engineer#top")
+    assert entry["posting_id"] == first["posting_id"]
+    assert entry["fresh"] and entry["times_seen"] == 2
+
+
+def test_mirror_on_other_site_matches_by_content(index):
+    first = index.add(_posting())
+    mirror = index.add(_posting(application_link="https://jobs.example.org/listing/991", location="Berlin",
+                                job_description=DESCRIPTION.replace("two days", "three days")))
+    assert mirror == {"posting_id": first["posting_id"], "duplicate": True, "matched_by": "content"}
+    assert index.lookup_url("https://jobs.example.org/listing/991")["posting_id"] == first["posting_id"]
+
+
+def test_same_role_in_other_city_or_company_stays_separate(index):
+    first = index.add(_posting())["posting_id"]
+    munich = index.add(_posting(application_link="https://globex.com/careers/backend-munich", location="Munich"))
+    initech = index.add(_posting(application_link="https://initech.com/jobs/1", company="Initech"))
+    assert not munich["duplicate"] and munich["posting_id"] != first
+    assert not initech["duplicate"] and initech["posting_id"] != first
+
+
+def test_posting_without_location_matches_any_location(index):
+    first = index.add(_posting())["posting_id"]
+    result = index.add(_posting(application_link="https://jobs.example.org/listing/7", location=None))
+    assert result["posting_id"] == first and result["matched_by"] == "content"
+
+
+def test_dedupe_keeps_first_copy(index):
+    postings = [
+        _posting(),
+        _posting(application_link="https://globex.com/careers/backend-engineer?utm_campaign=x"),
+        _posting(job_title="Data Engineer", application_link="https://globex.com/careers/data-engineer",
+                 job_description="Build batch and streaming pipelines with Spark and Airflow."),
+    ]
+    unique, removed = index.dedupe(postings)
+    assert removed == 1
+    assert [p.application_link for p in unique] == [postings[0].application_link, postings[2].application_link]
+
+
+def test_unknown_url_is_not_found(index):
+    assert index.lookup_url("https://example.com/jobs/1") is None
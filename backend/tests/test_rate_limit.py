@@ -0,0 +1,189 @@
+"""Token buckets, the circuit breaker and how `guarded_call` classifies errors."""
+import litellm
+import pytest
+
+from src.utils import rate_limit
+from src.utils.rate_limit import CircuitBreaker, CircuitOpenError, TokenBucket, configure_model_limits, guarded_call
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, "sleep", lambda seconds: None)
+
+
+def test_token_bucket_reserves_in_arrival_order(clock):
+    bucket = TokenBucket(rate_per_second=2, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now += 1.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_second=1, capacity=3)
+    bucket.reserve(3)
+    clock.now += 60
+    assert bucket.reserve(3) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_token_bucket_lets_oversized_request_through_once_full(clock):
+    bucket = TokenBucket(rate_per_second=10, capacity=10)
+    assert bucket.reserve(50) == 0
+    assert bucket.reserve(1) == pytest.approx(0.1)
+
+
+def test_token_bucket_set_rate_keeps_accrued_tokens(clock):
+    bucket = TokenBucket(rate_per_second=1, capacity=10)
+    bucket.reserve(10)
+    clock.now += 2
+    bucket.set_rate(10)
+    assert bucket.reserve(2) == 0
+    assert bucket.reserve(1) == pytest.approx(0.1)
+
+
+def test_breaker_opens_after_threshold_and_probes_once(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=30)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_breaker_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == "open" and breaker.trips == 2
+    assert not breaker.allow()
+
+
+def test_breaker_released_probe_is_handed_to_next_call(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "open" and breaker.allow()
+
+
+def test_breaker_replaces_stuck_probe_after_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def _failing(*errors, result="ok"):
+    calls = []
+
+    def live():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return live, calls
+
+
+@pytest.fixture
+def guard(request, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_guards", {})
+    guard = configure_model_limits(f"test/{request.node.name}")
+    guard.breaker.failure_threshold = 3
+    return guard
+
+
+def test_transient_errors_are_retried(guard):
+    live, calls = _failing(_StatusError(503), _StatusError(502))
+    assert guarded_call(guard.model, {}, live) == "ok"
+    assert len(calls) == 3
+    assert guard.breaker.state == "closed" and guard.breaker.failures == 0
+
+
+def test_transient_errors_open_the_breaker(guard):
+    live, _ = _failing(*[_StatusError(503)] * 10)
+    with pytest.raises(CircuitOpenError):
+        guarded_call(guard.model, {}, live)
+    assert guard.breaker.state == "open"
+
+
+def test_rate_limits_throttle_without_opening_the_breaker(guard):
+    live, calls = _failing(_StatusError(429), _StatusError(429))
+    assert guarded_call(guard.model, {}, live) == "ok"
+    assert len(calls) == 3
+    assert guard.breaker.failures == 0
+    assert guard.stats["throttled"] == 2 and guard.scale < 1.0
+
+
+@pytest.mark.parametrize("error", [
+    _StatusError(401),
+    _StatusError(403),
+    litellm.AuthenticationError("bad key", llm_provider="openai", model="gpt-4o"),
+])
+def test_auth_errors_count_towards_the_breaker(guard, error):
+    for _ in range(3):
+        live, calls = _failing(error)
+        with pytest.raises(type(error)):
+            guarded_call(guard.model, {}, live)
+        assert len(calls) == 1
+    assert guard.breaker.state == "open"
+
+
+@pytest.mark.parametrize("error", [_StatusError(400), ValueError("bad request")])
+def test_request_errors_count_neither_way(guard, error):
+    guard.breaker.record_failure()
+    for _ in range(3):
+        live, calls = _failing(error)
+        with pytest.raises(type(error)):
+            guarded_call(guard.model, {}, live)
+        assert len(calls) == 1
+    assert guard.breaker.state == "closed" and guard.breaker.failures == 1
+
+
+def test_request_error_on_probe_hands_probe_to_next_call(guard, clock):
+    guard.breaker.failure_threshold = 1
+    guard.breaker.record_failure()
+    clock.now += guard.breaker.cooldown_seconds
+    live, _ = _failing(_StatusError(400))
+    with pytest.raises(_StatusError):
+        guarded_call(guard.model, {}, live)
+    assert guard.breaker.state == "open"
+    live, _ = _failing()
+    assert guarded_call(guard.model, {}, live) == "ok"
+    assert guard.breaker.state == "closed"
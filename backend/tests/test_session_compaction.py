@@ -0,0 +1,104 @@
+"""Compaction of session histories: where the cut falls and how summaries are folded."""
+import asyncio
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.sessions.database_session_service import DatabaseSessionService
+from google.genai import types
+
+from src.utils.session_compaction import SUMMARY_AUTHOR, SessionCompactor, summarize_events
+
+
+def _text(author, text):
+    return Event(author=author, invocation_id="inv", content=types.Content(
+        role="user" if author == "user" else "model", parts=[types.Part(text=text)]))
+
+
+def _call(call_id, name="search"):
+    return Event(author="agent", invocation_id="inv", content=types.Content(role="model", parts=[
+        types.Part(function_call=types.FunctionCall(id=call_id, name=name, args={"q": call_id}))]))
+
+
+def _response(call_id, name="search"):
+    return Event(author="agent", invocation_id="inv", content=types.Content(role="user", parts=[
+        types.Part(function_response=types.FunctionResponse(id=call_id, name=name, response={"ok": True}))]))
+
+
+def test_split_index_keeps_cut_without_pending_calls():
+    events = [_text("user", "hi"), _call("a"), _response("a"), _text("agent", "done")]
+    assert SessionCompactor._split_index(events, 3) == 3
+
+
+def test_split_index_moves_cut_before_unanswered_call():
+    events = [_text("user", "hi"), _call("a"), _response("a"), _call("b"), _response("b")]
+    # Cutting at 4 would archive call "b" and keep its response.
+    assert SessionCompactor._split_index(events, 4) == 3
+
+
+def test_split_index_handles_parallel_calls():
+    events = [_text("user", "hi"), _call("a"), _call("b"), _response("a"), _response("b"), _text("agent", "ok")]
+    assert SessionCompactor._split_index(events, 4) == 1
+    assert SessionCompactor._split_index(events, 5) == 5
+
+
+def test_summarize_events_folds_earlier_summary():
+    first = summarize_events([_text("user", "find jobs"), _text("agent", "searching")])
+    summary = Event(author=SUMMARY_AUTHOR, invocation_id="inv", custom_metadata={"compacted_events": 2},
+                    content=types.Content(role="model", parts=[types.Part(text=first)]))
+    text = summarize_events([summary, _text("user", "in Berlin")])
+    lines = text.splitlines()
+    assert lines[0].startswith("Summary of 3 earlier events")
+    assert lines[1:] == ["[user] find jobs", "[agent] searching", "[user] in Berlin"]
+
+
+@pytest.fixture
+def service(tmp_path):
+    return DatabaseSessionService(f"sqlite:///{tmp_path / 'sessions.db'}")
+
+
+def _append(service, session, events):
+    async def run():
+        for event in events:
+            await service.append_event(session, event)
+    asyncio.run(run())
+
+
+def _stored(service, session):
+    return asyncio.run(service.get_session(app_name=session.app_name, user_id=session.user_id,
+                                           session_id=session.id)).events
+
+
+def test_compact_session_never_splits_call_and_response(service):
+    session = asyncio.run(service.create_session(app_name="app", user_id="u"))
+    _append(service, session, [_text("user", "hi"), _call("a"), _response("a"), _call("b"), _response("b"),
+                               _text("agent", "done")])
+    compactor = SessionCompactor(service, max_events=4, keep_recent=2)
+
+    result = compactor.compact_session("app", "u", session.id)
+
+    assert result == {"archived": 3, "kept": 3}
+    events = _stored(service, session)
+    assert events[0].author == SUMMARY_AUTHOR
+    assert events[0].custom_metadata == {"compacted_events": 3}
+    assert events[1].get_function_calls()[0].id == "b"
+    assert len(compactor.load_archived_events("app", "u", session.id)) == 3
+
+
+def test_compact_session_twice_keeps_a_single_summary(service):
+    session = asyncio.run(service.create_session(app_name="app", user_id="u"))
+    _append(service, session, [_text("user", f"message {i}") for i in range(6)])
+    compactor = SessionCompactor(service, max_events=4, keep_recent=2)
+    compactor.compact_session("app", "u", session.id)
+
+    session = asyncio.run(service.get_session(app_name="app", user_id="u", session_id=session.id))
+    _append(service, session, [_text("user", f"message {i}") for i in range(6, 10)])
+    compactor.compact_session("app", "u", session.id)
+
+    events = _stored(service, session)
+    summaries = [e for e in events if e.author == SUMMARY_AUTHOR]
+    assert len(summaries) == 1
+    assert summaries[0].custom_metadata == {"compacted_events": 8}
+    assert "[user] message 0" in summaries[0].content.parts[0].text
+    assert [e.content.parts[0].text for e in events[1:]] == ["message 8", "message 9"]
+    # The second archive holds the first summary alongside the four messages it replaced.
+    assert len(compactor.load_archived_events("app", "u", session.id)) == 9